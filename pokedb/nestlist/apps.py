@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class NestlistConfig(AppConfig):
     name = "nestlist"
     verbose_name = "Duck's Nest List"
+
+    def ready(self):
+        # connect the signals that rebuild the in-memory lookup tables and cached pages
+        from . import (
+            nest_index,
+            geo_index,
+            rotation_index,
+            place_graph,
+            page_cache,
+            current_list,
+        )
+
+        # the name search's __trigram_similar, registered once where pg_trgm exists
+        from .search import on_postgres, register_trigram_lookup
+
+        if on_postgres():
+            register_trigram_lookup()
@@ -0,0 +1,86 @@
+"""
+Process-local memos of lookup tables that are expensive to build from the database
+
+Each memo keeps a version stamp in the shared Django cache (memcached in production),
+so a save in one process (the admin, rotate.py, the importers) makes every other process
+rebuild its copy within a few seconds.  Saves in the same process take effect as soon as
+their transaction commits: bumping the version any sooner would let another process
+rebuild from the rows as they were before the commit and keep that under the new version.
+"""
+
+import threading
+import time
+from uuid import uuid4
+from typing import Callable, Generic, TypeVar, Optional, List, Any
+from django.core.cache import cache
+from django.db import transaction
+
+T = TypeVar("T")
+_all_memos: "List[VersionedMemo]" = []
+
+
+class VersionedMemo(Generic[T]):
+    def __init__(self, name: str, builder: Callable[[], T], check_every: float = 5.0):
+        """
+        :param name: unique name for the version key in the shared cache
+        :param builder: function that builds the memo from the database
+        :param check_every: seconds between checks of the shared version stamp
+        """
+        self.key: str = f"memo-version:{name}"
+        self.builder: Callable[[], T] = builder
+        self.check_every: float = check_every
+        self._value: Optional[T] = None
+        self._version: Optional[str] = None
+        self._generation: int = 0  # bumped on local invalidation
+        self._next_check: float = 0.0
+        self._lock = threading.RLock()
+        _all_memos.append(self)
+
+    def _shared_version(self) -> Optional[str]:
+        try:
+            return cache.get(self.key)
+        except Exception:  # a missing memcached shouldn't take the site down
+            return None
+
+    def get(self) -> T:
+        """:return: the memo, rebuilding it first if it is out of date"""
+        value: Optional[T] = self._value
+        if value is not None and time.monotonic() < self._next_check:
+            return value
+        with self._lock:
+            version: Optional[str] = self._shared_version()
+            if self._value is None or version != self._version:
+                generation: int = self._generation
+                value = self.builder()
+                if generation != self._generation:  # saved while we were building
+                    return value
+                self._value, self._version = value, version
+            self._next_check = time.monotonic() + self.check_every
+            return self._value
+
+    def invalidate(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Forget the memo here and everywhere else once the transaction commits
+        (usable as a signal receiver); nothing is forgotten if it rolls back
+        """
+        transaction.on_commit(self.forget)
+
+    def forget(self) -> None:
+        """Forget the memo here and everywhere else right away"""
+        with self._lock:
+            self._value = None
+            self._generation += 1
+        try:
+            cache.set(self.key, uuid4().hex, None)
+        except Exception:
+            pass
+
+
+def forget_all_memos() -> None:
+    """
+    Forget every memo in this process right away
+
+    Tests need this since rolling back a transaction doesn't send any signals.
+    """
+    for memo in _all_memos:
+        memo.forget()
@@ -0,0 +1,250 @@
+"""
+Keeps NstCurrentNest, the denormalized snapshot of the live nest list, in step with the NSLA
+
+A rotation's snapshot is built in full by new_rotation.  A current rotation without one
+(such as right after deploying this) is built by its first read, under a lock on the
+rotation's row so that two first reads can't both insert it.  Reads check a memo of the
+built rotations instead of the table; writes still ask the table, since a memo a few
+seconds behind would skip rows that need rebuilding.
+
+After that, only the rows for the nests that change are rebuilt: reports and NSLA edits
+arrive through the signals below or add_reports_bulk, and nest or neighborhood edits
+through the signals.  An NSLA edit that moves its row to another nest or rotation
+rebuilds the row it left as well.  The changes are collected until the transaction commits, so a
+report that saves both its NSLA row and its NstRawRpt row rebuilds that nest's row once.
+Snapshots more than a rotation old are dropped by new_rotation.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import datetime
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete
+from typing import Dict, List, Set, Optional, Iterable, Tuple, Any
+from .models import (
+    NstCurrentNest,
+    NstSpeciesListArchive,
+    NstRawRpt,
+    NstLocation,
+    NstNeighborhood,
+    NstRotationDate,
+)
+from .caching import VersionedMemo
+from .utils import append_utc
+
+_pending = threading.local()  # (rotation, nest) pairs waiting for their transaction
+
+
+def build_rows(rotation: int, nests: Optional[Set[int]] = None) -> List[NstCurrentNest]:
+    """
+    :param rotation: rotation number
+    :param nests: only build the rows for these nests (default: every nest)
+    :return: unsaved snapshot rows: every nest with an NSLA row and every other non-duplicate
+    """
+    places = NstLocation.objects.values(
+        "nestID",
+        "official_name",
+        "short_name",
+        "duplicate_of",
+        "neighborhood",
+        "neighborhood__name",
+        "neighborhood__major_city",
+    )
+    nslas = NstSpeciesListArchive.objects.filter(rotation_num=rotation)
+    reports = NstRawRpt.objects.filter(nsla_pk__rotation_num=rotation)
+    if nests is not None:
+        places = places.filter(nestID__in=nests)
+        nslas = nslas.filter(nestid__in=nests)
+        reports = reports.filter(nsla_pk__nestid__in=nests)
+    listed: Dict[int, NstSpeciesListArchive] = {n.nestid_id: n for n in nslas}
+    latest: Dict[int, dict] = {}
+    for rpt in reports.order_by("timestamp", "pk").values(
+        "nsla_pk", "raw_species_num", "raw_park_info", "timestamp"
+    ):
+        latest[rpt["nsla_pk"]] = rpt
+    out: List[NstCurrentNest] = []
+    for place in places:
+        nsla: Optional[NstSpeciesListArchive] = listed.get(place["nestID"])
+        if nsla is None and place["duplicate_of"]:
+            continue
+        rpt: Optional[dict] = latest.get(nsla.pk) if nsla else None
+        out.append(
+            NstCurrentNest(
+                rotation_num_id=rotation,
+                nestid_id=place["nestID"],
+                city_id=place["neighborhood__major_city"],
+                neighborhood_id=place["neighborhood"],
+                nsla=nsla,
+                nest_name=place["official_name"],
+                nest_short_name=place["short_name"],
+                neighborhood_name=place["neighborhood__name"],
+                species_txt=nsla.species_txt if nsla else None,
+                species_no=nsla.species_no if nsla else None,
+                species_name_fk_id=nsla.species_name_fk_id if nsla else None,
+                confirmation=nsla.confirmation if nsla else None,
+                last_report=(
+                    f"{rpt['raw_species_num']} reported at {rpt['raw_park_info']}"[:255]
+                    if rpt
+                    else None
+                ),
+                last_report_time=rpt["timestamp"] if rpt else None,
+            )
+        )
+    return out
+
+
+def built_rotations() -> Set[int]:
+    """:return: numbers of the rotations that have a snapshot"""
+    return set(NstCurrentNest.objects.values_list("rotation_num", flat=True).distinct())
+
+
+built_memo: "VersionedMemo[Set[int]]" = VersionedMemo("current-built", built_rotations)
+
+
+def materialize(rotation: NstRotationDate) -> None:
+    """(Re)build the whole snapshot for the rotation"""
+    with transaction.atomic():
+        NstCurrentNest.objects.filter(rotation_num=rotation).delete()
+        NstCurrentNest.objects.bulk_create(build_rows(rotation.pk))
+    built_memo.invalidate()
+
+
+def build_if_missing(rotation: NstRotationDate) -> None:
+    """Build the snapshot for the rotation unless another request already has"""
+    with transaction.atomic():
+        # concurrent first reads wait here, then find the rows the first one inserted
+        NstRotationDate.objects.select_for_update().filter(pk=rotation.pk).exists()
+        if not NstCurrentNest.objects.filter(rotation_num=rotation).exists():
+            NstCurrentNest.objects.bulk_create(build_rows(rotation.pk))
+    built_memo.invalidate()
+
+
+def drop_before(rotation: int) -> None:
+    """Drop the snapshots of rotations numbered before this one"""
+    NstCurrentNest.objects.filter(rotation_num__lt=rotation).delete()
+    built_memo.invalidate()
+
+
+def refresh_current_nests(
+    changes: Iterable[Tuple[Optional[int], Optional[int]]]
+) -> None:
+    """
+    Rebuild the snapshot rows for these nests
+    Rotations without a snapshot are skipped.
+    :param changes: (rotation number, nest id) pairs
+    """
+    by_rotation: Dict[int, Set[int]] = defaultdict(set)
+    for rotation, nest in changes:
+        if rotation and nest:
+            by_rotation[rotation].add(nest)
+    if not by_rotation:
+        return
+    with transaction.atomic():
+        for rotation in built_rotations() & set(by_rotation):
+            NstCurrentNest.objects.filter(
+                rotation_num=rotation, nestid__in=by_rotation[rotation]
+            ).delete()
+            NstCurrentNest.objects.bulk_create(
+                build_rows(rotation, by_rotation[rotation])
+            )
+
+
+def refresh_on_commit(changes: Iterable[Tuple[Optional[int], Optional[int]]]) -> None:
+    """
+    refresh_current_nests once the transaction commits (right away outside of one)
+    Every pair queued during the transaction is rebuilt once, however many saves touched it.
+    :param changes: (rotation number, nest id) pairs
+    """
+    if not hasattr(_pending, "changes"):
+        _pending.changes = set()
+    _pending.changes.update(changes)
+    # the first callback to run rebuilds everything; pairs queued by a transaction that
+    # rolled back ride along with the next commit, which is harmless
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending() -> None:
+    changes, _pending.changes = getattr(_pending, "changes", set()), set()
+    refresh_current_nests(changes)
+
+
+def refresh_nests(nests: Iterable[int]) -> None:
+    """Rebuild the rows for these nests in every snapshot (after the nests are edited)"""
+    nests = list(nests)
+    refresh_on_commit((r, n) for r in built_rotations() for n in nests)
+
+
+def current_nest_rows(
+    rotation: NstRotationDate, now: Optional[datetime] = None
+) -> "Optional[QuerySet[NstCurrentNest]]":
+    """
+    :param rotation: the rotation to list
+    :param now: when "current" is (default: now)
+    :return: the snapshot for the current rotation (None for any other rotation)
+    """
+    from .rotation_index import rotation_table
+
+    current: Optional[NstRotationDate] = rotation_table().on_or_before(
+        now or append_utc(datetime.utcnow())
+    )
+    if current is None or rotation.pk != current.pk:
+        return None  # past rotations are listed straight from the NSLA
+    if rotation.pk not in built_memo.get():
+        build_if_missing(rotation)
+    return NstCurrentNest.objects.filter(rotation_num=rotation)
+
+
+def scope_filter(location_pk: int, location_type: str, prefix: str = "") -> Q:
+    """
+    :param location_pk: id of the location
+    :param location_type: "city", "neighborhood", "region", or "ps"
+    :param prefix: path from the model being filtered to NstCurrentNest (with the __)
+    :return: filter for the snapshot rows in the location
+    """
+    from .place_graph import nests_filter
+
+    location_type = (location_type or "").strip().lower()
+    if location_type == "city":
+        return Q(**{f"{prefix}city": location_pk})
+    if location_type == "neighborhood":
+        return Q(**{f"{prefix}neighborhood": location_pk})
+    return nests_filter(location_type, location_pk, f"{prefix}nestid__")
+
+
+def _nsla_loaded(instance: NstSpeciesListArchive, **kwargs: Any) -> None:
+    # where the row was, in case a save moves it to another nest or rotation
+    # (from __dict__, so that a deferred field isn't fetched for every row loaded)
+    instance._snapshot_key = (
+        instance.__dict__.get("rotation_num_id"),
+        instance.__dict__.get("nestid_id"),
+    )
+
+
+def _nsla_changed(instance: NstSpeciesListArchive, **kwargs: Any) -> None:
+    new_key: Tuple[int, int] = (instance.rotation_num_id, instance.nestid_id)
+    refresh_on_commit({getattr(instance, "_snapshot_key", new_key), new_key})
+    instance._snapshot_key = new_key
+
+
+def _report_changed(instance: NstRawRpt, **kwargs: Any) -> None:
+    if instance.nsla_pk_id:  # its NSLA row is always for the nest it reported
+        refresh_on_commit([(instance.calculated_rotation_id, instance.parklink_id)])
+
+
+def _nest_changed(instance: NstLocation, **kwargs: Any) -> None:
+    refresh_nests([instance.pk])
+
+
+def _neighborhood_changed(instance: NstNeighborhood, **kwargs: Any) -> None:
+    refresh_nests(instance.nstlocation_set.values_list("pk", flat=True))
+
+
+# bulk_create and bulk_update don't send signals; add_reports_bulk calls refresh_on_commit
+post_init.connect(_nsla_loaded, sender=NstSpeciesListArchive, dispatch_uid="current")
+post_save.connect(_nsla_changed, sender=NstSpeciesListArchive, dispatch_uid="current")
+post_delete.connect(_nsla_changed, sender=NstSpeciesListArchive, dispatch_uid="current")
+post_save.connect(_report_changed, sender=NstRawRpt, dispatch_uid="current")
+post_save.connect(_nest_changed, sender=NstLocation, dispatch_uid="current")
+post_save.connect(_neighborhood_changed, sender=NstNeighborhood, dispatch_uid="current")
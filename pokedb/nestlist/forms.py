@@ -1,51 +1,63 @@
 from django import forms
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from nestlist.models import query_nests, NstNeighborhood, NstCombinedRegion
-from nestlist.utils import parse_date
-from speciesinfo.models import (
-    match_species_by_name_or_number,
-    enabled_in_pogo,
-    nestable_species,
+from nestlist.models import (
+    query_nests,
+    get_rotation,
+    get_true_self,
+    NstNeighborhood,
+    NstCombinedRegion,
+    NstLocation,
+    NstRotationDate,
 )
-from typing import Dict, Any
+from nestlist.utils import parse_date
+from nestlist.geo_index import nest_geo_index, NearbyNest
+from nestlist.nest_index import nest_name_index
+from speciesinfo.models import Pokemon, enabled_in_pogo, nestable_species
+from typing import Dict, Any, List, Optional
 
 MAGIC_NEWLINE = f" gnbgkas "
 QUOT_L = f"«"
 QUOT_R = f"»"
+REPORT_RADIUS_M = 250  # how far from a reporter's GPS fix to look for the nest
+
 
+def resolve_pokemon(value, isl=enabled_in_pogo(nestable_species())) -> Pokemon:
+    """
+    Raises ValidationError unless exactly one species matches
+    :return: the reported species, by the same rules add_a_report would use
+    """
+    from speciesinfo.dex_index import species_index
 
-def pokemon_validator(value, isl=enabled_in_pogo(nestable_species())):
-    match_count: int = match_species_by_name_or_number(
-        sp_txt=value,
-        only_one=True,
-        input_set=isl,
-        age_up=True,
-        previous_evolution_search=True,
-    ).count()
+    found: List[Pokemon] = species_index().search(
+        value, isl, age_up=True, previous_evolution_search=True, only_one=True
+    )
     stem: str = f"⚠️{QUOT_L}{value}{QUOT_R} "
-    if match_count == 0:
+    if not found:
         raise ValidationError(stem + f"did not match any pokémon.")
-    elif match_count > 1:
+    elif len(found) > 1:
         raise ValidationError(
             stem
-            + f"matched {match_count} pokémon.{MAGIC_NEWLINE}  Please be more specific."
+            + f"matched {len(found)} pokémon.{MAGIC_NEWLINE}  Please be more specific."
         )
+    return found[0]
 
 
-def park_validator(
-    value, place=None, restrict_city: bool = False, scope: str = "jurisdiction"
-):
-    match_count: int = query_nests(
-        value, location_id=place, location_type=scope, only_one=True
-    ).count()
+def resolve_park(value, place=None, scope: str = "jurisdiction") -> NstLocation:
+    """
+    Raises ValidationError unless exactly one nest matches
+    :return: the reported nest (or the nest it's a duplicate of)
+    """
+    found: List[NstLocation] = list(
+        query_nests(value, location_id=place, location_type=scope, only_one=True)
+    )
     err_str: str = f"⚠️{QUOT_L}{value}{QUOT_R} "
     place_num = 0
     try:
         place_num = place.pk
     except AttributeError:
         pass
-    if match_count == 0:
+    if not found:
         err_str += f"did not match any nests"
         if place_num:
             err_str += f" in {scope} #{place_num}"
@@ -54,10 +66,11 @@ def park_validator(
         err_str += f" and in the correct {scope}, "
         err_str += f"please contact a nest master."
         raise ValidationError(err_str)
-    if restrict_city and match_count > 1:
-        err_str += f"matched {match_count} nests when a unique match was required."
+    if len(found) > 1:
+        err_str += f"matched {len(found)} nests when a unique match was required."
         err_str += MAGIC_NEWLINE + f"\nPlease be more specific."
         raise ValidationError(err_str)
+    return get_true_self(found[0])
 
 
 def date_validator(value):
@@ -72,6 +85,11 @@ def date_validator(value):
 
 
 class NestReportForm(forms.Form):
+    """
+    Besides the fields, cleaned_data gets the species, nest, and rotation the report
+    resolves to ("pokemon", "nest", & "rotation") for add_a_report to use as-is
+    """
+
     def __init__(self, request=None, city=None):
         super(NestReportForm, self).__init__(request)
         self.city = city
@@ -96,12 +114,15 @@ so long as you're consistent.",
         help_text="Which part of town?",
         widget=forms.TextInput(attrs={"placeholder": "Option to refine park results."}),
     )
-    park = forms.CharField(
-        label="Park", validators=[park_validator], help_text="Where were you?"
+    # checked in clean(), where the neighborhood or GPS fix is known
+    park = forms.CharField(label="Park", required=False, help_text="Where were you?")
+    lat = forms.FloatField(
+        required=False, min_value=-90, max_value=90, widget=forms.HiddenInput
     )
-    species = forms.CharField(
-        label="Species", validators=[pokemon_validator], help_text="What did you see?"
+    lon = forms.FloatField(
+        required=False, min_value=-180, max_value=180, widget=forms.HiddenInput
     )
+    species = forms.CharField(label="Species", help_text="What did you see?")
     timestamp = forms.CharField(
         label="time of sighting",
         initial=parse_date("h-1").strftime("%Y-%m-%d %H:%M"),
@@ -110,6 +131,21 @@ so long as you're consistent.",
         validators=[date_validator],
     )
 
+    def nest_near(self, lat: float, lon: float, park: str) -> Optional[int]:
+        """
+        :param lat: latitude of the reporter
+        :param lon: longitude of the reporter
+        :param park: what the reporter typed, if anything, to pick among the nearby nests
+        :return: ID of the closest nest to the reporter (that matches park), if any
+        """
+        nearby: List[NearbyNest] = nest_geo_index().nearest(
+            lat, lon, REPORT_RADIUS_M, city=self.city, exclude_permanent=True
+        )
+        if park:
+            named = nest_name_index().search(park, self.city)
+            nearby = [n for n in nearby if n.nest_id in named]
+        return nearby[0].nest_id if nearby else None
+
     def clean(self) -> Dict[str, Any]:
         # filter parks within the city
         cd: Dict = self.cleaned_data
@@ -148,20 +184,42 @@ so long as you're consistent.",
         if not complete:
             place, scope = self.city, "city"
 
-        # check if the park is hooked up
-        try:
-            park_validator(
-                value=cd["park"], place=place, restrict_city=True, scope=scope
+        # a GPS fix picks the nest without searching names across the whole city
+        park: str = cd.get("park", "").strip()
+        lat, lon = cd.get("lat"), cd.get("lon")
+        nearby: Optional[int] = (
+            self.nest_near(lat, lon, park) if None not in (lat, lon) else None
+        )
+        if nearby is not None:
+            cd["nest"] = get_true_self(NstLocation.objects.get(pk=nearby))
+            place, scope = self.city, "city"
+        elif not park:
+            self.add_error(
+                "park",
+                f"No nests within {REPORT_RADIUS_M} m of you; please name the park."
+                if None not in (lat, lon)
+                else "This field is required.",
             )
+        else:  # check if the park is hooked up
+            try:
+                cd["nest"] = resolve_park(value=park, place=place, scope=scope)
+            except ValidationError as ve:
+                self.add_error("park", ve)
+        cd["subplace"]: int = place.pk
+        cd["scope"] = scope
+
+        try:
+            cd["pokemon"] = resolve_pokemon(cd["species"])
         except ValidationError as ve:
-            self.add_error("park", ve)
+            self.add_error("species", ve)
         except KeyError:
             pass
-        cd["subplace"]: int = place.pk
-        cd["scope"] = scope
 
         try:
             cd["timestamp"] = parse_date(cd["timestamp"])
+            cd["rotation"] = get_rotation(cd["timestamp"])
+        except NstRotationDate.DoesNotExist:
+            self.add_error("timestamp", f"⚠️No nest rotation on or before that date.")
         except KeyError:
             pass
         return cd
@@ -0,0 +1,146 @@
+"""
+In-memory spatial index of the nests that have coordinates, for "nests near here" lookups
+
+Nests are bucketed into a grid of CELL_DEG × CELL_DEG cells by lat/lon, so a lookup only
+measures the distance to the nests in the few cells that overlap the search circle's
+bounding box.  No city straddles the antimeridian, so longitudes don't wrap.
+It is rebuilt after any nest or neighborhood is saved.
+"""
+
+from math import radians, sin, cos, asin, sqrt, floor, pi
+from django.db.models.signals import post_save, post_delete
+from typing import Dict, List, Set, Optional, Union, Iterable, NamedTuple, Tuple
+from collections import defaultdict
+from .caching import VersionedMemo
+from .models import NstLocation, NstNeighborhood, NstMetropolisMajor
+
+EARTH_RADIUS_M: float = 6_371_008.8
+M_PER_DEG_LAT: float = EARTH_RADIUS_M * pi / 180  # about 111 km
+CELL_DEG: float = 0.01  # about 1.1 km north-south
+DEFAULT_RADIUS_M: float = 500
+MAX_RADIUS_M: float = 25_000
+
+Cell = Tuple[int, int]
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """:return: great-circle distance between the points in meters (haversine)"""
+    dlat, dlon = radians(lat2 - lat1), radians(lon2 - lon1)
+    a = (
+        sin(dlat / 2) ** 2
+        + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * asin(min(1.0, sqrt(a)))
+
+
+def check_coordinates(lat: float, lon: float) -> None:
+    """Raises ValueError for coordinates that aren't on Earth"""
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"({lat}, {lon}) isn't a valid latitude & longitude")
+
+
+def cell_of(lat: float, lon: float) -> Cell:
+    return floor(lat / CELL_DEG), floor(lon / CELL_DEG)
+
+
+class NearbyNest(NamedTuple):
+    nest_id: int
+    meters: float
+
+
+class NestGeoIndex:
+    def __init__(self, nests: Iterable[dict]):
+        """:param nests: values() of NstLocation with the nest's city"""
+        self.points: Dict[int, Tuple[float, float]] = {}
+        self.city_of: Dict[int, Optional[int]] = {}
+        self.permanent: Set[int] = set()
+        self.cells: Dict[Cell, List[int]] = defaultdict(list)
+        for nest in nests:
+            lat, lon = nest["lat"], nest["lon"]
+            if lat is None or lon is None:
+                continue
+            try:
+                check_coordinates(lat, lon)
+            except ValueError:  # junk from an import; the nest just can't be found here
+                continue
+            pk: int = nest["nestID"]
+            self.points[pk] = (lat, lon)
+            self.city_of[pk] = nest["neighborhood__major_city"]
+            if nest["permanent_species"]:
+                self.permanent.add(pk)
+            self.cells[cell_of(lat, lon)].append(pk)
+
+    def candidates(self, lat: float, lon: float, within_m: float) -> Iterable[int]:
+        """:return: nests in the cells around the circle, a superset of the ones in it"""
+        dlat: float = within_m / M_PER_DEG_LAT
+        dlon: float = dlat / max(cos(radians(lat)), 0.01)
+        south, west = cell_of(lat - dlat, lon - dlon)
+        north, east = cell_of(lat + dlat, lon + dlon)
+        if (north - south + 1) * (east - west + 1) > len(self.cells):
+            return self.points  # cheaper to measure everything
+        return [
+            pk
+            for row in range(south, north + 1)
+            for col in range(west, east + 1)
+            for pk in self.cells.get((row, col), [])
+        ]
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        within_m: float = DEFAULT_RADIUS_M,
+        city: Optional[Union[NstMetropolisMajor, int]] = None,
+        limit: Optional[int] = None,
+        exclude_permanent: bool = False,
+    ) -> List[NearbyNest]:
+        """
+        Raises ValueError for coordinates that aren't on Earth
+        :param lat: latitude of the search point
+        :param lon: longitude of the search point
+        :param within_m: how far from the point to look, in meters
+        :param city: only look for nests in this city (or its id)
+        :param limit: the most nests to return
+        :param exclude_permanent: leave out nests with a permanent nesting species
+        :return: the nests within the distance, closest first
+        """
+        check_coordinates(lat, lon)
+        city_id: Optional[int] = getattr(city, "pk", city)
+        out: List[NearbyNest] = []
+        for pk in self.candidates(lat, lon, within_m):
+            if city_id and self.city_of[pk] != city_id:
+                continue
+            if exclude_permanent and pk in self.permanent:
+                continue
+            meters: float = distance_m(lat, lon, *self.points[pk])
+            if meters <= within_m:
+                out.append(NearbyNest(pk, meters))
+        out.sort(key=lambda n: (n.meters, n.nest_id))
+        return out if limit is None else out[: max(limit, 0)]
+
+
+def build_nest_geo_index() -> NestGeoIndex:
+    return NestGeoIndex(
+        NstLocation.objects.values(
+            "nestID", "lat", "lon", "permanent_species", "neighborhood__major_city"
+        )
+    )
+
+
+nest_geo_memo: "VersionedMemo[NestGeoIndex]" = VersionedMemo(
+    "nest-geo", build_nest_geo_index
+)
+
+
+def nest_geo_index() -> NestGeoIndex:
+    """:return: the current NestGeoIndex, building it if needed"""
+    return nest_geo_memo.get()
+
+
+for _model in [NstLocation, NstNeighborhood]:
+    post_save.connect(
+        nest_geo_memo.invalidate, sender=_model, dispatch_uid=f"nest-geo-{_model}"
+    )
+    post_delete.connect(
+        nest_geo_memo.invalidate, sender=_model, dispatch_uid=f"nest-geo-{_model}"
+    )
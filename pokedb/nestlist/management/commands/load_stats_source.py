@@ -0,0 +1,281 @@
+"""
+Loads the seed data in stats_source/ into a database
+
+    ./manage.py load_stats_source [--source ../stats_source] [--only rotations …]
+
+Each file is streamed and written in batches with bulk_create/bulk_update, so standing up
+a fresh database (or a test fixture) takes seconds instead of a save() per row.
+Rows that are already in the database are left alone, so it is safe to run it again.
+
+rotation_dates.csv → NstRotationDate
+species_list.csv   → NstSpeciesListArchive (only for nests already in the database)
+HW-metric.tsv      → Pokemon.ht_m & wt_kg
+Biomes/*.tsv       → Biome & Pokemon.habitat
+Bodies/*.tsv       → BodyPlan & Pokemon.body_plan
+
+CP_count.csv is a histogram with no table to go into, so it isn't loaded.
+"""
+
+import csv
+import os
+from datetime import datetime
+from itertools import islice
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Model
+from nestlist.caching import forget_all_memos
+from nestlist.current_list import built_rotations, materialize
+from nestlist.models import NstRotationDate, NstSpeciesListArchive, NstLocation
+from nestlist.page_cache import forget_all_pages
+from nestlist.utils import append_utc, str_int
+from speciesinfo.dex_index import species_index
+from speciesinfo.models import Pokemon, Biome, BodyPlan
+
+T = TypeVar("T")
+M = TypeVar("M", bound=Model)
+DEFAULT_SOURCE: str = os.path.join(os.path.dirname(settings.BASE_DIR), "stats_source")
+LOADERS: List[str] = ["rotations", "nests", "hw", "biomes", "bodies"]
+
+
+def batches(rows: Iterable[T], size: int) -> Iterator[List[T]]:
+    it: Iterator[T] = iter(rows)
+    while True:
+        batch: List[T] = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_new(batch: List[M], key: Tuple[str, ...]) -> int:
+    """
+    bulk_create the rows of the batch that aren't in the database yet
+    :param key: the fields that tell the rows apart
+    :return: how many rows were new
+    """
+    model: Type[M] = type(batch[0])
+    seen: Set[tuple] = set(
+        model.objects.filter(
+            **{f"{field}__in": {getattr(row, field) for row in batch} for field in key}
+        ).values_list(*key)
+    )
+    new: List[M] = []
+    for row in batch:
+        values: tuple = tuple(getattr(row, field) for field in key)
+        if values not in seen:
+            seen.add(values)
+            new.append(row)
+    model.objects.bulk_create(new, ignore_conflicts=True)  # in case of a race
+    return len(new)
+
+
+def read_table(path: str, delimiter: str = ",") -> Iterator[Dict[str, str]]:
+    """:return: the rows of a CSV/TSV file as dicts, with the stray spaces stripped"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header: List[str] = [h.strip() for h in next(reader, [])]
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield {h: cell.strip() for h, cell in zip(header, row)}
+
+
+def pokemon_by_name() -> Dict[str, str]:
+    """:return: lowercase name → primary key of every Pokémon"""
+    return {name.lower(): name for name in Pokemon.objects.values_list("pk", flat=True)}
+
+
+def load_rotations(source: str, size: int) -> Tuple[int, int]:
+    """:return: rows written and rows skipped (unreadable or already in the database)"""
+    written, skipped = 0, 0
+
+    def rotations() -> Iterator[NstRotationDate]:
+        nonlocal skipped
+        for row in read_table(os.path.join(source, "rotation_dates.csv")):
+            try:
+                date: datetime = datetime.strptime(row["date"], "%Y-%m-%d")
+            except ValueError:  # rotation 0 is "Never"
+                skipped += 1
+                continue
+            yield NstRotationDate(
+                num=int(row["num"]),
+                date=append_utc(date),
+                special_note=row.get("special_note") or None,
+            )
+
+    for batch in batches(rotations(), size):
+        new: int = insert_new(batch, ("num",))
+        written += new
+        skipped += len(batch) - new
+    return written, skipped
+
+
+def load_nests(source: str, size: int) -> Tuple[int, int]:
+    """
+    :return: rows written and rows skipped (for nests or rotations that aren't in the
+    database, or already in the NSLA)
+    """
+    written, skipped = 0, 0
+    nests = set(NstLocation.objects.values_list("pk", flat=True))
+    rotations = set(NstRotationDate.objects.values_list("pk", flat=True))
+    dex = species_index()
+
+    def species(name: str, number: Optional[int]) -> Optional[str]:
+        exact: List[str] = dex.exact.get(name.lower(), [])
+        if len(exact) == 1:
+            return exact[0]
+        by_number = dex.by_dex.get(number, set()) if number is not None else set()
+        return next(iter(by_number)) if len(by_number) == 1 else None
+
+    def rows() -> Iterator[NstSpeciesListArchive]:
+        nonlocal skipped
+        for row in read_table(os.path.join(source, "species_list.csv")):
+            nest, rotation = int(row["nestid"]), int(row["rotation_num"])
+            if nest not in nests or rotation not in rotations:
+                skipped += 1
+                continue
+            number: Optional[int] = (
+                int(row["species_no"]) if str_int(row["species_no"]) else None
+            )
+            yield NstSpeciesListArchive(
+                rotation_num_id=rotation,
+                nestid_id=nest,
+                species_txt=row["species_txt"] or None,
+                species_no=number,
+                species_name_fk_id=species(row["species_txt"], number),
+                confirmation=row["confirmation"] == "1",
+            )
+
+    for batch in batches(rows(), size):
+        new: int = insert_new(batch, ("rotation_num_id", "nestid_id"))
+        written += new
+        skipped += len(batch) - new
+    return written, skipped
+
+
+def update_pokemon(
+    pairs: Iterable[Tuple[Optional[str], Dict]], fields: List[str], size: int
+) -> Tuple[int, int]:
+    """
+    :param pairs: (primary key or None if it didn't match, new field values)
+    :return: rows written and rows skipped
+    """
+    written, skipped = 0, 0
+
+    def updates() -> Iterator[Pokemon]:
+        nonlocal skipped
+        for pk, values in pairs:
+            if pk is None:
+                skipped += 1
+                continue
+            yield Pokemon(pk=pk, **values)
+
+    for batch in batches(updates(), size):
+        Pokemon.objects.bulk_update(batch, fields)
+        written += len(batch)
+    return written, skipped
+
+
+def load_hw(source: str, size: int) -> Tuple[int, int]:
+    names: Dict[str, str] = pokemon_by_name()
+    forms: Dict[Tuple[int, str], str] = {
+        (d, f.lower()): pk
+        for pk, d, f in Pokemon.objects.values_list("pk", "dex_number", "form")
+    }
+
+    def pairs() -> Iterator[Tuple[Optional[str], Dict]]:
+        for row in read_table(os.path.join(source, "HW-metric.tsv"), "\t"):
+            pk: Optional[str] = (
+                forms.get((int(row["#"]), row["form"].lower()))
+                if row["form"]
+                else names.get(row["pok"].lower())
+            )
+            yield pk, {"ht_m": float(row["height-m"]), "wt_kg": float(row["weight-kg"])}
+
+    return update_pokemon(pairs(), ["ht_m", "wt_kg"], size)
+
+
+def load_biomes(source: str, size: int) -> Tuple[int, int]:
+    names: Dict[str, str] = pokemon_by_name()
+    folder: str = os.path.join(source, "Biomes")
+
+    def pairs() -> Iterator[Tuple[Optional[str], Dict]]:
+        for file in sorted(os.listdir(folder)):
+            name: str = os.path.splitext(file)[0].strip()
+            biome: Biome = Biome.objects.filter(name__iexact=name).first()
+            if biome is None:
+                biome = Biome.objects.create(name=name)
+            for row in read_table(os.path.join(folder, file), "\t"):
+                yield names.get(row["Pokémon"].lower()), {"habitat": biome}
+
+    return update_pokemon(pairs(), ["habitat"], size)
+
+
+def load_bodies(source: str, size: int) -> Tuple[int, int]:
+    """Files are named "<body plan number> <alternate name>.tsv" """
+    names: Dict[str, str] = pokemon_by_name()
+    folder: str = os.path.join(source, "Bodies")
+
+    def pairs() -> Iterator[Tuple[Optional[str], Dict]]:
+        for file in sorted(os.listdir(folder)):
+            number, _, name = os.path.splitext(file)[0].partition(" ")
+            plan: BodyPlan = (
+                BodyPlan.objects.filter(alt_name__iexact=name).first()
+                or BodyPlan.objects.filter(pk=int(number)).first()
+                or BodyPlan.objects.create(pk=int(number), name=name, alt_name=name)
+            )
+            for row in read_table(os.path.join(folder, file), "\t"):
+                yield names.get(row["Pokémon"].lower()), {"body_plan": plan}
+
+    return update_pokemon(pairs(), ["body_plan"], size)
+
+
+class Command(BaseCommand):
+    help = "Bulk-load the seed data in stats_source/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source", default=DEFAULT_SOURCE, help="the stats_source directory"
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            choices=LOADERS,
+            default=LOADERS,
+            help="only load some of the files",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="rows per INSERT/UPDATE"
+        )
+
+    def handle(self, *args, **options):
+        source: str = options["source"]
+        if not os.path.isdir(source):
+            raise CommandError(f"No stats_source directory at {source}")
+        loaders = {
+            "rotations": load_rotations,
+            "nests": load_nests,
+            "hw": load_hw,
+            "biomes": load_biomes,
+            "bodies": load_bodies,
+        }
+        with transaction.atomic():
+            for name in LOADERS:  # in this order, since the NSLA needs the rotations
+                if name in options["only"]:
+                    written, skipped = loaders[name](source, options["batch_size"])
+                    self.stdout.write(f"{name}: {written} loaded, {skipped} skipped")
+            # bulk writes don't send signals, so catch up the caches by hand
+            for rotation in built_rotations():
+                materialize(NstRotationDate.objects.get(pk=rotation))
+        forget_all_memos()
+        forget_all_pages()
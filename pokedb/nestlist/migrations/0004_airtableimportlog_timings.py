@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("nestlist", "0003_auto_20191031_0403")]
+
+    operations = [
+        migrations.AddField(
+            model_name="airtableimportlog",
+            name="fetch_seconds",
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name="airtableimportlog",
+            name="ingest_seconds",
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,97 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("speciesinfo", "0002_auto_20191031_0318"),
+        ("nestlist", "0004_airtableimportlog_timings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NstCurrentNest",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("nest_name", models.CharField(max_length=222)),
+                ("nest_short_name", models.CharField(max_length=222, null=True)),
+                ("neighborhood_name", models.CharField(max_length=222, null=True)),
+                ("species_txt", models.CharField(max_length=111, null=True)),
+                ("species_no", models.IntegerField(null=True)),
+                ("confirmation", models.BooleanField(null=True)),
+                ("last_report", models.CharField(max_length=255, null=True)),
+                ("last_report_time", models.DateTimeField(null=True)),
+                (
+                    "city",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="nestlist.nstmetropolismajor",
+                    ),
+                ),
+                (
+                    "neighborhood",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="nestlist.nstneighborhood",
+                    ),
+                ),
+                (
+                    "nestid",
+                    models.ForeignKey(
+                        db_column="nestid",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="current_rows",
+                        to="nestlist.nstlocation",
+                    ),
+                ),
+                (
+                    "nsla",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="current_rows",
+                        to="nestlist.nstspecieslistarchive",
+                    ),
+                ),
+                (
+                    "rotation_num",
+                    models.ForeignKey(
+                        db_column="rotation_num",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="nestlist.nstrotationdate",
+                    ),
+                ),
+                (
+                    "species_name_fk",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="speciesinfo.pokemon",
+                        to_field="name",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "nst_current_nest",
+                "unique_together": {("rotation_num", "nestid")},
+            },
+        ),
+        migrations.AddIndex(
+            model_name="nstcurrentnest",
+            index=models.Index(
+                fields=["rotation_num", "city"], name="nst_current_rotatio_fc7982_idx"
+            ),
+        ),
+    ]
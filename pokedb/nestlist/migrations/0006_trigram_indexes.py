@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# trigram GIN indexes for nestlist.search: the plain column answers pg_trgm's % operator,
+# and UPPER(column) answers Django's icontains (UPPER(column::text) LIKE UPPER(…))
+TRIGRAM_COLUMNS = [
+    ("nst_location", "official_name"),
+    ("nst_location", "short_name"),
+    ("nst_alt_name", "name"),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return  # nestlist.search ranks in Python everywhere else
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_{column}_trgm" '
+            f'ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_{column}_upper_trgm" '
+            f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, column in TRIGRAM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_{column}_trgm"')
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_{column}_upper_trgm"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("nestlist", "0005_nstcurrentnest")]
+
+    operations = [migrations.RunPython(create_indexes, drop_indexes)]
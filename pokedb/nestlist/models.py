@@ -6,20 +6,34 @@ which will prove useful all over the place.
 """
 
 from .utils import parse_date, str_int, append_utc, true_if_y
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Q, Prefetch
 from django.db.models.query import QuerySet
 from django.db.models.functions import Lower
 from django.conf import settings
 from speciesinfo.models import (
     match_species_by_name_or_number,
+    match_one_species,
     Pokemon,
     nestable_species,
     get_surrounding_species,
     enabled_in_pogo,
 )
-from typing import Union, Optional, Tuple, NamedTuple, Dict
+from typing import (
+    Union,
+    Optional,
+    Tuple,
+    NamedTuple,
+    Dict,
+    List,
+    Set,
+    Any,
+    Callable,
+    Collection,
+    Iterable,
+)
 from datetime import datetime
+from collections import defaultdict
 from django.urls import reverse
 from abc import ABC, abstractmethod
 from djchoices import DjangoChoices, ChoiceItem
@@ -331,7 +345,7 @@ class NstMetropolisMajor(models.Model):
         return url_reverser("city", {"city_id": self.pk})
 
     def api_url(self):
-        return None
+        return url_reverser("city_park_list", {"city_id": self.pk})
 
     def full_name(self):
         return self.name
@@ -375,6 +389,12 @@ class NstNeighborhood(models.Model):
             "neighborhood", {"city_id": self.major_city.pk, "neighborhood_id": self.pk}
         )
 
+    def api_url(self):
+        return url_reverser(
+            "neighborhood_detail_view",
+            {"city_id": self.major_city_id, "neighborhood_id": self.pk},
+        )
+
     def ct(self):
         return self.major_city
 
@@ -395,6 +415,9 @@ class NstParkSystem(models.Model):
     def web_url(self):
         return url_reverser("park_sys", {"ps_id": self.pk})
 
+    def api_url(self):
+        return url_reverser("park_system_detail_view", {"ps_id": self.pk})
+
     def get_name(self):
         return self.name
 
@@ -496,6 +519,8 @@ class AirtableImportLog(models.Model):
     errors = models.IntegerField(null=True)
     duplicates = models.IntegerField(null=True)
     total_import_count = models.IntegerField(null=True)
+    fetch_seconds = models.FloatField(null=True)  # wall-clock time spent on Airtable
+    ingest_seconds = models.FloatField(null=True)  # wall-clock time adding reports
 
     class Meta:
         db_table = "airtable_import_log"
@@ -550,20 +575,84 @@ class NstRawRpt(models.Model):
         )
 
 
+class NstCurrentNest(models.Model):
+    """
+    Denormalized snapshot of the nest list for the current (and any upcoming) rotation
+
+    One row per nest, empty nests included (nsla is None for them), with the names the
+    list pages and exports show copied in, so the live pages filter a single indexed table
+    instead of joining the nests against query_nests.  The field names mirror NSLA,
+    so the templates and nsla_sp_filter take either.  Maintained by current_list.py.
+    """
+
+    rotation_num = models.ForeignKey(
+        NstRotationDate, models.CASCADE, db_column="rotation_num"
+    )
+    nestid = models.ForeignKey(
+        NstLocation, models.CASCADE, db_column="nestid", related_name="current_rows"
+    )
+    city = models.ForeignKey(NstMetropolisMajor, models.DO_NOTHING, null=True)
+    neighborhood = models.ForeignKey(NstNeighborhood, models.DO_NOTHING, null=True)
+    nsla = models.ForeignKey(
+        NstSpeciesListArchive, models.SET_NULL, null=True, related_name="current_rows"
+    )
+    nest_name = models.CharField(max_length=222)
+    nest_short_name = models.CharField(max_length=222, null=True)
+    neighborhood_name = models.CharField(max_length=222, null=True)
+    species_txt = models.CharField(max_length=111, null=True)
+    species_no = models.IntegerField(null=True)
+    species_name_fk = models.ForeignKey(
+        "speciesinfo.Pokemon",
+        models.DO_NOTHING,
+        to_field="name",
+        null=True,
+        db_constraint=False,
+    )
+    confirmation = models.BooleanField(null=True)
+    last_report = models.CharField(max_length=255, null=True)
+    last_report_time = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = "nst_current_nest"
+        unique_together = (("rotation_num", "nestid"),)
+        indexes = [models.Index(fields=["rotation_num", "city"])]
+
+    def __str__(self):
+        return f"{self.species_txt} at {self.nest_name} [{self.nestid_id}] \
+on rotation {self.rotation_num_id}"
+
+    def sp_no(self) -> Optional[str]:
+        return None if self.species_no is None else f"{self.species_no:03}"
+
+    def ct(self) -> NstMetropolisMajor:
+        return self.city
+
+    @property
+    def report_audit(self):
+        """The reports behind the row, like NstSpeciesListArchive.report_audit"""
+        return self.nsla.report_audit if self.nsla else NstRawRpt.objects.none()
+
+
 def get_rotation(date) -> NstRotationDate:
     """
     Returns a NstRotation object
     :param date: some form of date or rotation number (either int or str)
     :return: NstRotation object on or before the specified date
+    raises NstRotationDate.DoesNotExist if the date is older than every rotation
     """
+    from .rotation_index import rotation_table
+
     date = str(date).strip()  # handle both str and int input
     if len(date) < 4 and str_int(date):
         try:  # using the input as a direct rotation number
-            return NstRotationDate.objects.get(pk=int(date))
-        except NstRotationDate.DoesNotExist:
+            return rotation_table().by_num[int(date)]
+        except KeyError:
             return get_rotation("t")  # default to today if it's junk
     date = parse_date(date)  # parse the date
-    return NstRotationDate.objects.filter(date__lte=date).order_by("-date")[0]
+    rotation: Optional[NstRotationDate] = rotation_table().on_or_before(date)
+    if rotation is None:
+        raise NstRotationDate.DoesNotExist(f"No rotation on or before {date}")
+    return rotation
 
 
 def query_nests(
@@ -593,20 +682,19 @@ def query_nests(
     :param input_set: start with a restricted set rather than all NstLocation entries
     :return: A QuerySet of NstLocation results
     """
-    name: Q = Q(nestID=search) if only_one and str_int(search) else (
-        Q(official_name__icontains=search)
-        | Q(nestID=search if str_int(search) else None)  # handle 18th street library
-        | Q(short_name__icontains=search)
-        | Q(alternate_name__name__icontains=search)
-    )
+    from .nest_index import nest_name_index
+    from .place_graph import place_graph, SMALL_SET
+
     removals: Q = Q(permanent_species__isnull=False) if exclude_permanent else Q()
     place: Q = Q()
+    search_city: Optional[Union[NstMetropolisMajor, int]] = None
     if location_id:
         location_type = location_type.strip().lower() if location_type else None
         if isinstance(location_id, NstMetropolisMajor) or (
             isinstance(location_id, int) and location_type == "city"
         ):
             place = Q(neighborhood__major_city=location_id)
+            search_city = location_id
         elif isinstance(location_id, NstNeighborhood) or (
             isinstance(location_id, int) and location_type == "neighborhood"
         ):
@@ -614,19 +702,51 @@ def query_nests(
         elif isinstance(location_id, NstCombinedRegion) or (
             isinstance(location_id, int) and location_type == "region"
         ):
-            place = Q(neighborhood__region=location_id)
+            place = Q(
+                neighborhood__in=place_graph().neighborhoods(
+                    "region", getattr(location_id, "pk", location_id)
+                )
+            )
         elif isinstance(location_id, NstParkSystem) or (
             isinstance(location_id, int) and location_type == "ps"
         ):
             place = Q(park_system=location_id)
-    city: Q = Q(
-        Q(neighborhood__major_city=restrict_city)
-        | Q(neighborhood__region__neighborhoods__major_city=restrict_city)
-    ) if restrict_city else Q()
+    name: Q = Q()
+    if only_one and str_int(search):
+        name = Q(nestID=search)
+    elif str(search) != "":
+        found: Set[int] = nest_name_index().search(search, search_city)
+        # a short search can match most of a city; the database can check that itself
+        name = (
+            Q(nestID__in=found)
+            if len(found) <= SMALL_SET
+            else (
+                Q(official_name__icontains=search)
+                | Q(nestID=search if str_int(search) else None)  # 18th street library
+                | Q(short_name__icontains=search)
+                | Q(
+                    nestID__in=NstAltName.objects.filter(name__icontains=search).values(
+                        "main_entry"
+                    )
+                )
+            )
+        )
+    city: Q = Q()
+    if restrict_city:
+        city_id: int = getattr(restrict_city, "pk", restrict_city)
+        near: Set[int] = place_graph().near_city(city_id)
+        city = (
+            Q(neighborhood__in=near)
+            if len(near) <= SMALL_SET
+            else Q(
+                neighborhood__in=NstNeighborhood.objects.filter(
+                    Q(major_city=city_id) | Q(region__neighborhoods__major_city=city_id)
+                ).values("pk")
+            )
+        )
     return (
         input_set.filter(name & place & city)
         .exclude(removals)
-        .distinct()
         .order_by(Lower("official_name"))
     )
 
@@ -651,18 +771,196 @@ class ReportStatus(NamedTuple):
     errors_by_location: Optional[Dict[str, Tuple[int, str, str]]]
 
 
-def add_a_report(
+class Ruling(NamedTuple):
+    """
+    What happens to a report on a nest that already has an NSLA row this rotation
+        status: same codes as ReportStatus
+        update: overwrite the NSLA with the reported species
+        confirmation: the new confirmation value when update is True
+        record: save the report to NstRawRpt
+    """
+
+    status: int
+    update: bool
+    confirmation: Optional[bool]
+    record: bool = True
+
+
+def judge_report(
+    nsla_link: NstSpeciesListArchive,
+    prior_reports: "List[NstRawRpt]",
+    sp_lnk: Optional[Pokemon],
     name: str,
+    confirmation: Optional[bool],
+    restricted: bool,
+    neighbors: Callable[[Pokemon], Collection[Optional[Pokemon]]],
+) -> Optional[Ruling]:
+    """
+    Duplicate-checking and conflict resolution for add_a_report & add_reports_bulk
+
+    This doesn't touch the database (except through neighbors) so that the bulk import
+    can judge a whole batch of reports before writing anything.
+    :param nsla_link: the existing NSLA row for the reported nest & rotation
+    :param prior_reports: NstRawRpt rows for nsla_link, most recent first
+    :param sp_lnk: the reported species (None for free-text)
+    :param name: who submitted the report
+    :param confirmation: confirmation value requested by the report
+    :param restricted: if the report is from a restricted bot
+    :param neighbors: returns the nestable species on either side of its input
+    :return: the Ruling or None if I screwed up the logic somewhere
+    """
+    sp_key: Optional[str] = sp_lnk.pk if sp_lnk else None
+    name = name.lower()
+
+    # no change from manual edit
+    if (
+        nsla_link.species_name_fk_id == sp_key
+        and bool(nsla_link.confirmation) == bool(confirmation)
+        and not restricted
+    ):
+        return Ruling(0, False, None, record=False)
+    # force change from manual edit
+    if not restricted:
+        return Ruling(7, True, confirmation)
+    # it's only bot posting from here on
+
+    if sp_key == nsla_link.species_name_fk_id:  # confirmations and duplicates
+        for rpt in prior_reports:
+            if (
+                rpt.attempted_dex_num_id == sp_key
+                and (rpt.user_name or "").lower() == name
+            ):
+                return Ruling(0, False, None)  # exact duplicates
+        if nsla_link.confirmation:
+            return Ruling(2, False, None)  # previously-confirmed nests
+        return Ruling(2, True, True)  # freshly-confirmed reports
+
+    #
+    # conflicted nests should be all that's left by now
+    #
+
+    # only take one report to update to the next species
+    # unless it's confirmed by a human or system bot
+    if sp_lnk in neighbors(nsla_link.species_name_fk) and (
+        nsla_link.last_mod_by.restricted() or not nsla_link.confirmation
+    ):
+        return Ruling(1, True, False)
+    # human and bot confirmations need to go through the normal double agreement to overturn process
+
+    # count the nests from this rotation, then select the nest that most recently has two reports that agree
+    # this assumes that the report being added is always the most recent one (so it may break on historic data import)
+    if any(rpt.attempted_dex_num_id == sp_key for rpt in prior_reports):
+        # there was a prior report for this nest that agrees with the species given here
+        return Ruling(2, True, True if nsla_link.last_mod_by.restricted() else False)
+
+    # update if the same user reports the nest again with better data
+    if prior_reports and (prior_reports[0].user_name or "").lower() == name:
+        # preserve case when saving but ignore it for comparison
+        return Ruling(1, True, False)
+
+    # anything from here on is a conflict that can't get updated
+    if any(rpt.attempted_dex_num_id != sp_key for rpt in prior_reports):
+        return Ruling(4, False, None)
+
+    return None
+
+
+def surrounding_nestable_species(sp: Optional[Pokemon]) -> List[Optional[Pokemon]]:
+    """The default neighbors function for judge_report"""
+    if sp is None:  # free-text entries don't have neighbors
+        return []
+    return list(get_surrounding_species(sp, nestable_species()).values())
+
+
+def find_report_species(
+    species: Union[int, str], search_all: bool = False
+) -> Tuple[Optional[Pokemon], Optional[Tuple[int, str, str]]]:
+    """
+    :param species: string or int of the species, assumed to be unique
+    :param search_all: search for all species or just the currently nestable ones
+    :return: the matching species and the error to report for restricted bots (if any)
+    """
+    try:
+        return (
+            match_one_species(
+                species,
+                input_set=Pokemon.objects.all()
+                if search_all
+                else enabled_in_pogo(nestable_species()),
+                age_up=True,
+                previous_evolution_search=True,
+            ),
+            None,
+        )
+    except Pokemon.DoesNotExist:
+        return None, (404, "not found", f"{species}")
+    except Pokemon.MultipleObjectsReturned:
+        return None, (412, "too many results", f"{species}")
+
+
+def find_report_nest(
     nest: Union[int, str],
+    bot: Optional[NstAdminEmail],
+    subsearch_place: Optional[int] = None,
+    subsearch_type: str = "city",
+) -> Tuple[Optional[NstLocation], Optional[Tuple[int, str, str]]]:
+    """
+    :param nest: ID or name of the nest, assumed to be unique
+    :param bot: the NstAdminEmail submitting the report
+    :param subsearch_place: numeric id of the place to search (defaults to the bot's city)
+    :param subsearch_type: "city"/"region"/"neighborhood" specifies which model to use on query_nests
+    :return: the matching nest and the error to report (if any)
+    """
+    restricted: bool = bot.restricted() if bot else True
+    city: Optional[NstMetropolisMajor] = bot.city if bot else None
+    if not subsearch_place:
+        subsearch_place = city.pk if city else None
+    try:
+        return (
+            get_true_self(
+                query_nests(
+                    nest,
+                    location_type=subsearch_type,  # could change later for more specific report forms
+                    location_id=subsearch_place,
+                    only_one=True,
+                    exclude_permanent=True if restricted else False,
+                    restrict_city=city,
+                ).get()
+            ),
+            None,
+        )
+    except NstLocation.MultipleObjectsReturned:
+        return None, (412, "too many results", f"{nest}")
+    except NstLocation.DoesNotExist:
+        return None, (404, "not found", f"{nest}")
+
+
+def validation_error_status(
+    error_list: Dict[str, Tuple[int, str, str]]
+) -> ReportStatus:
+    """Handles on reporting on multiple errors"""
+    by_code: dict = {}
+    for location in error_list.keys():
+        code, text, bad_value = error_list[location]
+        by_code[code] = (location, text, bad_value)
+
+    return ReportStatus(None, 9, by_code, error_list)
+
+
+def add_a_report(
+    name: str,
+    nest: Union[int, str, NstLocation],
     timestamp: datetime,
-    species: Union[int, str],
-    bot_id: int,
+    species: Union[int, str, Pokemon],
+    bot_id: Union[int, NstAdminEmail],
     server: Optional[str] = None,
     rotation: Optional[NstRotationDate] = None,
     confirmation: Optional[bool] = None,
     search_all: bool = False,
     subsearch_place: Optional[int] = None,
     subsearch_type: str = "city",
+    raw_nest: Optional[str] = None,
+    raw_species: Optional[str] = None,
 ) -> ReportStatus:
     """
     Adds a raw report and updates the NSLA if applicable
@@ -671,29 +969,27 @@ def add_a_report(
     For "bots" with an is_bot != 1, reports always succeed at updating
     non-bot "bots" do not generate a NstRawReport entry if they do not modify anything
 
+    Use add_reports_bulk when you have more than a handful of reports to add at once.
+
+    The nest, species, bot, and rotation may be passed already resolved (as NestReportForm
+    does); those are used as-is instead of being looked up again.
+
     :param subsearch_type: "city"/"region"/"neighborhood" specifies which model to use on query_nests
     :param subsearch_place: numeric id of the above
     :param search_all: search for all species or just the currently nestable ones
     :param confirmation: leave None to let the system decide how to handle this
     :param name: who submitted the report
     :param server: server identifier
-    :param nest: ID of nest, assumed to be unique
+    :param nest: ID of nest, assumed to be unique, or the NstLocation itself
     :param timestamp: timestamp of report
-    :param species: string or int of the species, assumed to be unique
-    :param bot_id: bot ID
+    :param species: string or int of the species, assumed to be unique, or the Pokemon itself
+    :param bot_id: bot ID or the NstAdminEmail itself
     :param rotation: pre-calculated rotation number
+    :param raw_nest: what the reporter typed for the nest (default: nest or its ID)
+    :param raw_species: what the reporter typed for the species (default: species or its name)
     :return: (see ReportStatus docstring)
     """
 
-    def handle_validation_errors() -> ReportStatus:
-        """Handles on reporting on multiple errors"""
-        by_code: dict = {}
-        for location in error_list.keys():
-            code, text, bad_value = error_list[location]
-            by_code[code] = (location, text, bad_value)
-
-        return ReportStatus(None, 9, by_code, error_list)
-
     def record_report(status: int) -> ReportStatus:
         """Shoves the report into NstRawRpt with appropriate links"""
         rpt = NstRawRpt.objects.create(
@@ -703,8 +999,12 @@ def add_a_report(
             calculated_rotation=rotation,
             nsla_pk=nsla_link,
             nsla_pk_unlink=nsla_link.pk,
-            raw_park_info=nest,
-            raw_species_num=species,
+            raw_park_info=getattr(nest, "pk", nest) if raw_nest is None else raw_nest,
+            raw_species_num=(
+                getattr(species, "name", species)
+                if raw_species is None
+                else raw_species
+            ),
             timestamp=timestamp,
             user_name=name,
             server_name=server,
@@ -731,49 +1031,27 @@ def add_a_report(
         error_list["user_name"] = (417, "No name given", "")
     if not timestamp:
         error_list["timestamp"] = (416, "Timestamp is emtpy", "")
-    try:  # bot id
-        bot: Optional[NstAdminEmail] = NstAdminEmail.objects.get(pk=bot_id)
-    except NstAdminEmail.DoesNotExist:
+    if isinstance(bot_id, NstAdminEmail):  # already resolved
+        bot: Optional[NstAdminEmail] = bot_id
+    else:  # bot id
+        bot = NstAdminEmail.objects.filter(pk=bot_id).first()
+    if bot is None:
         error_list["bot_id"] = (401, "Bad bot ID", f"{bot_id}")
-        bot = None
     restricted: bool = bot.restricted() if bot else True
-    try:  # species link
-        sp_lnk: Optional[Pokemon] = match_species_by_name_or_number(
-            species,
-            only_one=True,
-            input_set=Pokemon.objects.all()
-            if search_all
-            else enabled_in_pogo(nestable_species()),
-            age_up=True,
-            previous_evolution_search=True,
-        ).get()
-    except Pokemon.DoesNotExist:
-        if restricted:
-            error_list["pokémon"] = (404, "not found", f"{species}")
-        sp_lnk = None  # free-text pokémon entries
-    except Pokemon.MultipleObjectsReturned:
-        if restricted:
-            error_list["pokémon"] = (412, "too many results", f"{species}")
-        sp_lnk = None  # free-text it for human entries
-    try:  # park link
-        if not subsearch_place:
-            subsearch_place = bot.city.pk if bot.city else None
-        park_link: Optional[NstLocation] = get_true_self(
-            query_nests(
-                nest,
-                location_type=subsearch_type,  # could change later for more specific report forms
-                location_id=subsearch_place,
-                only_one=True,
-                exclude_permanent=True if restricted else False,
-                restrict_city=bot.city if bot else None,
-            ).get()
+    if isinstance(species, Pokemon):  # already resolved
+        sp_lnk, sp_err = species, None
+    else:  # species link
+        sp_lnk, sp_err = find_report_species(species, search_all)
+    if sp_err and restricted:  # free-text it for human entries
+        error_list["pokémon"] = sp_err
+    if isinstance(nest, NstLocation):  # already resolved
+        park_link, park_err = nest, None
+    else:  # park link
+        park_link, park_err = find_report_nest(
+            nest, bot, subsearch_place, subsearch_type
         )
-    except NstLocation.MultipleObjectsReturned:
-        error_list["nest"] = (412, "too many results", f"{nest}")
-        park_link = None
-    except NstLocation.DoesNotExist:
-        error_list["nest"] = (404, "not found", f"{nest}")
-        park_link = None
+    if park_err:
+        error_list["nest"] = park_err
     if rotation is None:  # rotation
         try:
             rotation = get_rotation(timestamp)
@@ -783,91 +1061,304 @@ def add_a_report(
             error_list["timestamp"] = (404, "no rotation found", f"{timestamp}")
     if error_list:
         # this could be higher for marginal performance gain in a high-write environment
-        return handle_validation_errors()
+        return validation_error_status(error_list)
+
+    # one transaction, so the snapshot rows are rebuilt once on commit (see current_list)
+    with transaction.atomic():
+        #
+        # check for prior art and create NSLA row if none exists
+        #
+        nsla_link, fresh = NstSpeciesListArchive.objects.get_or_create(
+            rotation_num=rotation,
+            nestid=park_link,  # if this is None, it would have errored already
+            defaults={
+                "confirmation": confirmation,
+                "species_name_fk": sp_lnk,
+                "species_no": sp_lnk.dex_number if sp_lnk else None,
+                "species_txt": sp_lnk.name if sp_lnk else species,
+                "last_mod_by": bot,
+            },
+        )
+        if fresh:  # we're done if it's a new report
+            return record_report(2 if confirmation else 1)
+
+        # duplicate-checking and conflict resolution
+        prior_reports: "List[NstRawRpt]" = list(
+            NstRawRpt.objects.filter(
+                Q(nsla_pk=nsla_link) | Q(nsla_pk_unlink=nsla_link.pk)
+            ).order_by("-timestamp")
+        )
+        ruling: Optional[Ruling] = judge_report(
+            nsla_link,
+            prior_reports,
+            sp_lnk,
+            name,
+            confirmation,
+            restricted,
+            surrounding_nestable_species,
+        )
+        if ruling is None:
+            # always return something, even if I screwed up the logic elsewhere
+            error_list["unknown"] = (
+                500,
+                "Something got missed",
+                "nestlist.models.add_a_report",
+            )
+            return validation_error_status(error_list)
+        if not ruling.record:
+            return ReportStatus(None, ruling.status, None, None)
+        if ruling.update:
+            confirmation = ruling.confirmation
+            return update_nsla(ruling.status)
+        return record_report(ruling.status)
 
-    #
-    # check for prior art and create NSLA row if none exists
-    #
-    nsla_link, fresh = NstSpeciesListArchive.objects.get_or_create(
-        rotation_num=rotation,
-        nestid=park_link,  # if this is None, it would have errored already
-        defaults={
-            "confirmation": confirmation,
-            "species_name_fk": sp_lnk,
-            "species_no": sp_lnk.dex_number if sp_lnk else None,
-            "species_txt": sp_lnk.name if sp_lnk else species,
-            "last_mod_by": bot,
-        },
-    )
-    if fresh:  # we're done if it's a new report
-        return record_report(2 if confirmation else 1)
 
-    # duplicate-checking and conflict resolution
-    prior_reports: "QuerySet[NstRawRpt]" = NstRawRpt.objects.filter(
-        Q(nsla_pk=nsla_link) | Q(nsla_pk_unlink=nsla_link.pk)
-    ).order_by("-timestamp")
+def add_reports_bulk(reports: Iterable[Dict[str, Any]]) -> List[ReportStatus]:
+    """
+    Adds a batch of reports with a few set-based queries instead of a dozen queries per report
 
-    # no change from manual edit
-    if (
-        nsla_link.species_name_fk == sp_lnk
-        and bool(nsla_link.confirmation) == bool(confirmation)
-        and not restricted
-    ):
-        return ReportStatus(None, 0, None, None)
-    # force change from manual edit
-    if not restricted:
-        return update_nsla(7)
-    # it's only bot posting from here on
+    Each report is a dict of the keyword arguments to add_a_report
+    (name, nest, timestamp, species, and bot_id are required).
+    It may also have a foreign_db_row_num to store in its NstRawRpt row.
+    A nest, species, or bot that's already resolved is used as-is, as in add_a_report
+    (a nest without get_true_self).
 
-    if sp_lnk == nsla_link.species_name_fk:  # confirmations and duplicates
-        if prior_reports.filter(
-            user_name__iexact=name, attempted_dex_num=sp_lnk
-        ).count():
-            return record_report(0)  # exact duplicates
-        if nsla_link.confirmation:
-            return record_report(2)  # previously-confirmed nests
-        confirmation = True  # freshly-confirmed reports
-        return update_nsla(2)
+    Bots, species, nests, and rotations are resolved once per batch.
+    Reports are judged in the order given, so later reports in the batch see earlier ones
+    exactly as if add_a_report had been called on each of them in turn.
+    Nothing is written if any of the inserts fail.
+
+    :param reports: an iterable of report dicts
+    :return: one ReportStatus per report, in the same order as the input
+    """
+    reports = list(reports)
+    out: List[Optional[ReportStatus]] = [None] * len(reports)
+
+    def bot_pk(rpt: Dict[str, Any]) -> Any:
+        return getattr(rpt.get("bot_id"), "pk", rpt.get("bot_id"))  # as add_a_report
+
+    bot_ids = {bot_pk(rpt) for rpt in reports if str_int(bot_pk(rpt))}
+    bots: Dict[int, NstAdminEmail] = NstAdminEmail.objects.select_related(
+        "city"
+    ).in_bulk([int(b) for b in bot_ids])
+    species_memo: Dict[Tuple[str, bool], Tuple] = {}
+    nest_memo: Dict[Tuple, Tuple] = {}
 
     #
-    # conflicted nests should be all that's left by now
+    # resolve everything that the reports point to
     #
+    resolved: Dict[int, Dict[str, Any]] = {}
+    for idx, rpt in enumerate(reports):
+        error_list: Dict[str, Tuple[int, str, str]] = {}
+        name: str = str(rpt.get("name") or "").strip()
+        if not name:
+            error_list["user_name"] = (417, "No name given", "")
+        timestamp = rpt.get("timestamp")
+        if not timestamp:
+            error_list["timestamp"] = (416, "Timestamp is emtpy", "")
+        bot_id = bot_pk(rpt)
+        bot: Optional[NstAdminEmail] = bots.get(int(bot_id)) if str_int(
+            bot_id
+        ) else None
+        if bot is None:
+            error_list["bot_id"] = (401, "Bad bot ID", f"{bot_id}")
+        restricted: bool = bot.restricted() if bot else True
+        species = rpt.get("species")
+        search_all: bool = rpt.get("search_all", False)
+        if isinstance(species, Pokemon):  # already resolved
+            sp_lnk, sp_err = species, None
+        else:
+            sp_key = (str(species).strip().lower(), search_all)
+            if sp_key not in species_memo:
+                species_memo[sp_key] = find_report_species(species, search_all)
+            sp_lnk, sp_err = species_memo[sp_key]
+        if sp_err and restricted:
+            error_list["pokémon"] = sp_err
+        nest = rpt.get("nest")
+        if isinstance(nest, NstLocation):  # already resolved (e.g. by new_rotation)
+            park_link, park_err = nest, None
+        else:
+            nest_key = (
+                str(nest).strip(),
+                bot.pk if bot else None,
+                rpt.get("subsearch_place"),
+                rpt.get("subsearch_type", "city"),
+            )
+            if nest_key not in nest_memo:
+                nest_memo[nest_key] = find_report_nest(
+                    nest,
+                    bot,
+                    rpt.get("subsearch_place"),
+                    rpt.get("subsearch_type", "city"),
+                )
+            park_link, park_err = nest_memo[nest_key]
+        if park_err:
+            error_list["nest"] = park_err
+        rotation: Optional[NstRotationDate] = rpt.get("rotation")
+        if rotation is None and timestamp:
+            try:
+                rotation = get_rotation(timestamp)
+            except ValueError:
+                error_list["timestamp"] = (417, "Invalid timestamp", f"{timestamp}")
+            except NstRotationDate.DoesNotExist:
+                error_list["timestamp"] = (404, "no rotation found", f"{timestamp}")
+        if error_list:
+            out[idx] = validation_error_status(error_list)
+            continue
+        resolved[idx] = {
+            "name": name,
+            "bot": bot,
+            "restricted": restricted,
+            "sp_lnk": sp_lnk,
+            "park_link": park_link,
+            "rotation": rotation,
+        }
+    if not resolved:
+        return out
 
-    # only take one report to update to the next species
-    # unless it's confirmed by a human or system bot
-    if sp_lnk in get_surrounding_species(
-        nsla_link.species_name_fk, nestable_species()
-    ).values() and (nsla_link.last_mod_by.restricted() or not nsla_link.confirmation):
-        confirmation = False
-        return update_nsla(1)
-    # human and bot confirmations need to go through the normal double agreement to overturn process
-
-    # count the nests from this rotation, then select the nest that most recently has two reports that agree
-    # this assumes that the report being added is always the most recent one (so it may break on historic data import)
-    if prior_reports.filter(attempted_dex_num=sp_lnk).count():
-        # there was a prior report for this nest that agrees with the species given here
-        confirmation = True if nsla_link.last_mod_by.restricted() else False
-        return update_nsla(2)
+    #
+    # load prior art for every affected nest in two queries
+    #
+    nslas: Dict[Tuple[int, int], NstSpeciesListArchive] = {
+        (n.rotation_num_id, n.nestid_id): n
+        for n in NstSpeciesListArchive.objects.select_related("last_mod_by").filter(
+            rotation_num__in={r["rotation"].pk for r in resolved.values()},
+            nestid__in={r["park_link"].pk for r in resolved.values()},
+        )
+    }
+    prior_reports: Dict[int, List[NstRawRpt]] = defaultdict(list)
+    nsla_ids: Set[int] = {n.pk for n in nslas.values()}
+    for raw in NstRawRpt.objects.filter(
+        Q(nsla_pk__in=nsla_ids) | Q(nsla_pk_unlink__in=nsla_ids)
+    ).order_by("-timestamp"):
+        for nsla_id in {raw.nsla_pk_id, raw.nsla_pk_unlink} & nsla_ids:
+            prior_reports[nsla_id].append(raw)
+    history: Dict[Tuple[int, int], List[NstRawRpt]] = {
+        key: prior_reports[n.pk] for key, n in nslas.items()
+    }
 
-    # update if the same user reports the nest again with better data
-    if (
-        prior_reports.first() is not None
-        and prior_reports.first().user_name.lower() == name.lower()
-    ):  # preserve case when saving but ignore it for comparison
-        confirmation = False
-        return update_nsla(1)
+    #
+    # judge the reports in order without touching the database
+    #
+    new_nslas: List[NstSpeciesListArchive] = []
+    changed_nslas: Dict[int, NstSpeciesListArchive] = {}
+    new_rows: List[Tuple[int, NstRawRpt]] = []
+    neighbor_memo: Dict[Optional[str], List[Optional[Pokemon]]] = {}
+
+    def neighbors(sp: Optional[Pokemon]) -> List[Optional[Pokemon]]:
+        key = sp.pk if sp else None
+        if key not in neighbor_memo:
+            neighbor_memo[key] = surrounding_nestable_species(sp)
+        return neighbor_memo[key]
+
+    for idx, res in resolved.items():
+        rpt: Dict[str, Any] = reports[idx]
+        sp_lnk: Optional[Pokemon] = res["sp_lnk"]
+        confirmation: Optional[bool] = rpt.get("confirmation")
+        key = (res["rotation"].pk, res["park_link"].pk)
+        nsla_link: Optional[NstSpeciesListArchive] = nslas.get(key)
+        if nsla_link is None:  # first report for the nest this rotation
+            nsla_link = NstSpeciesListArchive(
+                rotation_num=res["rotation"], nestid=res["park_link"]
+            )
+            nslas[key] = nsla_link
+            history[key] = []
+            new_nslas.append(nsla_link)
+            ruling: Optional[Ruling] = Ruling(
+                2 if confirmation else 1, True, confirmation
+            )
+        else:
+            ruling = judge_report(
+                nsla_link,
+                history[key],
+                sp_lnk,
+                res["name"],
+                confirmation,
+                res["restricted"],
+                neighbors,
+            )
+        if ruling is None:
+            out[idx] = validation_error_status(
+                {
+                    "unknown": (
+                        500,
+                        "Something got missed",
+                        "nestlist.models.add_reports_bulk",
+                    )
+                }
+            )
+            continue
+        if ruling.update:
+            nsla_link.confirmation = ruling.confirmation
+            nsla_link.species_name_fk = sp_lnk
+            nsla_link.species_no = sp_lnk.dex_number if sp_lnk else None
+            nsla_link.species_txt = sp_lnk.name if sp_lnk else rpt.get("species")
+            nsla_link.last_mod_by = res["bot"]
+            if nsla_link.pk is not None:
+                changed_nslas[nsla_link.pk] = nsla_link
+        if not ruling.record:
+            out[idx] = ReportStatus(None, ruling.status, None, None)
+            continue
+        row = NstRawRpt(
+            action=ruling.status,
+            attempted_dex_num=sp_lnk,
+            bot=res["bot"],
+            calculated_rotation=res["rotation"],
+            nsla_pk=nsla_link,
+            raw_park_info=getattr(rpt.get("nest"), "pk", rpt.get("nest")),
+            raw_species_num=getattr(rpt.get("species"), "name", rpt.get("species")),
+            timestamp=rpt.get("timestamp"),
+            user_name=res["name"],
+            server_name=rpt.get("server"),
+            parklink=res["park_link"],
+            foreign_db_row_num=rpt.get("foreign_db_row_num"),
+        )
+        history[key].insert(0, row)  # assumes the newest report is always the latest
+        new_rows.append((idx, row))
 
-    # anything from here on is a conflict that can't get updated
-    if prior_reports.exclude(attempted_dex_num=sp_lnk).count():
-        return record_report(4)
-
-    # always return something, even if I screwed up the logic elsewhere
-    error_list["unknown"] = (
-        500,
-        "Something got missed",
-        "nestlist.models.add_a_report",
-    )
-    return handle_validation_errors()
+    #
+    # write everything at once
+    #
+    with transaction.atomic():
+        if new_nslas:
+            NstSpeciesListArchive.objects.bulk_create(new_nslas)
+            if any(n.pk is None for n in new_nslas):
+                # not every database hands back the primary keys from a bulk insert
+                saved: Dict[Tuple[int, int], int] = {
+                    (n["rotation_num"], n["nestid"]): n["pk"]
+                    for n in NstSpeciesListArchive.objects.filter(
+                        rotation_num__in={n.rotation_num_id for n in new_nslas},
+                        nestid__in={n.nestid_id for n in new_nslas},
+                    ).values("pk", "rotation_num", "nestid")
+                }
+                for n in new_nslas:
+                    n.pk = saved[(n.rotation_num_id, n.nestid_id)]
+        if changed_nslas:
+            NstSpeciesListArchive.objects.bulk_update(
+                changed_nslas.values(),
+                [
+                    "confirmation",
+                    "species_name_fk",
+                    "species_no",
+                    "species_txt",
+                    "last_mod_by",
+                ],
+            )
+        for _, row in new_rows:
+            row.nsla_pk = row.nsla_pk  # pick up primary keys from the fresh NSLA rows
+            row.nsla_pk_unlink = row.nsla_pk.pk
+        NstRawRpt.objects.bulk_create([row for _, row in new_rows])
+    if new_rows:
+        from .page_cache import forget_rotation_pages
+        from .current_list import refresh_on_commit
+
+        forget_rotation_pages({row.calculated_rotation_id for _, row in new_rows})
+        refresh_on_commit(
+            (row.calculated_rotation_id, row.nsla_pk.nestid_id) for _, row in new_rows
+        )
+    for idx, row in new_rows:
+        out[idx] = ReportStatus(row, row.action, None, None)
+    return out
 
 
 def nsla_sp_filter(
@@ -905,7 +1396,7 @@ def get_local_nsla_for_rotation(
     :param species: optional filter for species
     :return: The filtered NSLA for the given location and date
     """
-    out_list: "QuerySet[NstSpeciesListArchive]" = NstSpeciesListArchive.objects.filter(
+    out_list = NstSpeciesListArchive.objects.filter(
         rotation_num=rotation,
         nestid__in=query_nests(
             "",
@@ -917,6 +1408,28 @@ def get_local_nsla_for_rotation(
     return nsla_sp_filter(species, out_list) if species else out_list
 
 
+def get_local_snapshot_for_rotation(
+    rotation: NstRotationDate,
+    location_pk: int,
+    location_type: str,
+    species: Optional[str] = None,
+) -> "Optional[QuerySet[NstCurrentNest]]":
+    """
+    Params function just like get_local_nsla_for_rotation
+    :return: the same rows from the snapshot table,
+             or None if the rotation has no snapshot (it isn't the current one)
+    """
+    from .current_list import current_nest_rows, scope_filter
+
+    snapshot: "Optional[QuerySet[NstCurrentNest]]" = current_nest_rows(rotation)
+    if snapshot is None:
+        return None
+    out_list = snapshot.filter(
+        scope_filter(location_pk, location_type), nsla__isnull=False
+    ).order_by("nest_name")
+    return nsla_sp_filter(species, out_list) if species else out_list
+
+
 def collect_empty_nests(
     rotation: Optional[NstRotationDate] = None,
     location_pk: Optional[int] = None,
@@ -931,6 +1444,14 @@ def collect_empty_nests(
     :param location_type: returns from all nests in the system
     :return: a list of nests that don't have a report for the specified location & rotation
     """
+    from .current_list import current_nest_rows, scope_filter
+
+    if rotation and location_pk and current_nest_rows(rotation) is not None:
+        return NstLocation.objects.filter(
+            scope_filter(location_pk, location_type, "current_rows__"),
+            current_rows__rotation_num=rotation,
+            current_rows__nsla__isnull=True,
+        )
     nsla_exclude_list: "QuerySet[NstSpeciesListArchive]" = (
         get_local_nsla_for_rotation(rotation, location_pk, location_type)
         if rotation
@@ -988,6 +1509,32 @@ def species_nesting_history(
     ).order_by("-rotation_num")
 
 
+def plan_nest_list(
+    nsla: "Union[QuerySet[NstSpeciesListArchive], QuerySet[NstCurrentNest]]",
+) -> "Union[QuerySet[NstSpeciesListArchive], QuerySet[NstCurrentNest]]":
+    """
+    Loads everything a nest list page shows about each row along with the rows
+    (the nest and its neighborhood and city, the species, and the report audit with its bots),
+    so a page takes the same handful of queries however many nests it lists
+    """
+    if nsla.model is NstCurrentNest:
+        return nsla.select_related(
+            "rotation_num",
+            "city",
+            "nestid__neighborhood__major_city",
+            "species_name_fk",
+        ).prefetch_related(
+            Prefetch(
+                "nsla__report_audit", queryset=NstRawRpt.objects.select_related("bot")
+            )
+        )
+    return nsla.select_related(
+        "rotation_num", "nestid__neighborhood__major_city", "species_name_fk"
+    ).prefetch_related(
+        Prefetch("report_audit", queryset=NstRawRpt.objects.select_related("bot"))
+    )
+
+
 class NewRotationStatus(NamedTuple):
     rotation: Optional[NstRotationDate]
     success: bool
@@ -1003,34 +1550,54 @@ def new_rotation(
     :param rotation_user: user to store in the NstRawRpt log and NSLA
     :return: the NstRotationDate object, a True/False success indicator, and any notes
     """
-    if len(NstRotationDate.objects.filter(date__contains=rot8d8time.date())) > 0:
+    if NstRotationDate.objects.filter(date__contains=rot8d8time.date()).exists():
         # don't go for multiple rotations on the same day
         return NewRotationStatus(
             None, False, f"Rotation already exists for {rot8d8time.date()}"
         )
 
-    # generate date to save
-    try:
-        prev_rot: int = NstRotationDate.objects.latest("num").num
-    except NstRotationDate.DoesNotExist:
-        prev_rot: int = 0  # allow for initial rotations on blank databases
-    new_rot = NstRotationDate.objects.create(date=rot8d8time, num=prev_rot + 1)
-    perm_nst = NstLocation.objects.exclude(
-        Q(permanent_species__isnull=True) | Q(permanent_species__exact="")
-    )
-    # insert permanent nests
-    for nst in perm_nst:
-        add_a_report(
-            name="Otto",
-            nest=nst.pk,  # no call to get_true_self because the duplicate may indicate an overlapping WB & nest
-            timestamp=append_utc(datetime.utcnow()),
-            species=nst.permanent_species.split("|")[0],
-            bot_id=rotation_user,
-            server="localhost",
-            rotation=new_rot,
-            search_all=True,
-            confirmation=True,
+    with transaction.atomic():
+        # generate date to save
+        try:
+            prev_rot: int = NstRotationDate.objects.latest("num").num
+        except NstRotationDate.DoesNotExist:
+            prev_rot: int = 0  # allow for initial rotations on blank databases
+        new_rot = NstRotationDate.objects.create(date=rot8d8time, num=prev_rot + 1)
+        perm_nst = NstLocation.objects.exclude(
+            Q(permanent_species__isnull=True) | Q(permanent_species__exact="")
         )
+        now: datetime = append_utc(datetime.utcnow())
+        # insert permanent nests
+        statuses: List[ReportStatus] = add_reports_bulk(
+            {
+                "name": "Otto",
+                "nest": nst,  # no call to get_true_self because the duplicate may indicate an overlapping WB & nest
+                "timestamp": now,
+                "species": nst.permanent_species.split("|")[0],
+                "bot_id": rotation_user,
+                "server": "localhost",
+                "rotation": new_rot,
+                "search_all": True,
+                "confirmation": True,
+            }
+            for nst in perm_nst
+        )
+        errors: List[str] = [
+            f"{nst.get_name()} {field}: {msg}"
+            for nst, status in zip(perm_nst, statuses)
+            if status.status == 9
+            for field, (_, msg, _) in status.errors_by_location.items()
+        ]
+        if errors:  # e.g. a bad rotation_user; don't start a rotation without them
+            transaction.set_rollback(True)
+            return NewRotationStatus(
+                None, False, "Couldn't add the permanent nests: " + "; ".join(errors)
+            )
+        # the new rotation's snapshot is ready before it starts
+        from .current_list import materialize, drop_before
+
+        materialize(new_rot)
+        drop_before(prev_rot)
     return NewRotationStatus(new_rot, True, f"Added rotation {new_rot}")
 
 
@@ -1127,92 +1694,44 @@ def get_true_self(nest: NstLocation) -> NstLocation:
 
 
 def which_regions(place) -> "QuerySet[NstCombinedRegion]":
-    if isinstance(place, NstMetropolisMajor):
-        return NstCombinedRegion.objects.filter(
-            neighborhoods__major_city=place
-        ).distinct()
-    if isinstance(place, NstParkSystem):
-        return NstCombinedRegion.objects.filter(
-            neighborhoods__nstlocation__park_system=place
-        ).distinct()
-    if isinstance(place, NstNeighborhood):
-        return place.region.all()
-    if isinstance(place, NstLocation):
-        return place.neighborhood.region.all()
-    if isinstance(place, NstSpeciesListArchive):
-        return place.nestid.neighborhood.region.all()
-    if isinstance(place, NstCombinedRegion):
-        return NstCombinedRegion.objects.filter(pk=place.pk)
-    return NstCombinedRegion.objects.none()
+    from .place_graph import place_graph, place_key
+
+    return NstCombinedRegion.objects.filter(
+        pk__in=place_graph().regions(*place_key(place))
+    )
 
 
 def which_cities(place) -> "QuerySet[NstMetropolisMajor]":
     """Intended for use with objects with multiple possible city links"""
-    if isinstance(place, NstCombinedRegion):
-        return NstMetropolisMajor.objects.filter(
-            nstneighborhood__region=place
-        ).distinct()
-    if isinstance(place, NstParkSystem):
-        return NstMetropolisMajor.objects.filter(
-            nstneighborhood__nstlocation__park_system=place
-        ).distinct()
-    if isinstance(place, NstMetropolisMajor):
-        return NstMetropolisMajor.objects.filter(pk=place.pk)
-    if isinstance(place, NstNeighborhood):
-        return NstMetropolisMajor.objects.filter(pk=place.major_city.pk)
-    if isinstance(place, NstLocation):
-        return NstMetropolisMajor.objects.filter(pk=place.neighborhood.major_city.pk)
-    return NstMetropolisMajor.objects.none()
+    from .place_graph import place_graph, place_key
+
+    return NstMetropolisMajor.objects.filter(
+        pk__in=place_graph().cities(*place_key(place))
+    )
 
 
 def which_ps(place) -> "QuerySet[NstParkSystem]":
-    if isinstance(place, NstMetropolisMajor):
-        return NstParkSystem.objects.filter(
-            nstlocation__neighborhood__major_city=place
-        ).distinct()
-    if isinstance(place, NstNeighborhood):
-        return NstParkSystem.objects.filter(nstlocation__neighborhood=place).distinct()
-    if isinstance(place, NstCombinedRegion):
-        return NstParkSystem.objects.filter(
-            nstlocation__neighborhood__region=place
-        ).distinct()
-    if isinstance(place, NstLocation) and place.park_system:
-        return NstParkSystem.objects.filter(pk=place.park_system.pk)
-    if isinstance(place, NstParkSystem):
-        return NstParkSystem.objects.filter(pk=place.pk)
-    return NstParkSystem.objects.none()
+    from .place_graph import place_graph, place_key
+
+    return NstParkSystem.objects.filter(
+        pk__in=place_graph().park_systems(*place_key(place))
+    )
 
 
 def which_neighborhoods(place) -> "QuerySet[NstNeighborhood]":
-    if isinstance(place, NstNeighborhood):
-        return NstNeighborhood.objects.filter(pk=place.pk)
-    if isinstance(place, NstLocation):
-        return NstNeighborhood.objects.filter(pk=place.neighborhood.pk)
-    if isinstance(place, NstMetropolisMajor):
-        return place.nstneighborhood_set.all()
-    if isinstance(place, NstCombinedRegion):
-        return place.neighborhoods.all()
-    if isinstance(place, NstParkSystem):
-        return NstNeighborhood.objects.filter(nstlocation__park_system=place).distinct()
-    return NstNeighborhood.objects.none()
+    from .place_graph import place_graph, place_key
+
+    kind, pk = place_key(place)
+    if kind == "city":  # too many to list
+        return NstNeighborhood.objects.filter(major_city=pk)
+    if kind == "region":
+        return NstNeighborhood.objects.filter(region=pk)
+    return NstNeighborhood.objects.filter(pk__in=place_graph().neighborhoods(kind, pk))
 
 
 def which_parks(place) -> "QuerySet[NstLocation]":
-    if isinstance(place, NstLocation):
-        return NstLocation.objects.filter(pk=place.pk)
-    scope: str = ""
-    if isinstance(place, NstNeighborhood):
-        scope = "neighborhood"
-    if isinstance(place, NstMetropolisMajor):
-        scope = "city"
-    if isinstance(place, NstCombinedRegion):
-        scope = "region"
-    if isinstance(place, NstParkSystem):
-        scope = "ps"
-    return query_nests(
-        "",
-        location_id=place.pk,
-        location_type=scope,
-        exclude_permanent=False,
-        only_one=False,
+    from .place_graph import nests_filter, place_key
+
+    return NstLocation.objects.filter(nests_filter(*place_key(place))).order_by(
+        Lower("official_name")
     )
@@ -0,0 +1,111 @@
+"""
+In-memory index of nest names for query_nests
+
+Each city gets a trigram map of the official, short, and alternate names of its nests.
+A search intersects the maps for the trigrams of the search text and confirms the few
+candidates left with a substring check, so the database only has to filter on nestID.
+It is rebuilt after any nest, alternate name, or neighborhood is saved.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from typing import Dict, List, Set, Optional, Union, Iterable
+from collections import defaultdict
+from .caching import VersionedMemo
+from .utils import str_int
+from .models import NstLocation, NstAltName, NstNeighborhood
+
+NO_NESTS: Set[int] = set()
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class NestNameIndex:
+    def __init__(self, nests: Iterable[dict], alt_names: Iterable[dict]):
+        """
+        :param nests: values() of NstLocation with the nest's city
+        :param alt_names: values() of NstAltName
+        """
+        self.names: Dict[int, List[str]] = defaultdict(list)
+        self.city_of: Dict[int, Optional[int]] = {}
+        self.nests_in: Dict[Optional[int], Set[int]] = defaultdict(set)
+        self.grams: Dict[Optional[int], Dict[str, Set[int]]] = {}
+        for nest in nests:
+            pk: int = nest["nestID"]
+            self.city_of[pk] = nest["neighborhood__major_city"]
+            self.nests_in[self.city_of[pk]].add(pk)
+            for name in [nest["official_name"], nest["short_name"]]:
+                if name:
+                    self.names[pk].append(name.lower())
+        for alt in alt_names:  # hidden names are still searchable, as before
+            if alt["name"] and alt["main_entry"] in self.city_of:
+                self.names[alt["main_entry"]].append(alt["name"].lower())
+        for pk, names in self.names.items():
+            city_grams = self.grams.setdefault(self.city_of[pk], defaultdict(set))
+            for name in names:
+                for gram in trigrams(name):
+                    city_grams[gram].add(pk)
+
+    def candidates(self, text: str, city: Optional[int]) -> Set[int]:
+        """:return: nests in the city that might contain text, a superset of the matches"""
+        if len(text) < 3:
+            return self.nests_in.get(city, NO_NESTS)
+        city_grams: Dict[str, Set[int]] = self.grams.get(city, {})
+        postings: List[Set[int]] = sorted(
+            (city_grams.get(gram, NO_NESTS) for gram in trigrams(text)), key=len
+        )
+        return set.intersection(*postings)
+
+    def search(
+        self, search: Union[str, int], city: Optional[Union[int, object]] = None
+    ) -> Set[int]:
+        """
+        Same rules as the name search in query_nests: a case-insensitive substring match
+        on any name of the nest, or an exact match on the nest's ID
+        :param search: text or ID to search for
+        :param city: only look for nests in this city (or its id)
+        :return: set of matching nestIDs
+        """
+        text: str = str(search).lower()
+        city_id: Optional[int] = getattr(city, "pk", city)
+        cities = [city_id] if city_id else list(self.nests_in)
+        out: Set[int] = {
+            pk
+            for c in cities
+            for pk in self.candidates(text, c)
+            if any(text in name for name in self.names.get(pk, []))
+        }
+        # handle 18th street library
+        if str_int(search) and int(search) in self.city_of:
+            if not city_id or self.city_of[int(search)] == city_id:
+                out.add(int(search))
+        return out
+
+
+def build_nest_name_index() -> NestNameIndex:
+    return NestNameIndex(
+        NstLocation.objects.values(
+            "nestID", "official_name", "short_name", "neighborhood__major_city"
+        ),
+        NstAltName.objects.values("name", "main_entry"),
+    )
+
+
+nest_name_memo: "VersionedMemo[NestNameIndex]" = VersionedMemo(
+    "nest-names", build_nest_name_index
+)
+
+
+def nest_name_index() -> NestNameIndex:
+    """:return: the current NestNameIndex, building it if needed"""
+    return nest_name_memo.get()
+
+
+for _model in [NstLocation, NstAltName, NstNeighborhood]:
+    post_save.connect(
+        nest_name_memo.invalidate, sender=_model, dispatch_uid=f"nest-names-{_model}"
+    )
+    post_delete.connect(
+        nest_name_memo.invalidate, sender=_model, dispatch_uid=f"nest-names-{_model}"
+    )
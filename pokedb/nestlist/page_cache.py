@@ -0,0 +1,191 @@
+"""
+Shared cache of the rendered nest list pages for past rotations
+
+Once a rotation is over, its nest list hardly ever changes, so each page is rendered once
+and kept in the shared Django cache.  Every rotation has a version stamp that is part of
+its page keys: a report for that rotation replaces the stamp, which orphans the old pages
+until memcached evicts them.  Changes to the nests and their groupings replace a stamp
+shared by every rotation.  Stamps are only replaced once the change commits, so a page
+rendered from the old rows can't be stored under the new stamp.
+The current rotation is never cached.
+
+The stamps start with the time they were made, so they double as the ETag and
+Last-Modified of the API's responses (see data_version): NSLA rows have no timestamp of
+their own.
+"""
+
+import time
+from hashlib import md5
+from uuid import uuid4
+from typing import Dict, List, Optional, Iterable, Any, Tuple
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import (
+    NstSpeciesListArchive,
+    NstRawRpt,
+    NstLocation,
+    NstAltName,
+    NstNeighborhood,
+    NstCombinedRegion,
+    NstParkSystem,
+    NstMetropolisMajor,
+)
+
+PAGE_TIMEOUT: int = 60 * 60 * 24 * 7  # seconds
+EVERY_ROTATION: str = "all"
+ANY_ROTATION: str = "any"  # replaced along with any rotation's stamp
+HITS: str = "nest-pages:hits"
+MISSES: str = "nest-pages:misses"
+
+
+def _stamp_key(rotation: Any) -> str:
+    return f"nest-pages:version:{rotation}"
+
+
+def _new_stamp() -> str:
+    return f"{time.time():.3f}:{uuid4().hex}"
+
+
+def _stamps(rotation: Any) -> Optional[List[str]]:
+    """:return: the version stamps for pages of the rotation (None if the cache is down)"""
+    keys: List[str] = [_stamp_key(rotation), _stamp_key(EVERY_ROTATION)]
+    try:
+        found: Dict[str, str] = cache.get_many(keys)
+        for key in keys:  # never stamped (or evicted), so start with a fresh one
+            if key not in found:
+                cache.add(key, _new_stamp(), None)
+                found[key] = cache.get(key)
+    except Exception:  # a missing memcached shouldn't take the site down
+        return None
+    if None in found.values():
+        return None
+    return [found[key] for key in keys]
+
+
+def page_key(view: str, rotation: int, *args: Any) -> Optional[str]:
+    """
+    :param view: name of the view rendering the page
+    :param rotation: rotation number of the page
+    :param args: everything else that changes the page (scope, pk, species, etc…)
+    :return: cache key for the page (None if it can't be cached right now)
+    """
+    stamps: Optional[List[str]] = _stamps(rotation)
+    if stamps is None:
+        return None
+    parts: str = "\n".join(str(part) for part in [view, rotation, *args, *stamps])
+    return f"nest-page:{rotation}:{md5(parts.encode()).hexdigest()}"
+
+
+def data_version(
+    rotation: Optional[int] = None,
+) -> Optional[Tuple[str, Optional[float]]]:
+    """
+    :param rotation: rotation number of the data (None for data of any rotation)
+    :return: a hash that changes whenever the data might, and when it last changed
+             (None if the cache is down)
+    """
+    stamps: Optional[List[str]] = _stamps(
+        ANY_ROTATION if rotation is None else rotation
+    )
+    if stamps is None:
+        return None
+    times: List[float] = []
+    for stamp in stamps:
+        try:
+            times.append(float(stamp.split(":")[0]))
+        except ValueError:  # from before the stamps were timed
+            pass
+    version: str = md5("\n".join(stamps).encode()).hexdigest()
+    return version, max(times) if len(times) == len(stamps) else None
+
+
+def _count(counter: str) -> None:
+    try:
+        cache.incr(counter)
+    except ValueError:  # first count since the cache was emptied
+        cache.add(counter, 0, None)
+        cache.incr(counter)
+    except Exception:
+        pass
+
+
+def get_page(key: Optional[str]) -> Optional[bytes]:
+    """:return: the rendered page, or None on a miss"""
+    if key is None:
+        return None
+    try:
+        page: Optional[bytes] = cache.get(key)
+    except Exception:
+        page = None
+    _count(MISSES if page is None else HITS)
+    return page
+
+
+def set_page(key: Optional[str], page: bytes) -> None:
+    if key is None:
+        return
+    try:
+        cache.set(key, page, PAGE_TIMEOUT)
+    except Exception:
+        pass
+
+
+def page_cache_stats() -> Dict[str, int]:
+    """:return: hits and misses since the cache was last emptied"""
+    try:
+        found: Dict[str, int] = cache.get_many([HITS, MISSES])
+    except Exception:
+        found = {}
+    return {"hits": found.get(HITS, 0), "misses": found.get(MISSES, 0)}
+
+
+def _replace_stamps(rotations: Iterable[Optional[int]]) -> None:
+    keys: Dict[str, str] = {
+        _stamp_key(r): _new_stamp() for r in {*rotations, ANY_ROTATION} if r
+    }
+    try:
+        cache.set_many(keys, None)
+    except Exception:
+        pass
+
+
+def forget_rotation_pages(rotations: Iterable[Optional[int]]) -> None:
+    """
+    Orphan the cached pages of these rotations (EVERY_ROTATION for all of them)
+    once the transaction commits; nothing is orphaned if it rolls back
+    """
+    rotations = set(rotations)
+    transaction.on_commit(lambda: _replace_stamps(rotations))
+
+
+def forget_all_pages() -> None:
+    """Orphan every cached page right away"""
+    _replace_stamps([EVERY_ROTATION])
+
+
+def _places_changed(**kwargs: Any) -> None:
+    forget_rotation_pages([EVERY_ROTATION])
+
+
+def _nsla_changed(instance: NstSpeciesListArchive, **kwargs: Any) -> None:
+    forget_rotation_pages([instance.rotation_num_id])
+
+
+def _report_changed(instance: NstRawRpt, **kwargs: Any) -> None:
+    forget_rotation_pages([instance.calculated_rotation_id])
+
+
+# bulk_create and bulk_update don't send signals; add_reports_bulk calls forget_rotation_pages
+for _signal in [post_save, post_delete]:
+    _signal.connect(_nsla_changed, sender=NstSpeciesListArchive, dispatch_uid="pages")
+    _signal.connect(_report_changed, sender=NstRawRpt, dispatch_uid="pages")
+    for _model in [
+        NstLocation,
+        NstAltName,
+        NstNeighborhood,
+        NstCombinedRegion,
+        NstParkSystem,
+        NstMetropolisMajor,
+    ]:
+        _signal.connect(_places_changed, sender=_model, dispatch_uid=f"pages-{_model}")
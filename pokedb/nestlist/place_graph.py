@@ -0,0 +1,180 @@
+"""
+In-memory graph of which nests, neighborhoods, regions, park systems, and cities touch
+
+The which_* helpers and query_nests(restrict_city=…) used to answer these questions with
+distinct() joins across NstLocation → NstNeighborhood → NstCombinedRegion on every page.
+The geography only changes a few times a week, so it is loaded once per process and the
+answers become set lookups.  It is rebuilt after any of those tables (or the
+neighborhood ↔ region links) is saved.
+Sets that could run to thousands of IDs (every nest in a city) aren't handed back to the
+database as IN lists, though: nests_filter keeps the join for those places.
+"""
+
+from collections import defaultdict
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from typing import Dict, Set, Optional, Tuple, Iterable
+from .caching import VersionedMemo
+from .models import (
+    NstLocation,
+    NstNeighborhood,
+    NstCombinedRegion,
+    NstParkSystem,
+    NstMetropolisMajor,
+    NstSpeciesListArchive,
+)
+
+NOTHING: Set[int] = set()
+SMALL_SET: int = 100  # past this many bound IDs, a join is cheaper than an IN list
+KINDS: Dict[type, str] = {
+    NstLocation: "nest",
+    NstNeighborhood: "neighborhood",
+    NstCombinedRegion: "region",
+    NstParkSystem: "ps",
+    NstMetropolisMajor: "city",
+}
+
+
+def place_key(place) -> Tuple[Optional[str], Optional[int]]:
+    """:return: the kind of place ("nest", "city", etc…) and its pk (Nones if it isn't a place)"""
+    if isinstance(place, NstSpeciesListArchive):
+        return "nest", place.nestid_id
+    return KINDS.get(type(place)), getattr(place, "pk", None)
+
+
+class PlaceGraph:
+    def __init__(
+        self,
+        nests: Iterable[dict],
+        neighborhoods: Iterable[dict],
+        region_links: Iterable[dict],
+    ):
+        """
+        :param nests: values() of NstLocation
+        :param neighborhoods: values() of NstNeighborhood
+        :param region_links: values() of the NstNeighborhood ↔ NstCombinedRegion links
+        """
+        self.hood_of: Dict[int, Optional[int]] = {}
+        self.ps_of: Dict[int, Optional[int]] = {}
+        self.city_of: Dict[int, Optional[int]] = {}
+        self.nests_in: Dict[int, Set[int]] = defaultdict(set)  # by neighborhood
+        self.ps_nests: Dict[int, Set[int]] = defaultdict(set)
+        self.city_hoods: Dict[int, Set[int]] = defaultdict(set)
+        self.hood_regions: Dict[int, Set[int]] = defaultdict(set)
+        self.region_hoods: Dict[int, Set[int]] = defaultdict(set)
+        for nest in nests:
+            pk: int = nest["nestID"]
+            self.hood_of[pk] = nest["neighborhood"]
+            self.ps_of[pk] = nest["park_system"]
+            self.nests_in[nest["neighborhood"]].add(pk)
+            if nest["park_system"]:
+                self.ps_nests[nest["park_system"]].add(pk)
+        for hood in neighborhoods:
+            self.city_of[hood["id"]] = hood["major_city"]
+            self.city_hoods[hood["major_city"]].add(hood["id"])
+        for link in region_links:
+            self.hood_regions[link["nstneighborhood"]].add(link["nstcombinedregion"])
+            self.region_hoods[link["nstcombinedregion"]].add(link["nstneighborhood"])
+
+    def neighborhoods(self, kind: Optional[str], pk: Optional[int]) -> Set[int]:
+        """:return: pks of the neighborhoods containing (part of) the place"""
+        if kind == "neighborhood":
+            return {pk}
+        if kind == "nest":
+            return {self.hood_of[pk]} if self.hood_of.get(pk) else NOTHING
+        if kind == "city":
+            return self.city_hoods.get(pk, NOTHING)
+        if kind == "region":
+            return self.region_hoods.get(pk, NOTHING)
+        if kind == "ps":
+            return {self.hood_of[n] for n in self.ps_nests.get(pk, NOTHING)} - {None}
+        return NOTHING
+
+    def nests(self, kind: Optional[str], pk: Optional[int]) -> Set[int]:
+        """:return: pks of the nests in the place"""
+        if kind == "nest":
+            return {pk}
+        if kind == "ps":
+            return self.ps_nests.get(pk, NOTHING)
+        return {
+            n
+            for h in self.neighborhoods(kind, pk)
+            for n in self.nests_in.get(h, NOTHING)
+        }
+
+    def regions(self, kind: Optional[str], pk: Optional[int]) -> Set[int]:
+        """:return: pks of the regions overlapping the place"""
+        if kind == "region":
+            return {pk}
+        return {
+            r
+            for h in self.neighborhoods(kind, pk)
+            for r in self.hood_regions.get(h, NOTHING)
+        }
+
+    def cities(self, kind: Optional[str], pk: Optional[int]) -> Set[int]:
+        """:return: pks of the cities overlapping the place"""
+        if kind == "city":
+            return {pk}
+        return {self.city_of.get(h) for h in self.neighborhoods(kind, pk)} - {None}
+
+    def park_systems(self, kind: Optional[str], pk: Optional[int]) -> Set[int]:
+        """:return: pks of the park systems with a nest in the place"""
+        if kind == "ps":
+            return {pk}
+        return {self.ps_of.get(n) for n in self.nests(kind, pk)} - {None}
+
+    def near_city(self, city: int) -> Set[int]:
+        """:return: pks of the neighborhoods in the city or sharing a region with it"""
+        out: Set[int] = set(self.city_hoods.get(city, NOTHING))
+        for region in {r for h in out for r in self.hood_regions.get(h, NOTHING)}:
+            out |= self.region_hoods[region]
+        return out
+
+
+def nests_filter(kind: Optional[str], pk: Optional[int], prefix: str = "") -> Q:
+    """
+    :param kind: the kind of place ("nest", "city", etc…)
+    :param pk: its pk
+    :param prefix: path from the model being filtered to NstLocation (with the __)
+    :return: filter for the nests in the place
+    """
+    if kind == "city":
+        return Q(**{f"{prefix}neighborhood__major_city": pk})
+    if kind == "neighborhood":
+        return Q(**{f"{prefix}neighborhood": pk})
+    if kind == "region":  # one link per neighborhood, so no duplicate rows
+        return Q(**{f"{prefix}neighborhood__region": pk})
+    if kind == "ps":
+        return Q(**{f"{prefix}park_system": pk})
+    return Q(**{f"{prefix}pk__in": place_graph().nests(kind, pk)})
+
+
+def build_place_graph() -> PlaceGraph:
+    return PlaceGraph(
+        NstLocation.objects.values("nestID", "neighborhood", "park_system"),
+        NstNeighborhood.objects.values("id", "major_city"),
+        NstNeighborhood.region.through.objects.values(
+            "nstneighborhood", "nstcombinedregion"
+        ),
+    )
+
+
+place_memo: "VersionedMemo[PlaceGraph]" = VersionedMemo("places", build_place_graph)
+
+
+def place_graph() -> PlaceGraph:
+    """:return: the current PlaceGraph, building it if needed"""
+    return place_memo.get()
+
+
+for _model in KINDS:
+    post_save.connect(
+        place_memo.invalidate, sender=_model, dispatch_uid=f"places-{_model}"
+    )
+    post_delete.connect(
+        place_memo.invalidate, sender=_model, dispatch_uid=f"places-{_model}"
+    )
+m2m_changed.connect(
+    place_memo.invalidate, sender=NstNeighborhood.region.through, dispatch_uid="places"
+)
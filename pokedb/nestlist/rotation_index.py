@@ -0,0 +1,54 @@
+"""
+In-memory table of nest rotations for get_rotation
+
+There are only a couple of rotations a month, so the whole table is kept sorted by date
+and searched with bisect instead of querying on every report and page view.
+It is rebuilt after any rotation is saved or deleted (new_rotation, delete_rotation, the admin).
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+from django.db.models.signals import post_save, post_delete
+from typing import Dict, List, Optional
+from .caching import VersionedMemo
+from .models import NstRotationDate
+
+
+class RotationTable:
+    def __init__(self, rotations: List[NstRotationDate]):
+        """:param rotations: every NstRotationDate"""
+        self.rotations: List[NstRotationDate] = sorted(
+            rotations, key=lambda r: (r.date, r.num)
+        )
+        self.dates: List[datetime] = [r.date for r in self.rotations]
+        self.by_num: Dict[int, NstRotationDate] = {r.num: r for r in self.rotations}
+
+    def on_or_before(self, when: datetime) -> Optional[NstRotationDate]:
+        """:return: the latest rotation on or before the given time (None if there isn't one)"""
+        idx: int = bisect_right(self.dates, when)
+        return self.rotations[idx - 1] if idx else None
+
+    def oldest(self) -> Optional[NstRotationDate]:
+        return self.rotations[0] if self.rotations else None
+
+
+def build_rotation_table() -> RotationTable:
+    return RotationTable(list(NstRotationDate.objects.all()))
+
+
+rotation_memo: "VersionedMemo[RotationTable]" = VersionedMemo(
+    "rotations", build_rotation_table
+)
+
+
+def rotation_table() -> RotationTable:
+    """:return: the current RotationTable, building it if needed"""
+    return rotation_memo.get()
+
+
+post_save.connect(
+    rotation_memo.invalidate, sender=NstRotationDate, dispatch_uid="rotations"
+)
+post_delete.connect(
+    rotation_memo.invalidate, sender=NstRotationDate, dispatch_uid="rotations"
+)
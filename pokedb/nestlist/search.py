@@ -0,0 +1,171 @@
+"""
+Ranked, typo-tolerant name search for nests (and, through speciesinfo.search, Pokémon)
+
+Scores are trigram similarity as pg_trgm defines it: each word is lowercased and padded
+with two spaces in front and one behind, and two names score the share of their trigrams
+they have in common.  On Postgres the scoring and ranking happen in the database, where
+the GIN indexes from nestlist migration 0006 and speciesinfo migration 0003 find the
+candidates and only the top few rows come back; anywhere else (SQLite test runs) the
+same scores are computed in Python over the names in the in-memory indexes.
+A substring match always makes the cut, so everything the icontains search found is
+still found, just ranked behind closer names.
+A number that is a nest's ID (or a dex number) returns only that, as in query_nests.
+"""
+
+import re
+from typing import Dict, List, Set, Optional, Union, Iterable, Tuple
+from django.db import connection
+from django.db.models import Q, CharField, FloatField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest, Lower
+from .models import NstLocation, NstAltName, NstMetropolisMajor
+from .utils import str_int
+
+SIMILARITY_THRESHOLD: float = 0.3  # pg_trgm's default for the % operator
+WORD = re.compile(r"[^\W_]+")  # pg_trgm's word characters: letters & digits
+DEFAULT_LIMIT: int = 10
+
+
+def word_trigrams(text: str) -> Set[str]:
+    """:return: the trigrams of the text, the way pg_trgm's show_trgm() makes them"""
+    out: Set[str] = set()
+    for word in WORD.findall(str(text).lower()):
+        padded: str = f"  {word} "
+        out |= {padded[i : i + 3] for i in range(len(padded) - 2)}
+    return out
+
+
+def similarity(a: Union[str, Set[str]], b: Union[str, Set[str]]) -> float:
+    """:return: pg_trgm's similarity() of two strings (or their word_trigrams)"""
+    a = a if isinstance(a, set) else word_trigrams(a)
+    b = b if isinstance(b, set) else word_trigrams(b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def best_score(text: str, names: Iterable[str]) -> Optional[float]:
+    """
+    :param text: the search text
+    :param names: every name of one thing
+    :return: the similarity of its closest name, or None if no name is close enough
+    """
+    grams: Set[str] = word_trigrams(text)
+    lowered: str = str(text).lower()
+    score: float = 0.0
+    contains: bool = False
+    for name in names:
+        if name:
+            score = max(score, similarity(grams, name))
+            contains = contains or lowered in name.lower()
+    return score if contains or score >= SIMILARITY_THRESHOLD else None
+
+
+def on_postgres() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def register_trigram_lookup() -> None:
+    """
+    Postgres only: add __trigram_similar to CharField, as django.contrib.postgres does
+    when it's installed; it isn't, so that the SQLite settings don't need psycopg2
+    """
+    from django.contrib.postgres.lookups import TrigramSimilar
+
+    CharField.register_lookup(TrigramSimilar)
+
+
+def trigram_filter(fields: Iterable[str], text: str) -> Q:
+    """
+    Postgres only: names that are similar to or contain the text, which the trigram GIN
+    indexes can answer without reading the whole table (see register_trigram_lookup)
+    """
+    out: Q = Q()
+    for field in fields:
+        out |= Q(**{f"{field}__trigram_similar": text})
+        out |= Q(**{f"{field}__icontains": text})
+    return out
+
+
+def trigram_score(fields: List[str], text: str):
+    """Postgres only: an expression for the best similarity of any of the fields"""
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    scores = [TrigramSimilarity(field, text) for field in fields]
+    return scores[0] if len(scores) == 1 else Greatest(*scores)
+
+
+def _search_nests_pg(
+    text: str, city_id: Optional[int], limit: int
+) -> List[Tuple[NstLocation, float]]:
+    """Postgres only: the closest nests, scored, ranked, and cut to the limit in SQL"""
+    best_alt_name = (
+        NstAltName.objects.filter(main_entry=OuterRef("pk"))
+        .annotate(score=trigram_score(["name"], text))
+        .order_by("-score")
+        .values("score")[:1]
+    )
+    found_by_alt_name = NstAltName.objects.filter(
+        trigram_filter(["name"], text)
+    ).values("main_entry")
+    nests = NstLocation.objects.filter(
+        trigram_filter(["official_name", "short_name"], text)
+        | Q(nestID__in=found_by_alt_name)
+    )
+    if city_id:
+        nests = nests.filter(neighborhood__major_city=city_id)
+    nests = nests.annotate(
+        score=Greatest(
+            trigram_score(["official_name", "short_name"], text),
+            Coalesce(Subquery(best_alt_name, output_field=FloatField()), 0.0),
+        )
+    ).order_by("-score", Lower("official_name"))
+    return [(nest, nest.score) for nest in nests[:limit]]
+
+
+def _nest_scores_py(text: str, city_id: Optional[int]) -> Dict[int, float]:
+    from .nest_index import nest_name_index
+
+    index = nest_name_index()
+    nests: Iterable[int] = (
+        index.nests_in.get(city_id, set()) if city_id else index.city_of.keys()
+    )
+    scores: Dict[int, float] = {}
+    for pk in nests:
+        score: Optional[float] = best_score(text, index.names.get(pk, []))
+        if score is not None:
+            scores[pk] = score
+    return scores
+
+
+def search_nests(
+    search: Union[str, int],
+    city: Optional[Union[NstMetropolisMajor, int]] = None,
+    limit: int = DEFAULT_LIMIT,
+) -> List[Tuple[NstLocation, float]]:
+    """
+    :param search: (part of) a nest's name, misspelled or not, or its ID
+    :param city: only look for nests in this city (or its id)
+    :param limit: the most results to return
+    :return: (nest, similarity) pairs, closest first
+    """
+    text: str = str(search).strip()
+    city_id: Optional[int] = getattr(city, "pk", city)
+    if not text:
+        return []
+    if str_int(text):  # handle 18th street library
+        exact = NstLocation.objects.filter(nestID=int(text))
+        if city_id:
+            exact = exact.filter(neighborhood__major_city=city_id)
+        nest: Optional[NstLocation] = exact.first()
+        if nest is not None:
+            return [(nest, 1.0)]
+    if on_postgres():
+        return _search_nests_pg(text, city_id, limit)
+    scores: Dict[int, float] = _nest_scores_py(text, city_id)
+    nests: Dict[int, NstLocation] = NstLocation.objects.filter(
+        nestID__in=scores
+    ).in_bulk()
+    ranked: List[NstLocation] = sorted(
+        nests.values(), key=lambda n: (-scores[n.pk], n.official_name.lower())
+    )
+    return [(nest, scores[nest.pk]) for nest in ranked[:limit]]
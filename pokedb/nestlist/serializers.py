@@ -3,14 +3,14 @@ from nestlist.models import (
     NstMetropolisMajor,
     NstNeighborhood,
     NstCombinedRegion,
+    NstParkSystem,
 )
 from rest_framework import serializers
 
 
 class ParkSerializer(serializers.ModelSerializer):
     neighborhood_name = serializers.ReadOnlyField(source="neighborhood.name")
-    neighborhood_id = serializers.ReadOnlyField(source="neighborhood")
-    # alt_names = serializers.ListSerializer(source="nstaltname_set")
+    neighborhood_id = serializers.ReadOnlyField()
 
     class Meta:
         model = NstLocation
@@ -20,25 +20,105 @@ class ParkSerializer(serializers.ModelSerializer):
             "short_name",
             "neighborhood_id",
             "neighborhood_name",
-            "resident_history",
-            "pk",
+            "park_system_id",
+            "duplicate_of_id",
+            "permanent_species",
             "address",
             "private",
             "notes",
-            # "alt_names",
+            "lat",
+            "lon",
         ]
 
 
-class CitySerializer(serializers.HyperlinkedModelSerializer):
+class ParkDetailSerializer(ParkSerializer):
+    # from the shown_alt_names prefetch
+    alt_names = serializers.SerializerMethodField()
+
+    class Meta(ParkSerializer.Meta):
+        fields = ParkSerializer.Meta.fields + ["alt_names"]
+
+    def get_alt_names(self, obj):
+        return [alt.name for alt in obj.shown_alt_names]
+
+
+class CitySerializer(serializers.ModelSerializer):
     class Meta:
         model = NstMetropolisMajor
+        fields = ["id", "name", "short_name", "lat", "lon"]
+
 
+class NeighborhoodSerializer(serializers.ModelSerializer):
+    city_id = serializers.ReadOnlyField(source="major_city_id")
+    regions = serializers.PrimaryKeyRelatedField(
+        source="region", many=True, read_only=True
+    )
 
-class NeighborhoodSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = NstNeighborhood
+        fields = ["id", "name", "city_id", "regions", "lat", "lon"]
 
 
-class RegionSerializer(serializers.HyperlinkedModelSerializer):
+class RegionSerializer(serializers.ModelSerializer):
     class Meta:
         model = NstCombinedRegion
+        fields = ["id", "name"]
+
+
+class RegionDetailSerializer(RegionSerializer):
+    neighborhoods = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta(RegionSerializer.Meta):
+        fields = RegionSerializer.Meta.fields + ["neighborhoods"]
+
+
+class ParkSystemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NstParkSystem
+        fields = ["id", "name", "website"]
+
+
+class ParkSystemDetailSerializer(ParkSystemSerializer):
+    nests = serializers.PrimaryKeyRelatedField(
+        source="nstlocation_set", many=True, read_only=True
+    )
+
+    class Meta(ParkSystemSerializer.Meta):
+        fields = ParkSystemSerializer.Meta.fields + ["nests"]
+
+
+class NestingSerializer(serializers.Serializer):
+    """
+    A row of a nest list or history: an NSLA row, or an NstCurrentNest row
+    (whose field names mirror the NSLA's)
+    """
+
+    rotation = serializers.ReadOnlyField(source="rotation_num_id")
+    nestID = serializers.ReadOnlyField(source="nestid_id")
+    nest = serializers.SerializerMethodField()
+    species = serializers.SerializerMethodField()
+    species_no = serializers.ReadOnlyField()
+    confirmed = serializers.SerializerMethodField()
+
+    def get_nest(self, obj):
+        if hasattr(obj, "nest_name"):  # NstCurrentNest has the names copied in
+            return obj.nest_short_name or obj.nest_name
+        return obj.nestid.get_name()
+
+    def get_species(self, obj):
+        return obj.species_name_fk_id or obj.species_txt
+
+    def get_confirmed(self, obj):
+        return obj.confirmation is True
+
+
+class ReportSerializer(serializers.Serializer):
+    """One report from a bot, as add_reports_bulk takes it"""
+
+    name = serializers.CharField(max_length=120)
+    nest = serializers.CharField(max_length=120)  # name or ID
+    species = serializers.CharField(max_length=120)  # name or dex number
+    timestamp = serializers.DateTimeField(required=False)  # default: now
+    confirmation = serializers.BooleanField(required=False, allow_null=True)
+    server = serializers.CharField(max_length=120, required=False, allow_blank=True)
+    foreign_db_row_num = serializers.IntegerField(required=False)  # the bot's own ID
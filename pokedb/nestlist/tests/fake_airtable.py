@@ -0,0 +1,102 @@
+"""
+A local stand-in for api.airtable.com, serving the Submissions Data table of a few bases
+
+Pass FakeAirtable.api_url as the api_url of the Airtable importer.
+Only the list-records endpoint is implemented, with paging and "serial>N" formulas.
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Set, Optional
+from urllib.parse import urlparse, parse_qs, unquote
+
+
+def submission(serial: int, name: str, species: int, nest: int, age: int = 60) -> Dict:
+    """
+    :param age: minutes before now when the report was submitted
+    :return: a record like the ones in the Submissions Data tables
+    """
+    created: datetime = datetime.utcnow() - timedelta(minutes=age)
+    return {
+        "id": f"rec{serial:014d}",
+        "createdTime": created.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "fields": {
+            "serial": serial,
+            "Name": name,
+            "summary": f"#{species} reported at {nest}.",
+        },
+    }
+
+
+class FakeAirtable:
+    def __init__(
+        self,
+        bases: Dict[str, List[Dict]],
+        page_size: int = 100,
+        throttle: Optional[Set[str]] = None,
+    ):
+        """
+        :param bases: records by base ID
+        :param page_size: records per page
+        :param throttle: bases that answer their first request with a 429
+        """
+        self.bases: Dict[str, List[Dict]] = bases
+        self.page_size: int = page_size
+        self.throttle: Set[str] = set(throttle or [])
+        self.requests: Counter = Counter()  # by base ID
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.api_url: str = f"http://127.0.0.1:{self.server.server_port}/v0"
+
+    def start(self) -> "FakeAirtable":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def records(self, base: str, formula: str) -> List[Dict]:
+        out: List[Dict] = self.bases.get(base, [])
+        after = re.fullmatch(r"serial>(\d+)", formula or "")
+        if after:
+            out = [r for r in out if r["fields"]["serial"] > int(after.group(1))]
+        return out
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                _, version, base, table = url.path.split("/")
+                query: Dict[str, List[str]] = parse_qs(url.query)
+                fake.requests[base] += 1
+                if base in fake.throttle:
+                    fake.throttle.discard(base)
+                    return self.reply(429, {"errors": "RATE_LIMIT_REACHED"})
+                if base not in fake.bases or unquote(table) != "Submissions Data":
+                    return self.reply(404, {"error": "NOT_FOUND"})
+                records = fake.records(base, query.get("filterByFormula", [""])[0])
+                start: int = int(query.get("offset", ["0"])[0])
+                end: int = start + fake.page_size
+                page: Dict = {"records": records[start:end]}
+                if end < len(records):
+                    page["offset"] = str(end)
+                self.reply(200, page)
+
+            def reply(self, status: int, body: Dict) -> None:
+                data: bytes = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                pass  # keep the test output clean
+
+        return Handler
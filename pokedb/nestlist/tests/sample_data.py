@@ -0,0 +1,189 @@
+"""
+A tiny pokédex and city for tests that can't use the real database dump
+
+Call these from the setUpTestData of a MemoTestCase.
+"""
+
+from typing import Dict, List
+from datetime import datetime, timedelta
+from django.test import TestCase
+from nestlist.caching import forget_all_memos
+from nestlist.models import (
+    NstAdminEmail,
+    NstMetropolisMajor,
+    NstNeighborhood,
+    NstLocation,
+    NstRotationDate,
+    NstCombinedRegion,
+    NstAltName,
+)
+from nestlist.utils import append_utc
+from speciesinfo.models import (
+    Pokemon,
+    Generation,
+    Type,
+    EggGroup,
+    PokeCategory,
+    BodyPlan,
+)
+
+# (dex number, name, type1, type2, egg group)
+TINY_DEX = [
+    (1, "Bulbasaur", "Grass", "Poison", "Monster"),
+    (4, "Charmander", "Fire", None, "Monster"),
+    (7, "Squirtle", "Water", None, "Monster"),
+    (25, "Pikachu", "Electric", None, "Field"),
+    (63, "Abra", "Psychic", None, "Human-Like"),
+    (92, "Gastly", "Ghost", "Poison", "Amorphous"),
+    (129, "Magikarp", "Water", None, "Dragon"),
+]
+
+SYSTEM_BOT: int = 1  # pass this as the bot, since settings.SYSTEM_BOT_USER may differ
+
+
+class MemoTestCase(TestCase):
+    """
+    Starts and ends each class with empty memos,
+    since the in-memory tables would otherwise outlive the rolled-back test data
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        forget_all_memos()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        forget_all_memos()
+
+
+def make_tiny_dex() -> Dict[str, Pokemon]:
+    """
+    Makes the species in TINY_DEX plus a few evolutions and the (Egg) that nestable_species needs
+    :return: dict of every Pokémon created by name
+    """
+    kanto = Generation.objects.create(pk=1, region="Kanto")
+    types: Dict[str, Type] = {}
+    eggs: Dict[str, EggGroup] = {}
+    basic = PokeCategory.objects.create(pk=5, name="Basic")
+    egg_cat = PokeCategory.objects.create(pk=6, name="Egg")
+    stage = PokeCategory.objects.create(pk=8, name="Evolved")
+    body = BodyPlan.objects.create(name="Quadruped", alt_name="quad")
+    for _, _, t1, t2, egg in TINY_DEX:
+        for t in [t1, t2]:
+            if t and t not in types:
+                types[t] = Type.objects.create(id=len(types) + 1, name=t)
+        if egg not in eggs:
+            eggs[egg] = EggGroup.objects.create(name=egg)
+
+    def make(dex: int, name: str, t1: str, t2, egg: str, **kwargs) -> Pokemon:
+        return Pokemon.objects.create(
+            dex_number=dex,
+            name=name,
+            form="Normal",
+            generation=kanto,
+            type1=types[t1],
+            type2=types[t2] if t2 else None,
+            egg1=eggs[egg],
+            hp=50,
+            attack=50,
+            defense=50,
+            sp_atk=50,
+            sp_def=50,
+            speed=50,
+            wt_kg=1,
+            ht_m=1,
+            **kwargs,
+        )
+
+    out: Dict[str, Pokemon] = {
+        "(Egg)": make(0, "(Egg)", "Water", None, "Monster", category=egg_cat)
+    }
+    for dex, name, t1, t2, egg in TINY_DEX:
+        out[name] = make(
+            dex,
+            name,
+            t1,
+            t2,
+            egg,
+            category=basic,
+            previous_evolution=out["(Egg)"],
+            body_plan=body if name == "Bulbasaur" else None,
+        )
+    out["Ivysaur"] = make(
+        2,
+        "Ivysaur",
+        "Grass",
+        "Poison",
+        "Monster",
+        category=stage,
+        previous_evolution=out["Bulbasaur"],
+    )
+    out["Venusaur"] = make(
+        3,
+        "Venusaur",
+        "Grass",
+        "Poison",
+        "Monster",
+        category=stage,
+        previous_evolution=out["Ivysaur"],
+    )
+    out["Kadabra"] = make(
+        64,
+        "Kadabra",
+        "Psychic",
+        None,
+        "Human-Like",
+        category=stage,
+        previous_evolution=out["Abra"],
+    )
+    return out
+
+
+def make_tiny_city() -> Dict[str, object]:
+    """
+    Our Town has three parks across two neighborhoods and a region that pokes into Somewhere Else
+    Bots: 1 is the system, 2 is a human, 3 is a survey bot for Our Town
+    :return: dict of the interesting objects by name
+    """
+    our_town = NstMetropolisMajor.objects.create(name="Our Town", active=True)
+    elsewhere = NstMetropolisMajor.objects.create(name="Somewhere Else", active=True)
+    here = NstNeighborhood.objects.create(name="Right Here", major_city=our_town)
+    next_door = NstNeighborhood.objects.create(name="Next Door", major_city=our_town)
+    far_away = NstNeighborhood.objects.create(name="Far Away", major_city=elsewhere)
+    border = NstCombinedRegion.objects.create(name="Border Lands")
+    next_door.region.add(border)
+    far_away.region.add(border)
+    nests: List[NstLocation] = [
+        NstLocation.objects.create(official_name="Alpha Park", neighborhood=here),
+        NstLocation.objects.create(
+            official_name="Beta Park", short_name="Beta", neighborhood=here
+        ),
+        NstLocation.objects.create(official_name="Gamma Park", neighborhood=next_door),
+        NstLocation.objects.create(official_name="Delta Park", neighborhood=far_away),
+        NstLocation.objects.create(
+            official_name="Lake Epsilon",
+            neighborhood=next_door,
+            permanent_species="Magikarp",
+        ),
+    ]
+    NstAltName.objects.create(name="The Gamma", main_entry=nests[2])
+    NstAltName.objects.create(name="Secret Gamma", main_entry=nests[2], hide_me=True)
+    NstAdminEmail.objects.create(pk=SYSTEM_BOT, name="System", is_bot=2)
+    NstAdminEmail.objects.create(pk=2, name="Human", is_bot=0, city=our_town)
+    NstAdminEmail.objects.create(pk=3, name="Bot", is_bot=1, city=our_town)
+    last_week: datetime = append_utc(datetime.utcnow()) - timedelta(days=7)
+    return {
+        "our_town": our_town,
+        "elsewhere": elsewhere,
+        "here": here,
+        "next_door": next_door,
+        "far_away": far_away,
+        "border": border,
+        "nests": nests,
+        "old_rotation": NstRotationDate.objects.create(
+            num=1, date=last_week - timedelta(days=14)
+        ),
+        "rotation": NstRotationDate.objects.create(num=2, date=last_week),
+    }
@@ -0,0 +1,131 @@
+import unittest.mock
+from nestlist.models import (
+    AirtableImportLog,
+    NstAdminEmail,
+    NstRawRpt,
+    NstSpeciesListArchive,
+)
+from nestlist.tests.fake_airtable import FakeAirtable, submission
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+from nestlist.tools.importers import airtable
+from nestlist.tools.importers.airtable import import_cities, import_city
+
+
+class AirtableImportTests(MemoTestCase):
+    """Imports from a fake Airtable server"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.our_town, cls.elsewhere = cls.town["our_town"], cls.town["elsewhere"]
+        alpha, beta, _, delta, _ = [n.pk for n in cls.town["nests"]]
+        cls.our_town.airtable_base_id = "appOurTown"
+        cls.our_town.airtable_bot_id = 3
+        cls.our_town.save()
+        cls.elsewhere.airtable_base_id = "appElsewhere"
+        cls.elsewhere.airtable_bot = NstAdminEmail.objects.create(
+            pk=4, name="Other Bot", is_bot=1, city=cls.elsewhere
+        )
+        cls.elsewhere.save()
+        cls.bases = {
+            "appOurTown": [
+                submission(1, "alice", 1, alpha, age=50),
+                submission(2, "bob", 1, alpha, age=40),
+                submission(3, "carol", 4, beta, age=30),
+                submission(7, "dave", 25, beta, age=20),
+                submission(9, "erin", 63, 9999, age=10),
+            ],
+            "appElsewhere": [submission(n, f"user{n}", 7, delta) for n in range(1, 8)],
+        }
+
+    def setUp(self):
+        self.fake = FakeAirtable(self.bases, page_size=2, throttle={"appElsewhere"})
+        self.fake.start()
+
+    def tearDown(self):
+        self.fake.stop()
+
+    def test_concurrent_import(self):
+        results = import_cities(
+            [self.our_town, self.elsewhere],
+            workers=2,
+            api_url=self.fake.api_url,
+            backoff=0,
+        )
+        self.assertEqual(results["Our Town"], {0: 0, 1: 2, 2: 1, 4: 1, 9: 1})
+        self.assertEqual(results["Somewhere Else"], {0: 0, 1: 1, 2: 6, 4: 0, 9: 0})
+        self.assertEqual(self.fake.requests["appElsewhere"], 5)  # 429 + 4 pages
+        log = AirtableImportLog.objects.get(city="appOurTown")
+        self.assertEqual(log.end_num, 9)  # the real last serial, despite the gaps
+        self.assertIsNotNone(log.fetch_seconds)
+        self.assertIsNotNone(log.ingest_seconds)
+        self.assertEqual(
+            sorted(
+                NstRawRpt.objects.filter(bot=3).values_list(
+                    "foreign_db_row_num", flat=True
+                )
+            ),
+            [1, 2, 3, 7],
+        )
+
+        # nothing new the second time around
+        self.assertEqual(
+            import_cities([self.our_town], api_url=self.fake.api_url)["Our Town"][1], 0
+        )
+        self.assertEqual(AirtableImportLog.objects.count(), 2)
+
+    def test_same_as_serial_import(self):
+        serial = import_city("appOurTown", 3, self.fake.api_url)
+        raw = list(
+            NstRawRpt.objects.order_by("foreign_db_row_num").values_list(
+                "foreign_db_row_num", "action", "nsla_pk__species_name_fk"
+            )
+        )
+        NstRawRpt.objects.all().delete()
+        AirtableImportLog.objects.all().delete()
+        NstSpeciesListArchive.objects.all().delete()
+        bulk = import_cities([self.our_town], api_url=self.fake.api_url)["Our Town"]
+        self.assertEqual(serial, bulk)
+        self.assertEqual(
+            list(
+                NstRawRpt.objects.order_by("foreign_db_row_num").values_list(
+                    "foreign_db_row_num", "action", "nsla_pk__species_name_fk"
+                )
+            ),
+            raw,
+        )
+
+    def test_resume_after_crash(self):
+        real_add_bulk = airtable.add_bulk
+
+        def crash_on_last_chunk(reports, bot_id):
+            if reports[0]["num"] == 9:
+                raise ConnectionError("database went away")
+            return real_add_bulk(reports, bot_id)
+
+        with unittest.mock.patch.object(airtable, "add_bulk", crash_on_last_chunk):
+            with self.assertRaises(ConnectionError):
+                airtable.add_city_reports(
+                    "appOurTown",
+                    3,
+                    airtable.stream_submissions("appOurTown", 0, self.fake.api_url),
+                    chunk_size=2,
+                )
+        self.assertEqual(airtable.last_imported_serial("appOurTown"), 7)
+        self.assertEqual(NstRawRpt.objects.count(), 4)
+        resumed = import_cities([self.our_town], api_url=self.fake.api_url)
+        self.assertEqual(resumed["Our Town"], {0: 0, 1: 0, 2: 0, 4: 0, 9: 1})
+        self.assertEqual(airtable.last_imported_serial("appOurTown"), 9)
+
+    def test_streams_pages(self):
+        chunks = airtable.timed_chunks(
+            airtable.stream_submissions(
+                "appElsewhere", 2, self.fake.api_url, backoff=0
+            ),
+            2,
+        )
+        first, _ = next(chunks)
+        self.assertEqual([r["num"] for r in first], [3, 4])
+        self.assertEqual(self.fake.requests["appElsewhere"], 2)  # 429 + one page
+        self.assertEqual([[r["num"] for r in c] for c, _ in chunks], [[5, 6], [7]])
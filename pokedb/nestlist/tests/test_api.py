@@ -0,0 +1,214 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from nestlist.caching import forget_all_memos
+from nestlist.models import add_a_report, NstAdminEmail, NstSpeciesListArchive
+from nestlist.page_cache import forget_all_pages
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+from rest_framework.authtoken.models import Token
+
+
+class ReadAPITests(MemoTestCase):
+    """The read API pages by cursor and answers pollers with 304s until the data changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.city = cls.town["our_town"].pk
+        for nest, species, when in [
+            ("Alpha", "Bulbasaur", timezone.now()),
+            ("Gamma", "Squirtle", timezone.now()),
+            ("Alpha", "Charmander", cls.town["old_rotation"].date + timedelta(days=1)),
+        ]:
+            add_a_report(
+                name="alice",
+                nest=nest,
+                species=species,
+                timestamp=when,
+                bot_id=2,
+                server="test",
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        forget_all_pages()
+
+    def setUp(self):
+        forget_all_pages()
+
+    def tearDown(self):
+        forget_all_memos()
+
+    def get(self, url: str, **headers):
+        return self.client.get(url, HTTP_ACCEPT="application/json", **headers)
+
+    def test_nests_are_the_citys(self):
+        data = self.get(f"/city/{self.city}/nests/").json()
+        names = {nest["official_name"] for nest in data["results"]}
+        self.assertEqual(
+            names, {"Alpha Park", "Beta Park", "Gamma Park", "Lake Epsilon"}
+        )
+        self.assertNotIn("resident_history", data["results"][0])
+
+    def test_cursor_pages(self):
+        first = self.get(f"/city/{self.city}/nests/?limit=3").json()
+        self.assertEqual(len(first["results"]), 3)
+        self.assertIsNone(first["previous"])
+        second = self.get(first["next"]).json()
+        self.assertEqual(len(second["results"]), 1)
+        self.assertIsNone(second["next"])
+        ids = [n["nestID"] for n in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_not_modified(self):
+        url = f"/city/{self.city}/nests/"
+        response = self.get(url)
+        self.assertTrue(response.has_header("Last-Modified"))
+        again = self.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+    def test_report_changes_etag(self):
+        url = f"/city/{self.city}/current/"
+        etag = self.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            add_a_report(
+                name="bob",
+                nest="Beta",
+                species="Pikachu",
+                timestamp=timezone.now(),
+                bot_id=2,
+                server="test",
+            )
+        response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        species = {row["nest"]: row["species"] for row in response.json()["results"]}
+        self.assertEqual(species["Beta"], "Pikachu")
+
+    def test_etag_waits_for_commit(self):
+        url = f"/city/{self.city}/current/"
+        etag = self.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                add_a_report(
+                    name="bob",
+                    nest="Beta",
+                    species="Pikachu",
+                    timestamp=timezone.now(),
+                    bot_id=2,
+                    server="test",
+                )
+            # the report isn't committed yet, so pollers keep the old version
+            response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(self.get(url)["ETag"], etag)
+
+    def test_current_list(self):
+        rows = self.get(f"/city/{self.city}/current/").json()["results"]
+        self.assertEqual(
+            {(r["nest"], r["species"]) for r in rows},
+            {("Alpha Park", "Bulbasaur"), ("Gamma Park", "Squirtle")},
+        )
+        rows = self.get(f"/city/{self.city}/current/?rotation=1").json()["results"]
+        self.assertEqual(
+            [(r["rotation"], r["species"]) for r in rows], [(1, "Charmander")]
+        )
+
+    def test_histories(self):
+        alpha = self.town["nests"][0].pk
+        rows = self.get(f"/city/{self.city}/nests/{alpha}/history/").json()["results"]
+        self.assertEqual([r["species"] for r in rows], ["Bulbasaur", "Charmander"])
+        rows = self.get(f"/city/{self.city}/species/Squirtle/").json()["results"]
+        self.assertEqual([r["nest"] for r in rows], ["Gamma Park"])
+
+    def test_nest_detail(self):
+        gamma = self.town["nests"][2].pk
+        data = self.get(f"/city/{self.city}/nests/{gamma}/").json()
+        self.assertEqual(data["alt_names"], ["The Gamma"])
+        elsewhere = self.town["nests"][3].pk
+        self.assertEqual(
+            self.get(f"/city/{self.city}/nests/{elsewhere}/").status_code, 404
+        )
+
+    def test_places(self):
+        hoods = self.get(f"/city/{self.city}/neighborhoods/").json()["results"]
+        self.assertEqual(
+            {h["name"] for h in hoods},
+            {self.town["here"].name, self.town["next_door"].name},
+        )
+        cities = self.get("/city/cities/").json()["results"]
+        self.assertIn(self.city, [c["id"] for c in cities])
+        self.assertEqual(self.get(f"/city/{self.city}/regions/").status_code, 200)
+        self.assertEqual(self.get(f"/city/{self.city}/park_systems/").status_code, 200)
+
+
+class BotReportTests(MemoTestCase):
+    """Bots post batches of reports with their tokens and get a status for each one"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.url = f"/city/{cls.town['our_town'].pk}/rpt/"
+        cls.bot = NstAdminEmail.objects.get(pk=3)
+        cls.bot.auth_user = User.objects.create_user("survey-bot")
+        cls.bot.save()
+        cls.token = Token.objects.create(user=cls.bot.auth_user).key
+        cls.stranger = Token.objects.create(user=User.objects.create_user("nobody"))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        forget_all_pages()
+
+    def tearDown(self):
+        forget_all_memos()
+
+    def post(self, data, token=None):
+        return self.client.post(
+            self.url,
+            data,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {token or self.token}",
+        )
+
+    def test_batch(self):
+        response = self.post(
+            [
+                {"name": "alice", "nest": "Alpha", "species": "Bulbasaur"},
+                {"name": "bob", "nest": "Alpha", "species": "Bulbasaur"},
+                {"name": "carol", "nest": "Nowhere", "species": "Pikachu"},
+                {"nest": "Beta", "species": "Pikachu"},
+                {"name": "dave", "nest": "Delta", "species": "Pikachu"},  # elsewhere
+            ]
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual([r["status"] for r in results], [1, 2, 9, 9, 9])
+        self.assertEqual(results[2]["errors"]["nest"]["code"], 404)
+        self.assertIn("name", results[3]["errors"])
+        nsla = NstSpeciesListArchive.objects.get(pk=results[0]["nsla"])
+        self.assertEqual(nsla.species_name_fk_id, "Bulbasaur")
+        self.assertEqual(nsla.last_mod_by, self.bot)
+
+    def test_needs_a_bot(self):
+        rpt = [{"name": "alice", "nest": "Alpha", "species": "Bulbasaur"}]
+        anonymous = self.client.post(self.url, rpt, content_type="application/json")
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(self.post(rpt, self.stranger.key).status_code, 403)
+        other_city = f"/city/{self.town['elsewhere'].pk}/rpt/"
+        response = self.client.post(
+            other_city,
+            rpt,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {self.token}",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(NstSpeciesListArchive.objects.exists())
+
+    def test_needs_a_list(self):
+        self.assertEqual(self.post({"name": "alice"}).status_code, 400)
@@ -0,0 +1,158 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from nestlist.models import (
+    add_a_report,
+    add_reports_bulk,
+    NstAdminEmail,
+    new_rotation,
+    NstLocation,
+    NstSpeciesListArchive,
+    NstRawRpt,
+    NstRotationDate,
+)
+from speciesinfo.models import match_one_species
+from nestlist.tests.sample_data import (
+    MemoTestCase,
+    SYSTEM_BOT,
+    make_tiny_dex,
+    make_tiny_city,
+)
+from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from nestlist.utils import append_utc
+
+
+class BulkReportingTests(MemoTestCase):
+    """add_reports_bulk should agree with calling add_a_report on each report in turn"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+
+    def reports(self) -> List[Dict[str, Any]]:
+        start: datetime = append_utc(datetime.utcnow()) - timedelta(days=1)
+        batch: List[Dict[str, Any]] = [
+            {"name": "alice", "nest": "Alpha", "species": "Bulbasaur"},
+            {"name": "bob", "nest": "alpha park", "species": "1"},
+            {"name": "bob", "nest": "Alpha", "species": "bulbasaur"},
+            {"name": "carol", "nest": "Beta", "species": "Charmander"},
+            {"name": "dave", "nest": "Beta", "species": "Pikachu"},
+            {"name": "erin", "nest": "Beta", "species": "Pikachu"},
+            {"name": "frank", "nest": "The Gamma", "species": "Gastly"},
+            {"name": "frank", "nest": "Gamma", "species": "Squirtle"},
+            {"name": "gina", "nest": "Nowhere", "species": "Abra"},
+            {"name": "hank", "nest": "Park", "species": "Abra"},
+            {"name": "ivan", "nest": "Delta", "species": "Abra"},
+            {"name": "judy", "nest": "Alpha", "species": "Mewtwo"},
+            {"name": "", "nest": "Alpha", "species": "Abra"},
+            {"name": "kim", "nest": "Alpha", "species": "Abra", "bot_id": 42},
+            {"name": "leo", "nest": "Gamma", "species": "Abra", "bot_id": 2},
+        ]
+        for offset, rpt in enumerate(batch):
+            rpt.setdefault("bot_id", 3)
+            rpt["timestamp"] = start + timedelta(minutes=offset)
+            rpt["server"] = "test"
+        return batch
+
+    expected_statuses: List[int] = [1, 2, 0, 1, 4, 2, 1, 1, 9, 9, 9, 9, 9, 9, 7]
+
+    def nsla_state(self) -> Dict[int, tuple]:
+        return {
+            n.nestid_id: (n.species_name_fk_id, bool(n.confirmation), n.last_mod_by_id)
+            for n in NstSpeciesListArchive.objects.all()
+        }
+
+    def test_one_at_a_time(self):
+        statuses = [add_a_report(**rpt).status for rpt in self.reports()]
+        self.assertEqual(statuses, self.expected_statuses)
+
+    def test_bulk_matches_one_at_a_time(self):
+        for rpt in self.reports():
+            add_a_report(**rpt)
+        one_at_a_time = self.nsla_state()
+        raw_count: int = NstRawRpt.objects.count()
+        NstRawRpt.objects.all().delete()
+        NstSpeciesListArchive.objects.all().delete()
+
+        results = add_reports_bulk(self.reports())
+        self.assertEqual([r.status for r in results], self.expected_statuses)
+        self.assertEqual(self.nsla_state(), one_at_a_time)
+        self.assertEqual(NstRawRpt.objects.count(), raw_count)
+        self.assertEqual(results[8].errors_by_location["nest"][0], 404)
+        self.assertEqual(results[9].errors_by_location["nest"][0], 412)
+
+    def test_bulk_links_raw_reports(self):
+        results = add_reports_bulk(self.reports()[:3])
+        alpha = NstSpeciesListArchive.objects.get(nestid=self.town["nests"][0])
+        self.assertEqual(alpha.report_audit.count(), 3)
+        self.assertTrue(alpha.confirmation)
+        self.assertEqual(
+            set(NstRawRpt.objects.values_list("nsla_pk_unlink", flat=True)), {alpha.pk}
+        )
+        self.assertEqual([r.row.user_name for r in results], ["alice", "bob", "bob"])
+
+    def test_bulk_takes_objects(self):
+        batch = self.reports()[:1]
+        batch[0]["bot_id"] = NstAdminEmail.objects.get(pk=3)
+        batch[0]["species"] = match_one_species("Bulbasaur")
+        (result,) = add_reports_bulk(batch)
+        self.assertEqual(result.status, 1)
+        self.assertEqual(result.row.bot_id, 3)
+        self.assertEqual(result.row.raw_species_num, "Bulbasaur")
+
+    def test_bulk_without_bot(self):
+        batch = self.reports()[:2]
+        del batch[0]["bot_id"]
+        batch[1]["bot_id"] = None
+        for result in add_reports_bulk(batch):
+            self.assertEqual(result.status, 9)
+            self.assertEqual(result.errors_by_location["bot_id"][0], 401)
+        self.assertEqual(add_a_report(**{**batch[1], "bot_id": None}).status, 9)
+
+    def test_bulk_sees_existing_reports(self):
+        batch = self.reports()
+        add_a_report(**batch[3])  # carol's Charmander at Beta
+        self.assertEqual(
+            [r.status for r in add_reports_bulk(batch[4:6])], [4, 2],
+        )
+
+    def test_new_rotation_with_a_bad_bot(self):
+        day: datetime = append_utc(datetime.utcnow()) + timedelta(days=1)
+        status = new_rotation(day, rotation_user=999)
+        self.assertFalse(status.success)
+        self.assertIsNone(status.rotation)
+        self.assertIn("bot_id", status.note)
+        self.assertFalse(NstRotationDate.objects.filter(date__gte=day).exists())
+
+    def test_new_rotation_permanent_nests(self):
+        match_one_species("magikarp")  # build the species index
+        first_day: datetime = append_utc(datetime.utcnow()) + timedelta(days=1)
+        with CaptureQueriesContext(connection) as one_nest:
+            first = new_rotation(first_day, rotation_user=SYSTEM_BOT).rotation
+        lake = NstSpeciesListArchive.objects.get(rotation_num=first)
+        self.assertEqual(
+            (lake.nestid, lake.species_txt, lake.confirmation, lake.last_mod_by_id),
+            (self.town["nests"][4], "Magikarp", True, SYSTEM_BOT),
+        )
+        self.assertEqual(lake.report_audit.get().raw_park_info, str(lake.nestid_id))
+
+        for n in range(5):
+            NstLocation.objects.create(
+                official_name=f"Pond {n}",
+                neighborhood=self.town["here"],
+                permanent_species="Squirtle|Magikarp",
+            )
+        with CaptureQueriesContext(connection) as six_nests:
+            second = new_rotation(
+                first_day + timedelta(days=1), rotation_user=SYSTEM_BOT
+            ).rotation
+        self.assertEqual(len(six_nests), len(one_nest))
+        self.assertEqual(
+            sorted(
+                NstSpeciesListArchive.objects.filter(rotation_num=second).values_list(
+                    "species_txt", flat=True
+                )
+            ),
+            ["Magikarp"] + ["Squirtle"] * 5,
+        )
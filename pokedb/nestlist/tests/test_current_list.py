@@ -0,0 +1,181 @@
+from datetime import timedelta
+from nestlist.caching import forget_all_memos
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test.utils import CaptureQueriesContext
+from nestlist.current_list import current_nest_rows, build_if_missing
+from nestlist.models import (
+    add_a_report,
+    add_reports_bulk,
+    new_rotation,
+    get_local_snapshot_for_rotation,
+    collect_empty_nests,
+    NstCurrentNest,
+    NstLocation,
+    NstRawRpt,
+    NstSpeciesListArchive,
+)
+from nestlist.tests.sample_data import (
+    MemoTestCase,
+    SYSTEM_BOT,
+    make_tiny_dex,
+    make_tiny_city,
+)
+
+
+class CurrentNestListTests(MemoTestCase):
+    """The snapshot table should always agree with the NSLA for the rotations it covers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.rotation = cls.town["rotation"]
+        cls.day = cls.rotation.date + timedelta(days=1)
+        cls.report("alice", "Alpha", "Bulbasaur")
+
+    def tearDown(self):
+        forget_all_memos()  # some tests move nests around, then roll back
+
+    @classmethod
+    def report(cls, name: str, nest: str, species: str):
+        return add_a_report(
+            name=name,
+            nest=nest,
+            species=species,
+            timestamp=cls.day,
+            bot_id=2,
+            server="test",
+        )
+
+    def row(self, nest: NstLocation) -> NstCurrentNest:
+        return NstCurrentNest.objects.get(rotation_num=self.rotation, nestid=nest)
+
+    def test_built_on_first_read(self):
+        self.assertFalse(NstCurrentNest.objects.exists())
+        current_nest_rows(self.rotation)
+        alpha: NstCurrentNest = self.row(self.town["nests"][0])
+        self.assertEqual(alpha.species_txt, "Bulbasaur")
+        self.assertEqual(alpha.city, self.town["our_town"])
+        self.assertEqual(alpha.neighborhood_name, "Right Here")
+        self.assertIn("Bulbasaur", alpha.last_report)
+        self.assertIsNone(self.row(self.town["nests"][1]).nsla)
+        # old rotations aren't built
+        self.assertIsNone(current_nest_rows(self.town["old_rotation"]))
+
+    def test_same_as_nsla(self):
+        self.report("bob", "Gamma", "Charmander")
+        for scope, place, nests in [
+            (
+                "city",
+                self.town["our_town"],
+                {"neighborhood__major_city": self.town["our_town"]},
+            ),
+            ("neighborhood", self.town["here"], {"neighborhood": self.town["here"]}),
+        ]:
+            nests = NstLocation.objects.filter(**nests)
+            reported = set(
+                NstSpeciesListArchive.objects.filter(
+                    rotation_num=self.rotation, nestid__in=nests
+                ).values_list("nestid", flat=True)
+            )
+            listed = get_local_snapshot_for_rotation(self.rotation, place.pk, scope)
+            self.assertEqual(set(listed.values_list("nestid", flat=True)), reported)
+            self.assertEqual(
+                set(collect_empty_nests(self.rotation, place.pk, scope)),
+                set(nests.exclude(pk__in=reported)),
+            )
+            self.assertIsNone(
+                get_local_snapshot_for_rotation(
+                    self.town["old_rotation"], place.pk, scope
+                )
+            )
+
+    def test_reports_update_rows(self):
+        current_nest_rows(self.rotation)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report("bob", "Beta", "Charmander")
+        self.assertEqual(self.row(self.town["nests"][1]).species_txt, "Charmander")
+        with self.captureOnCommitCallbacks(execute=True):
+            add_reports_bulk(
+                [
+                    {
+                        "name": "carol",
+                        "nest": "Gamma",
+                        "species": "Bulbasaur",
+                        "timestamp": self.day,
+                        "bot_id": 2,
+                        "server": "test",
+                    }
+                ]
+            )
+        gamma: NstCurrentNest = self.row(self.town["nests"][2])
+        self.assertEqual(gamma.species_txt, "Bulbasaur")
+        self.assertIsNotNone(gamma.nsla)
+
+    def test_moved_nsla_updates_both_rows(self):
+        current_nest_rows(self.rotation)
+        beta, gamma = self.town["nests"][1], self.town["nests"][2]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report("bob", "Beta", "Charmander")
+        nsla = NstSpeciesListArchive.objects.get(
+            rotation_num=self.rotation, nestid=beta
+        )
+        nsla.nestid = gamma  # it was reported at the wrong nest
+        with self.captureOnCommitCallbacks(execute=True):
+            nsla.save()
+        self.assertIsNone(self.row(beta).nsla)
+        self.assertEqual(self.row(gamma).species_txt, "Charmander")
+
+    def test_nest_edits_update_rows(self):
+        current_nest_rows(self.rotation)
+        beta: NstLocation = self.town["nests"][1]
+        beta.official_name = "Beta Gardens"
+        beta.neighborhood = self.town["next_door"]
+        with self.captureOnCommitCallbacks(execute=True):
+            beta.save()
+        row: NstCurrentNest = self.row(beta)
+        self.assertEqual(row.nest_name, "Beta Gardens")
+        self.assertEqual(row.neighborhood_name, "Next Door")
+
+    def test_one_rebuild_per_report(self):
+        current_nest_rows(self.rotation)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report("bob", "Beta", "Charmander")
+        with self.captureOnCommitCallbacks() as callbacks:
+            # overwrites the NSLA row & adds an NstRawRpt row
+            self.assertEqual(self.report("carol", "Beta", "Squirtle").status, 7)
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        deletes = [q for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(self.row(self.town["nests"][1]).species_txt, "Squirtle")
+
+    def test_report_signal_needs_no_query(self):
+        report: NstRawRpt = NstRawRpt.objects.get(user_name="alice")
+        with self.captureOnCommitCallbacks(), self.assertNumQueries(0):
+            post_save.send(NstRawRpt, instance=report, created=False)
+
+    def test_first_read_builds_once(self):
+        current_nest_rows(self.rotation)
+        count: int = NstCurrentNest.objects.count()
+        build_if_missing(self.rotation)  # another request that saw no snapshot
+        self.assertEqual(NstCurrentNest.objects.count(), count)
+
+    def test_new_rotation(self):
+        current_nest_rows(self.rotation)
+        status = new_rotation(
+            self.rotation.date + timedelta(days=14), rotation_user=SYSTEM_BOT
+        )
+        lake: NstCurrentNest = self.row(self.town["nests"][4])
+        self.assertEqual(
+            NstCurrentNest.objects.get(
+                rotation_num=status.rotation, nestid=self.town["nests"][4]
+            ).species_txt,
+            "Magikarp",
+        )
+        self.assertIsNotNone(lake)  # the previous rotation's snapshot stays
+        self.assertFalse(
+            NstCurrentNest.objects.filter(rotation_num__lt=self.rotation.pk).exists()
+        )
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+import os
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+from click.testing import CliRunner
+from nestlist.models import add_a_report
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+from nestlist.tools import export
+
+
+class ExportTests(MemoTestCase):
+    """Every active city in every format, with nobody at the keyboard"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.rotation = cls.town["rotation"]
+        for nest, species in [("Alpha", "Bulbasaur"), ("Gamma", "Charmander")]:
+            add_a_report(
+                name="alice",
+                nest=nest,
+                species=species,
+                timestamp=cls.rotation.date + timedelta(days=1),
+                bot_id=2,
+                server="test",
+            )
+        cls.cities = [cls.town["elsewhere"], cls.town["our_town"]]
+
+    def files(self, workers: int = 1) -> dict:
+        results = export.export(
+            self.rotation, self.cities, export.FORMATS, "today", workers
+        )
+        self.assertEqual([r.error for r in results], [None, None])
+        return {r.folder: r.files for r in results}
+
+    def test_formats(self):
+        files = self.files()
+        self.assertEqual(set(files), {"somewhere-else", "our-town"})
+        town = files["our-town"]
+        self.assertEqual(
+            set(town),
+            {"facebook.txt", "discord-1.txt", "nests.json", "nests.csv", "index.html"},
+        )
+        self.assertIn("Gamma Park/The Gamma: Charmander*", town["facebook.txt"])
+        listed = json.loads(town["nests.json"])
+        self.assertEqual(listed["rotation"], 2)
+        self.assertEqual(
+            [(n["area"], n["nest"], n["species"]) for n in listed["nests"]],
+            [
+                ("Border Lands", "Gamma Park", "Charmander"),
+                ("Right Here", "Alpha Park", "Bulbasaur"),
+            ],
+        )
+        self.assertEqual([n["nest"] for n in listed["empty"]], ["Lake Epsilon", "Beta"])
+        rows = list(csv.DictReader(io.StringIO(town["nests.csv"])))
+        self.assertEqual(rows[0]["alt_names"], "The Gamma")
+        self.assertIn("<h2>Border Lands</h2>", town["index.html"])
+        self.assertEqual(json.loads(files["somewhere-else"]["nests.json"])["nests"], [])
+
+    def test_same_in_a_pool(self):
+        self.assertEqual(self.files(workers=2), self.files())
+
+    def test_command(self):
+        with TemporaryDirectory() as tmp:
+            result = CliRunner().invoke(
+                export.main,
+                ["-d", str(self.rotation.date.date() + timedelta(days=1))]
+                + ["-o", tmp, "-w", "1", "-f", "json", "-f", "discord"],
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(tmp, "our-town"))),
+                ["discord-1.txt", "nests.json"],
+            )
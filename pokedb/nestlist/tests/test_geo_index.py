@@ -0,0 +1,129 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+from nestlist.caching import forget_all_memos
+from nestlist.forms import NestReportForm
+from nestlist.geo_index import NestGeoIndex, nest_geo_index, distance_m
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_city
+
+# Columbus, OH; 0.001° of latitude is about 111 m
+LAT, LON = 39.96, -83.0
+
+
+def point(pk: int, lat, lon, city: int = 1, permanent=None) -> dict:
+    return {
+        "nestID": pk,
+        "lat": lat,
+        "lon": lon,
+        "permanent_species": permanent,
+        "neighborhood__major_city": city,
+    }
+
+
+class GeoIndexTests(SimpleTestCase):
+    """The grid should find exactly the nests a scan of every distance finds"""
+
+    def test_distance(self):
+        self.assertAlmostEqual(distance_m(LAT, LON, LAT + 0.001, LON), 111.2, 1)
+        self.assertAlmostEqual(distance_m(0, 0, 0, 180), 20_015_114, delta=1)
+
+    def test_same_as_scan(self):
+        points = [
+            point(100 * i + j, LAT + i * 0.004, LON + j * 0.006, city=1 + (i + j) % 2)
+            for i in range(-5, 6)
+            for j in range(-5, 6)
+        ]
+        index = NestGeoIndex(points)
+        for lat, lon, within, city in [
+            (LAT, LON, 500, None),
+            (LAT + 0.0123, LON - 0.0071, 1500, None),
+            (LAT, LON, 2500, 2),
+            (LAT, LON, 100_000, None),
+            (LAT + 1, LON, 500, None),
+        ]:
+            with self.subTest(lat=lat, lon=lon, within=within, city=city):
+                scan = sorted(
+                    (distance_m(lat, lon, p["lat"], p["lon"]), p["nestID"])
+                    for p in points
+                    if distance_m(lat, lon, p["lat"], p["lon"]) <= within
+                    and (not city or p["neighborhood__major_city"] == city)
+                )
+                found = index.nearest(lat, lon, within, city)
+                self.assertEqual([n.nest_id for n in found], [pk for _, pk in scan])
+
+    def test_filters(self):
+        index = NestGeoIndex(
+            [
+                point(1, LAT, LON),
+                point(2, LAT + 0.001, LON, permanent="Magikarp"),
+                point(3, LAT + 0.002, LON),
+                point(4, None, LON),
+                point(5, 123, LON),
+            ]
+        )
+        self.assertEqual([n.nest_id for n in index.nearest(LAT, LON)], [1, 2, 3])
+        self.assertEqual(
+            [n.nest_id for n in index.nearest(LAT, LON, exclude_permanent=True)],
+            [1, 3],
+        )
+        self.assertEqual(len(index.nearest(LAT, LON, limit=1)), 1)
+        self.assertEqual(index.nearest(LAT, LON, limit=0), [])
+        with self.assertRaises(ValueError):
+            index.nearest(91, LON)
+
+
+class NearbyNestTests(MemoTestCase):
+    """Reports & the API should resolve nests by GPS"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.town = make_tiny_city()
+        alpha, beta, gamma, delta, epsilon = cls.town["nests"]
+        for nest, lat in [(alpha, 0), (beta, 0.001), (epsilon, 0.0001), (delta, 0)]:
+            nest.lat, nest.lon = LAT + lat, LON
+            nest.save()
+        gamma.lat, gamma.lon = LAT + 0.1, LON
+        gamma.save()
+
+    def tearDown(self):
+        forget_all_memos()
+
+    def form(self, **kwargs) -> NestReportForm:
+        data = {"your_name": "me", "species": "", "timestamp": "h-1", **kwargs}
+        form = NestReportForm(data, city=self.town["our_town"])
+        form.is_valid()
+        return form
+
+    def test_report_form(self):
+        alpha, beta = self.town["nests"][:2]
+        form = self.form(lat=LAT, lon=LON)
+        self.assertNotIn("park", form.errors)
+        self.assertEqual(form.cleaned_data["nest"], alpha)
+        self.assertEqual(form.cleaned_data["scope"], "city")
+        # the name picks among the nearby nests
+        form = self.form(lat=LAT, lon=LON, park="beta")
+        self.assertEqual(form.cleaned_data["nest"], beta)
+        # nothing nearby: fall back to the name
+        form = self.form(lat=LAT + 0.05, lon=LON, park="gamma")
+        self.assertEqual(form.cleaned_data["nest"], self.town["nests"][2])
+        self.assertNotIn("park", form.errors)
+        self.assertIn("park", self.form(lat=LAT + 0.05, lon=LON).errors)
+        self.assertIn("park", self.form().errors)
+
+    def test_rebuilt_after_save(self):
+        gamma = self.town["nests"][2]
+        self.assertEqual(nest_geo_index().nearest(LAT + 0.1, LON)[0].nest_id, gamma.pk)
+        gamma.lat = None
+        with self.captureOnCommitCallbacks(execute=True):
+            gamma.save()
+        self.assertEqual(nest_geo_index().nearest(LAT + 0.1, LON), [])
+
+    def test_api(self):
+        url: str = reverse("nestlist:nearby_nests", args=[self.town["our_town"].pk])
+        response = self.client.get(url, {"lat": LAT, "lon": LON, "within": 200})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["name"], row["meters"]) for row in response.json()],
+            [("Alpha Park", 0), ("Lake Epsilon", 11), ("Beta", 111)],
+        )
+        for bad in [{}, {"lat": "x", "lon": LON}, {"lat": 100, "lon": LON}]:
+            self.assertEqual(self.client.get(url, bad).status_code, 400)
@@ -0,0 +1,95 @@
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from django.core.management import call_command
+from nestlist.models import NstRotationDate, NstSpeciesListArchive
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+from speciesinfo.models import Pokemon, Biome, BodyPlan
+
+
+class LoadStatsSourceTests(MemoTestCase):
+    """The seed loader should map each file onto its table and be safe to run twice"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        alpha: int = self.town["nests"][0].pk
+        self.write(
+            "rotation_dates.csv",
+            "num,date,special_note\n0,Never,\n10,2019-01-09,Test\n",
+        )
+        self.write(
+            "species_list.csv",
+            "rotation_num,nestid,species_txt,species_no,confirmation\n"
+            f"10,{alpha},Bulbasaur,1,1\n"
+            f"10,9999,Pikachu,25,\n"  # not a nest here
+            f"10,{self.town['nests'][1].pk},Sparkly Thing?,,\n",
+        )
+        self.write(
+            "HW-metric.tsv",
+            "#\tpok\theight-m\tweight-kg\tform\tdup?\r\n"
+            "1\tBulbasaur\t0.7\t6.9\t\tFALSE\r\n"
+            "151\tMew\t0.4\t4\t\tFALSE\r\n",
+        )
+        self.write(
+            "Biomes/forest.tsv",
+            '"Ndex "\t"MS "\t"Pokémon "\t"Type1"\t" Type2"\n'
+            '"#001 "\t"1"\t"Bulbasaur "\t"Grass"\t"Poison"\n',
+        )
+        self.write(
+            "Bodies/08 quad.tsv",
+            "Ndex\tMS\tPokémon\tType\tq\n#004\t004\tCharmander\tFire\n",
+        )
+        self.write(
+            "Bodies/14 bug.tsv",
+            "Ndex\tMS\tPokémon\tType\tt\n#010\t010\tCaterpie\tBug\n",
+        )
+
+    def write(self, name: str, text: str) -> None:
+        path: str = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def load(self) -> str:
+        out = StringIO()
+        call_command("load_stats_source", source=self.tmp.name, stdout=out)
+        return out.getvalue()
+
+    def test_load(self):
+        report: str = self.load()
+        self.assertIn("rotations: 1 loaded, 1 skipped", report)
+        self.assertIn("nests: 2 loaded, 1 skipped", report)
+        self.assertEqual(NstRotationDate.objects.get(num=10).special_note, "Test")
+        alpha = NstSpeciesListArchive.objects.get(
+            rotation_num=10, nestid=self.town["nests"][0]
+        )
+        self.assertEqual(alpha.species_name_fk_id, "Bulbasaur")
+        self.assertTrue(alpha.confirmation)
+        self.assertIsNone(
+            NstSpeciesListArchive.objects.get(
+                rotation_num=10, nestid=self.town["nests"][1]
+            ).species_name_fk
+        )
+        bulbasaur: Pokemon = Pokemon.objects.get(pk="Bulbasaur")
+        self.assertEqual((bulbasaur.ht_m, bulbasaur.wt_kg), (0.7, 6.9))
+        self.assertEqual(bulbasaur.habitat, Biome.objects.get(name="forest"))
+        self.assertEqual(
+            Pokemon.objects.get(pk="Charmander").body_plan.alt_name, "quad"
+        )
+        self.assertTrue(BodyPlan.objects.filter(pk=14, alt_name="bug").exists())
+
+    def test_load_twice(self):
+        self.load()
+        report: str = self.load()
+        self.assertIn("rotations: 0 loaded, 2 skipped", report)
+        self.assertIn("nests: 0 loaded, 3 skipped", report)
+        self.assertEqual(
+            NstSpeciesListArchive.objects.filter(rotation_num=10).count(), 2
+        )
+        self.assertEqual(Biome.objects.filter(name="forest").count(), 1)
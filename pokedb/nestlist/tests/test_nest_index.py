@@ -0,0 +1,74 @@
+from unittest import mock
+from django.db.models import Q
+from nestlist.models import query_nests, NstLocation, NstAltName
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_city
+
+
+class NestNameIndexTests(MemoTestCase):
+    """query_nests should find the same nests as the old icontains query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.town = make_tiny_city()
+
+    def orm_search(self, search) -> set:
+        return set(
+            NstLocation.objects.filter(
+                Q(official_name__icontains=search)
+                | Q(short_name__icontains=search)
+                | Q(alternate_name__name__icontains=search)
+                | Q(nestID=search if str(search).isdigit() else None)
+            ).values_list("nestID", flat=True)
+        )
+
+    def test_same_as_orm(self):
+        self.check_searches()
+
+    def test_too_many_to_list(self):
+        with mock.patch("nestlist.place_graph.SMALL_SET", 1):
+            self.check_searches()
+            self.assertEqual(
+                query_nests(
+                    "park", restrict_city=self.town["our_town"], exclude_permanent=False
+                ).count(),
+                4,  # Delta Park shares a region with Our Town
+            )
+
+    def check_searches(self):
+        gamma: int = self.town["nests"][2].pk
+        for search in [
+            "park",
+            "PARK",
+            "Beta",
+            "gam",
+            "the gamma",
+            "secret",
+            "a",
+            "",
+            gamma,
+        ]:
+            self.assertEqual(
+                set(
+                    query_nests(search, exclude_permanent=False).values_list(
+                        "nestID", flat=True
+                    )
+                ),
+                self.orm_search(search),
+                search,
+            )
+
+    def test_city_scope(self):
+        self.assertEqual(
+            query_nests("park", self.town["elsewhere"]).get(), self.town["nests"][3]
+        )
+        self.assertEqual(
+            query_nests("park", self.town["our_town"].pk, "city").count(), 3
+        )
+
+    def test_rebuilt_after_save(self):
+        self.assertFalse(query_nests("zeta").exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            NstAltName.objects.create(
+                name="Zeta Fields", main_entry=self.town["nests"][0]
+            )
+        self.assertEqual(query_nests("zeta").get(), self.town["nests"][0])
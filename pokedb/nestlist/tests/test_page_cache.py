@@ -0,0 +1,101 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from nestlist.models import add_a_report, add_reports_bulk
+from nestlist.page_cache import forget_all_pages, page_cache_stats
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+
+
+class PageCacheTests(MemoTestCase):
+    """Past rotations' nest lists come from the page cache until a report changes them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.old_day = cls.town["old_rotation"].date + timedelta(days=1)
+        add_a_report(
+            name="alice",
+            nest="Alpha",
+            species="Bulbasaur",
+            timestamp=cls.old_day,
+            bot_id=2,
+            server="test",
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        forget_all_pages()
+
+    def setUp(self):
+        forget_all_pages()  # the cache outlives each test's transaction
+        self.old_url = f"/city/{self.town['our_town'].pk}/rotation/1/"
+
+    def get(self, url: str) -> str:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def counts(self):
+        stats = page_cache_stats()
+        return stats["hits"], stats["misses"]
+
+    def test_old_rotation_is_cached(self):
+        hits, misses = self.counts()
+        first: str = self.get(self.old_url)
+        self.assertIn("Bulbasaur", first)
+        self.assertEqual(self.counts(), (hits, misses + 1))
+        self.assertEqual(self.get(self.old_url), first)
+        self.assertEqual(self.counts(), (hits + 1, misses + 1))
+
+    def test_species_filter_has_its_own_page(self):
+        self.get(self.old_url)
+        hits, misses = self.counts()
+        self.get(self.old_url + "?species=Charmander")
+        self.assertEqual(self.counts(), (hits, misses + 1))
+
+    def test_current_rotation_is_not_cached(self):
+        hits, misses = self.counts()
+        self.get(f"/city/{self.town['our_town'].pk}/")
+        self.get(f"/city/{self.town['our_town'].pk}/")
+        self.assertEqual(self.counts(), (hits, misses))
+
+    def test_report_invalidates(self):
+        self.assertNotIn("Charmander", self.get(self.old_url))
+        with self.captureOnCommitCallbacks(execute=True):
+            add_a_report(
+                name="bob",
+                nest="Beta",
+                species="Charmander",
+                timestamp=self.old_day,
+                bot_id=2,
+                server="test",
+            )
+            # not committed yet, so the stamp (and the cached page) stay the same
+            self.assertNotIn("Charmander", self.get(self.old_url))
+        self.assertIn("Charmander", self.get(self.old_url))
+
+    def test_bulk_report_invalidates(self):
+        self.assertNotIn("Charmander", self.get(self.old_url))
+        with self.captureOnCommitCallbacks(execute=True):
+            add_reports_bulk(
+                [
+                    {
+                        "name": "bob",
+                        "nest": "Gamma",
+                        "species": "Charmander",
+                        "timestamp": self.old_day,
+                        "bot_id": 2,
+                        "server": "test",
+                    }
+                ]
+            )
+            self.assertNotIn("Charmander", self.get(self.old_url))
+        self.assertIn("Charmander", self.get(self.old_url))
+
+    def test_stats_are_staff_only(self):
+        url: str = "/city/page-cache/"
+        self.assertEqual(self.client.get(url).status_code, 403)
+        staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).json(), page_cache_stats())
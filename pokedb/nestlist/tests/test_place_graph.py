@@ -0,0 +1,111 @@
+from django.db.models import Q
+from nestlist.caching import forget_all_memos
+from nestlist.models import (
+    which_regions,
+    which_cities,
+    which_ps,
+    which_neighborhoods,
+    which_parks,
+    query_nests,
+    NstCombinedRegion,
+    NstMetropolisMajor,
+    NstParkSystem,
+    NstNeighborhood,
+    NstLocation,
+)
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_city
+
+
+NEST_LOOKUP = {
+    NstMetropolisMajor: "neighborhood__major_city",
+    NstNeighborhood: "neighborhood",
+    NstCombinedRegion: "neighborhood__region",
+    NstParkSystem: "park_system",
+}
+
+
+def pks(qs) -> set:
+    return set(qs.values_list("pk", flat=True))
+
+
+class PlaceGraphTests(MemoTestCase):
+    """The which_* helpers should agree with the old joins through the geography tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.town = make_tiny_city()
+        cls.parks = NstParkSystem.objects.create(name="Parks")
+        for nest in [cls.town["nests"][0], cls.town["nests"][3]]:
+            nest.park_system = cls.parks
+            nest.save()
+
+    def tearDown(self):
+        forget_all_memos()  # some tests move things around, then roll back
+
+    def places(self) -> list:
+        t = self.town
+        return [t["our_town"], t["elsewhere"], t["here"], t["next_door"], t["border"]]
+
+    def test_regions(self):
+        t = self.town
+        self.assertEqual(pks(which_regions(t["our_town"])), {t["border"].pk})
+        self.assertEqual(pks(which_regions(t["here"])), set())
+        self.assertEqual(pks(which_regions(t["nests"][2])), {t["border"].pk})
+        self.assertEqual(pks(which_regions(self.parks)), {t["border"].pk})
+        self.assertEqual(pks(which_regions(None)), set())
+
+    def test_same_as_joins(self):
+        for place in self.places() + [self.parks]:
+            with self.subTest(place=place):
+                self.assertEqual(
+                    pks(which_cities(place)),
+                    pks(
+                        NstMetropolisMajor.objects.filter(
+                            Q(nstneighborhood__region=place)
+                            if isinstance(place, NstCombinedRegion)
+                            else Q(nstneighborhood__nstlocation__park_system=place)
+                            if isinstance(place, NstParkSystem)
+                            else Q(pk=place.ct().pk)
+                        )
+                    ),
+                )
+                self.assertEqual(
+                    pks(which_parks(place)),
+                    pks(
+                        NstLocation.objects.filter(**{NEST_LOOKUP[type(place)]: place})
+                    ),
+                )
+        self.assertEqual(
+            pks(which_neighborhoods(self.parks)),
+            pks(NstNeighborhood.objects.filter(nstlocation__park_system=self.parks)),
+        )
+        self.assertEqual(
+            pks(which_ps(self.town["border"])),
+            pks(
+                NstParkSystem.objects.filter(
+                    nstlocation__neighborhood__region=self.town["border"]
+                )
+            ),
+        )
+
+    def test_restrict_city(self):
+        t = self.town
+        # Delta Park is in Somewhere Else, which shares the Border Lands with Our Town
+        self.assertIn(
+            t["nests"][3], query_nests("Delta", restrict_city=t["our_town"]),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            t["far_away"].region.remove(t["border"])
+        self.assertNotIn(
+            t["nests"][3], query_nests("Delta", restrict_city=t["our_town"]),
+        )
+        self.assertIn(t["nests"][3], query_nests("Delta", restrict_city=t["elsewhere"]))
+
+    def test_rebuilt_after_save(self):
+        t = self.town
+        moved: NstLocation = t["nests"][1]
+        moved.neighborhood = t["far_away"]
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+        self.assertIn(moved, which_parks(t["elsewhere"]))
+        self.assertNotIn(moved, which_parks(t["here"]))
@@ -0,0 +1,58 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from nestlist.models import NstAdminEmail, NstRawRpt, NstSpeciesListArchive
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+
+
+class WebReportTests(MemoTestCase):
+    """The report form resolves everything once and add_a_report takes it as-is"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dex = make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.town["our_town"].airtable_bot = NstAdminEmail.objects.get(pk=3)
+        cls.town["our_town"].save()
+
+    def post(self, **kwargs):
+        data = {"your_name": "Me", "timestamp": "h-1", **kwargs}
+        return self.client.post(
+            reverse("nestlist:report_nest", args=[self.town["our_town"].pk]), data
+        )
+
+    def test_report(self):
+        self.post(park="alpha", species="4")  # build the in-memory indexes
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(park="beta", species="bulbasaur")
+        self.assertEqual(response.status_code, 200)
+        sql = [q["sql"] for q in ctx.captured_queries]
+        # the city with its bot, then the nest; the species & rotation come from memory
+        self.assertIn('JOIN "nst_admin_email"', sql[0])
+        self.assertFalse(
+            [q for q in sql[1:] if "pokémon" in q or "nst_admin_email" in q]
+        )
+        self.assertEqual(len([q for q in sql if 'FROM "nst_location"' in q]), 1)
+        row = NstRawRpt.objects.get(raw_park_info="beta")
+        self.assertEqual(row.raw_species_num, "bulbasaur")
+        self.assertEqual(row.parklink, self.town["nests"][1])
+        self.assertEqual(row.attempted_dex_num, self.dex["Bulbasaur"])
+        self.assertEqual(row.calculated_rotation, self.town["rotation"])
+        self.assertEqual(row.bot_id, 3)
+
+    def test_bad_reports(self):
+        for kwargs, error in [
+            ({"park": "park", "species": "Bulbasaur"}, "matched 3 nests"),
+            ({"park": "nowhere", "species": "Bulbasaur"}, "did not match any nests"),
+            ({"park": "alpha", "species": "Mewtwo"}, "did not match any pokémon"),
+            (
+                {"park": "alpha", "species": "Bulbasaur", "timestamp": "1999-01-01"},
+                "No nest rotation",
+            ),
+        ]:
+            with self.subTest(**kwargs):
+                self.assertContains(self.post(**kwargs), error)
+        self.assertFalse(NstSpeciesListArchive.objects.filter(species_txt="Mewtwo"))
+        self.assertFalse(
+            NstRawRpt.objects.filter(raw_park_info__in=["park", "nowhere"])
+        )
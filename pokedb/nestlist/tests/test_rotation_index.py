@@ -0,0 +1,48 @@
+from datetime import timedelta
+from django.db import transaction, DatabaseError
+from nestlist.models import get_rotation, NstRotationDate
+from nestlist.rotation_index import rotation_table
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_city
+
+
+class RotationTableTests(MemoTestCase):
+    """get_rotation should answer from memory once the rotation table is loaded"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.town = make_tiny_city()
+
+    def test_lookups(self):
+        old, current = self.town["old_rotation"], self.town["rotation"]
+        get_rotation("t")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_rotation("t"), current)
+            self.assertEqual(get_rotation(1), old)
+            self.assertEqual(get_rotation("99"), current)  # junk numbers mean today
+            self.assertEqual(get_rotation(current.date), current)
+            self.assertEqual(get_rotation(current.date - timedelta(seconds=1)), old)
+            with self.assertRaises(NstRotationDate.DoesNotExist):
+                get_rotation(old.date - timedelta(days=1))
+
+    def test_new_rotation_seen(self):
+        self.assertEqual(get_rotation("t"), self.town["rotation"])
+        with self.captureOnCommitCallbacks(execute=True):
+            newest = NstRotationDate.objects.create(
+                num=3, date=self.town["rotation"].date + timedelta(days=1)
+            )
+        self.assertEqual(get_rotation("t"), newest)
+        with self.captureOnCommitCallbacks(execute=True):
+            newest.delete()
+        self.assertEqual(get_rotation("t"), self.town["rotation"])
+
+    def test_rolled_back_save_is_ignored(self):
+        table = rotation_table()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(DatabaseError):
+                with transaction.atomic():
+                    NstRotationDate.objects.create(
+                        num=3, date=self.town["rotation"].date + timedelta(days=1)
+                    )
+                    raise DatabaseError("rolled back")
+        self.assertEqual(callbacks, [])
+        self.assertIs(rotation_table(), table)
@@ -0,0 +1,85 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+from nestlist.caching import forget_all_memos
+from nestlist.models import NstAltName
+from nestlist.search import word_trigrams, similarity, search_nests
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_city
+
+
+class TrigramTests(SimpleTestCase):
+    """The Python scores should be the ones pg_trgm gives"""
+
+    def test_trigrams(self):
+        self.assertEqual(word_trigrams("Word"), {"  w", " wo", "wor", "ord", "rd "})
+        self.assertEqual(word_trigrams("a-b"), {"  a", " a ", "  b", " b "})
+        self.assertEqual(word_trigrams("!!"), set())
+
+    def test_similarity(self):
+        # the example in the pg_trgm docs
+        self.assertAlmostEqual(similarity("word", "two words"), 4 / 11)
+        self.assertEqual(similarity("Alpha Park", "alpha park"), 1.0)
+        self.assertEqual(similarity("", "Alpha Park"), 0.0)
+
+
+class NestSearchTests(MemoTestCase):
+    """search_nests should forgive typos and still find what icontains found"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.town = make_tiny_city()
+
+    def tearDown(self):
+        forget_all_memos()
+
+    def names(self, search, city=None, **kwargs) -> list:
+        return [n.official_name for n, _ in search_nests(search, city, **kwargs)]
+
+    def test_typos(self):
+        town = self.town["our_town"]
+        self.assertEqual(self.names("alpah park", town)[0], "Alpha Park")
+        self.assertEqual(self.names("Lake Epsilom", town), ["Lake Epsilon"])
+        self.assertEqual(self.names("the gama", town)[0], "Gamma Park")
+        self.assertEqual(self.names("zzz", town), [])
+
+    def test_ranked(self):
+        found = search_nests("Beta Park", self.town["our_town"])
+        self.assertEqual(found[0][0].official_name, "Beta Park")
+        self.assertEqual(found[0][1], 1.0)
+        self.assertEqual([s for _, s in found], sorted([s for _, s in found])[::-1])
+        self.assertEqual(len(search_nests("park", limit=2)), 2)
+
+    def test_substrings_kept(self):
+        # too short to be similar to anything, but still contained in a name
+        self.assertEqual(self.names("secret"), ["Gamma Park"])
+        self.assertEqual(
+            set(self.names("park", self.town["our_town"])),
+            {"Alpha Park", "Beta Park", "Gamma Park"},
+        )
+        self.assertEqual(self.names("delta", self.town["elsewhere"]), ["Delta Park"])
+        self.assertEqual(self.names("delta", self.town["our_town"]), [])
+
+    def test_exact_id_wins(self):
+        beta = self.town["nests"][1]
+        self.assertEqual(search_nests(str(beta.pk)), [(beta, 1.0)])
+        self.assertEqual(search_nests(beta.pk, self.town["our_town"]), [(beta, 1.0)])
+        self.assertEqual(search_nests(beta.pk, self.town["elsewhere"]), [])
+
+    def test_rebuilt_after_save(self):
+        self.assertEqual(self.names("Omega Grove"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            NstAltName.objects.create(
+                name="Omega Grove", main_entry=self.town["nests"][0]
+            )
+        self.assertEqual(self.names("omega grov"), ["Alpha Park"])
+
+    def test_api(self):
+        url: str = reverse("nestlist:nest_search", args=[self.town["our_town"].pk])
+        response = self.client.get(url, {"q": "beat park", "limit": 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["name"] for row in response.json()], ["Beta"],
+        )
+        for limit in [0, -1]:  # at least one, not a slice from the end
+            response = self.client.get(url, {"q": "park", "limit": limit})
+            self.assertEqual(len(response.json()), 1)
+        self.assertEqual(self.client.get(url).json(), [])
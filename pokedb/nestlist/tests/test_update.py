@@ -0,0 +1,118 @@
+from datetime import timedelta
+from typing import List, Tuple
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from nestlist.caching import forget_all_memos
+from nestlist.models import add_a_report, NstAltName, NstLocation
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+from nestlist.tools import update
+from speciesinfo.models import PokeCategory
+
+
+class UpdateExportTests(MemoTestCase):
+    """The Facebook & Discord posts shouldn't need a query per nest"""
+
+    @classmethod
+    def setUpTestData(cls):
+        dex = make_tiny_dex()
+        dex["Charmander"].category = PokeCategory.objects.create(pk=50, name="Starter")
+        dex["Charmander"].save()
+        cls.town = make_tiny_city()
+        cls.rotation = cls.town["rotation"]
+        for nest, species in [
+            ("Alpha", "Bulbasaur"),
+            ("Gamma", "Charmander"),
+            ("Epsilon", "Magikarp"),
+        ]:
+            cls.report(nest, species)
+
+    def tearDown(self):
+        forget_all_memos()
+
+    @classmethod
+    def report(cls, nest: str, species: str):
+        add_a_report(
+            name="alice",
+            nest=nest,
+            species=species,
+            timestamp=cls.rotation.date + timedelta(days=1),
+            bot_id=2,
+            server="test",
+        )
+
+    def posts(self) -> Tuple[str, List[str]]:
+        nests, empties, species, raw = update.get_nests(
+            self.rotation, self.town["our_town"]
+        )
+        return (
+            update.FB_post(nests, "today", "then", mt=empties, slist=species, rotnum=2),
+            update.disc_posts(nests, "today", "then", rotnum=2, raw_nests=raw),
+        )
+
+    def test_posts(self):
+        fb, disc = self.posts()
+        self.assertIn("Right Here", fb)
+        self.assertIn("Border Lands", fb)  # Next Door is part of it
+        self.assertNotIn("{~(Next Door)~}", fb)
+        self.assertIn("Gamma Park/The Gamma: Charmander", fb)
+        self.assertNotIn("Secret Gamma", fb)
+        self.assertIn("• Right Here: Beta", fb)
+        self.assertIn(update.fish_icon + "Magikarp: Lake Epsilon", fb)
+        popular: str = disc[-1]
+        self.assertIn("Starters: _Gamma Park_", popular)
+        self.assertIn("Magikarp: _Lake Epsilon_", popular)
+        self.assertIn("Alpha Park: _Bulbasaur_", "".join(disc))
+
+    def test_constant_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts()  # builds the snapshot
+        self.posts()  # reloads the memo of built snapshots
+        with CaptureQueriesContext(connection) as few:
+            self.posts()
+        here = self.town["here"]
+        for name, species in [("Zeta", "Squirtle"), ("Eta", "Pikachu")]:
+            with self.captureOnCommitCallbacks(execute=True):
+                nest = NstLocation.objects.create(official_name=name, neighborhood=here)
+                NstAltName.objects.create(name=f"{name} Field", main_entry=nest)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.report(name, species)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report("Beta", "Abra")
+        with CaptureQueriesContext(connection) as more:
+            fb, _ = self.posts()
+        self.assertIn("Zeta/Zeta Field: Squirtle", fb)
+        self.assertEqual(len(more), len(few))
+
+
+class DiscordPackingTests(SimpleTestCase):
+    """Posts should be as few as fit, as even as they can be, and never too long"""
+
+    def check(self, blocks: List[str], limit: int = 2000) -> List[str]:
+        posts: List[str] = update.pack_posts(blocks, limit)
+        self.assertEqual("".join(posts), "".join(blocks))
+        self.assertTrue(all(len(p) <= limit for p in posts))
+        self.assertEqual(
+            len(posts), update.posts_needed([len(b) for b in blocks], limit)
+        )
+        return posts
+
+    def test_even(self):
+        blocks: List[str] = ["a" * 900] * 4 + ["b" * 300]
+        self.assertEqual([len(p) for p in self.check(blocks)], [1800, 1800, 300])
+        blocks = ["c" * 100] * 25
+        self.assertEqual([len(p) for p in self.check(blocks)], [1300, 1200])
+        self.assertEqual(update.pack_posts([]), [])
+
+    def test_split_big_area(self):
+        header: str = "__**Big Area**__\n"
+        lines: List[str] = [f"Park {i:03}: __Pidgey__\n" for i in range(150)]
+        blocks: List[str] = update.split_block(header, lines)
+        self.assertGreater(len(blocks), 1)
+        self.assertTrue(all(len(b) <= 2000 for b in blocks))
+        self.assertTrue(blocks[1].startswith("__**Big Area**__ (cont.)\n"))
+        self.assertEqual("".join(b.split("\n", 1)[1] for b in blocks), "".join(lines))
+        self.check(blocks)
+        cut: List[str] = update.split_block(header, ["x" * 5000 + "\n"])
+        self.assertEqual("".join(b.split("\n", 1)[1] for b in cut), "x" * 5000 + "\n")
+        self.assertTrue(all(len(b) <= 2000 for b in cut))
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from nestlist.caching import forget_all_memos
+from nestlist.models import add_reports_bulk, NstLocation, NstParkSystem
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex, make_tiny_city
+from nestlist.utils import append_utc
+from nestlist.views import NestListView
+
+
+class NestListQueryTests(MemoTestCase):
+    """The nest list pages should take the same number of queries however many nests they show"""
+
+    QUERY_CEILING = 15
+
+    @classmethod
+    def setUpTestData(cls):
+        make_tiny_dex()
+        cls.town = make_tiny_city()
+        cls.town["nests"][0].park_system = NstParkSystem.objects.create(name="Parks")
+        cls.town["nests"][0].save()
+
+    def add_nests(self, count: int) -> None:
+        start: datetime = append_utc(datetime.utcnow()) - timedelta(days=1)
+        nests = [
+            NstLocation.objects.create(
+                official_name=f"Park #{len(self.reported) + n}",
+                neighborhood=self.town["here" if n % 2 else "next_door"],
+                park_system=self.town["nests"][0].park_system,
+            )
+            for n in range(count)
+        ]
+        self.reported += nests
+        add_reports_bulk(
+            {
+                "name": name,
+                "nest": nest.pk,
+                "species": "Bulbasaur",
+                "timestamp": start,
+                "bot_id": bot,
+                "server": "test",
+            }
+            for nest in nests
+            for name, bot in [("alice", 2), ("bob", 3)]
+        )
+
+    def query_counts(self, url: str):
+        self.reported = []
+        counts = []
+        for batch in [2, 10]:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.add_nests(batch)
+            forget_all_memos()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.get(url)  # builds the snapshot
+            self.client.get(url)  # warm up the in-memory indexes
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, self.reported[-1].official_name)
+            counts.append(len(queries))
+        return counts
+
+    def assertBounded(self, url: str) -> None:
+        small, big = self.query_counts(url)
+        self.assertEqual(small, big)
+        self.assertLessEqual(big, self.QUERY_CEILING)
+
+    def test_city(self):
+        self.assertBounded(f"/city/{self.town['our_town'].pk}/")
+
+    def test_neighborhood(self):
+        self.assertBounded(
+            f"/city/{self.town['our_town'].pk}/neighborhood/{self.town['here'].pk}/"
+        )
+
+    def test_region(self):
+        self.town["here"].region.add(self.town["border"])
+        self.assertBounded(f"/city/region/{self.town['border'].pk}/")
+
+    def test_park_system(self):
+        self.assertBounded(f"/city/park_system/{self.town['nests'][0].park_system.pk}/")
+
+    def test_species_history(self):
+        self.assertBounded(
+            f"/city/{self.town['our_town'].pk}/species-history/bulbasaur/"
+        )
+
+    def test_navigation_is_lazy(self):
+        view = NestListView()
+        view.setup(
+            RequestFactory().get("/"),
+            city_id=self.town["our_town"].pk,
+            scope="city",
+            pk_name="city_id",
+        )
+        view.object_list = view.get_queryset()
+        view.get_location()
+        with CaptureQueriesContext(connection) as queries:
+            context = view.get_context_data()
+            view.get_location()
+            view.get_rot8()
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(
+            {n.name for n in context["neighborhoods"]}, {"Right Here", "Next Door"}
+        )
+        self.assertIn(self.town["nests"][0], context["all_parks"])
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# coding=UTF-8
+# -*- coding: UTF-8 -*-
+# vim: set fileencoding=UTF-8 :
+
+"""
+Renders the nest list of every active city without asking anything, so cron can run it
+right after rotate.py
+
+    nestlist/tools/export.py [-d date] [-f json -f csv …] [-c city …] [-o out_dir] [-w 4]
+
+The nests of every city are loaded in one pass, then the cities are rendered into every
+format in a pool of processes (the renderers don't touch the database).  The files go to
+out_dir/<city>/ (facebook.txt, discord-1.txt…, nests.json, nests.csv, index.html),
+or to stdout with a header before each one if out_dir is "-".
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Iterable, Optional, Tuple
+
+import click
+
+if __name__ == "__main__":
+    # Setup environ
+    sys.path.append(os.getcwd())
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pokedb.settings")
+
+    # Setup django
+    import django
+
+    django.setup()
+
+# now you can import your ORM models
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils.text import slugify
+from nestlist.models import (
+    NstMetropolisMajor,
+    NstRotationDate,
+    NstSpeciesListArchive,
+    NstLocation,
+)
+from nestlist.tools import update
+from nestlist.utils import parse_date, str_int
+
+FORMATS: List[str] = ["facebook", "discord", "json", "csv", "html"]
+CSV_COLUMNS: List[str] = [
+    "area",
+    "neighborhood",
+    "nest",
+    "nest_id",
+    "alt_names",
+    "species",
+    "species_no",
+    "confirmed",
+    "private",
+    "notes",
+]
+
+
+class CityList(NamedTuple):
+    city: NstMetropolisMajor
+    rotation: NstRotationDate
+    nests: List[NstSpeciesListArchive]  # from update.with_post_data
+    empties: List[NstLocation]  # with their neighborhoods
+
+
+class Rendered(NamedTuple):
+    folder: str
+    files: Dict[str, str]  # file name → contents
+    error: Optional[str] = None
+
+
+def load_cities(
+    rotation: NstRotationDate, cities: Iterable[NstMetropolisMajor]
+) -> List[CityList]:
+    """
+    :param rotation: the rotation to export
+    :param cities: the cities to export
+    :return: every city's nests, all loaded in the same few queries
+    """
+    cities = list(cities)
+    nests: Dict[int, List[NstSpeciesListArchive]] = defaultdict(list)
+    empties: Dict[int, List[NstLocation]] = defaultdict(list)
+    for nest in update.with_post_data(
+        NstSpeciesListArchive.objects.filter(
+            rotation_num=rotation, nestid__neighborhood__major_city__in=cities
+        )
+    ):
+        nests[nest.nestid.neighborhood.major_city_id].append(nest)
+    for empty in (
+        NstLocation.objects.filter(neighborhood__major_city__in=cities)
+        .exclude(nstrotationdate=rotation)
+        .select_related("neighborhood")
+        .order_by("official_name")
+    ):
+        empties[empty.neighborhood.major_city_id].append(empty)
+    return [CityList(ct, rotation, nests[ct.pk], empties[ct.pk]) for ct in cities]
+
+
+def nest_rows(city_list: CityList) -> List[Dict]:
+    """:return: one plain dict per reported nest, in the order they're listed"""
+    rows: List[Dict] = []
+    for nest in city_list.nests:
+        park: NstLocation = nest.nestid
+        notes: List[str] = [n for n in [park.notes, nest.special_notes] if n]
+        rows.append(
+            {
+                "area": update.nest_area(nest),
+                "neighborhood": park.neighborhood.name,
+                "nest": park.get_name(),
+                "nest_id": park.pk,
+                "alt_names": [alt.name for alt in park.shown_alt_names],
+                "species": (
+                    nest.species_name_fk.name
+                    if nest.species_name_fk is not None
+                    else nest.species_txt
+                ),
+                "species_no": nest.species_no,
+                "confirmed": nest.confirmation is True,
+                "private": park.private is True,
+                "notes": "; ".join(notes) or None,
+            }
+        )
+    return sorted(rows, key=lambda r: (r["area"], r["nest"]))
+
+
+def empty_rows(city_list: CityList) -> List[Dict]:
+    return [
+        {
+            "neighborhood": park.neighborhood.name,
+            "nest": park.get_name(),
+            "nest_id": park.pk,
+            "private": park.private is True,
+        }
+        for park in sorted(
+            city_list.empties, key=lambda p: (p.neighborhood.name, p.get_name())
+        )
+    ]
+
+
+def render_city(city_list: CityList, formats: List[str], run_date: str) -> Rendered:
+    """
+    :param city_list: the city's nests
+    :param formats: which of FORMATS to render
+    :param run_date: when the list was generated, as it should be printed
+    :return: the city's folder name and files
+    """
+    city, rotation = city_list.city, city_list.rotation
+    folder: str = slugify(city.name) or str(city.pk)
+    shift_date: str = str(rotation.date)
+    try:
+        files: Dict[str, str] = {}
+        nestout, nestmt, ssumry = update.arrange_nests(
+            city_list.nests, city_list.empties
+        )
+        if "facebook" in formats:
+            files["facebook.txt"] = update.FB_post(
+                nestout,
+                run_date,
+                shift_date,
+                mt=nestmt,
+                slist=ssumry,
+                rotnum=rotation.num,
+            )
+        if "discord" in formats:
+            posts: List[str] = update.disc_posts(
+                nestout,
+                run_date,
+                shift_date,
+                rotnum=rotation.num,
+                raw_nests=city_list.nests,
+            )
+            for i, post in enumerate([p for p in posts if p.strip()], 1):
+                files[f"discord-{i}.txt"] = post
+        rows: List[Dict] = nest_rows(city_list)
+        empties: List[Dict] = empty_rows(city_list)
+        if "json" in formats:
+            files["nests.json"] = json.dumps(
+                {
+                    "city": city.name,
+                    "city_id": city.pk,
+                    "rotation": rotation.num,
+                    "rotation_date": shift_date,
+                    "generated": run_date,
+                    "nests": rows,
+                    "empty": empties,
+                },
+                ensure_ascii=False,
+                indent=1,
+            )
+        if "csv" in formats:
+            out = io.StringIO()
+            writer = csv.DictWriter(out, CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow({**row, "alt_names": "/".join(row["alt_names"])})
+            files["nests.csv"] = out.getvalue()
+        if "html" in formats:
+            areas: Dict[str, List[Dict]] = defaultdict(list)
+            for row in rows:
+                areas[row["area"]].append(row)
+            files["index.html"] = render_to_string(
+                "nestlist/export.jinja",
+                {
+                    "city": city,
+                    "rotation": rotation,
+                    "run_date": run_date,
+                    "areas": areas,
+                    "empties": empties,
+                },
+            )
+    except Exception as e:  # one bad city shouldn't stop the others from publishing
+        return Rendered(folder, {}, f"{city.name}: {e}")
+    return Rendered(folder, files)
+
+
+def _render(job: Tuple[CityList, List[str], str]) -> Rendered:
+    return render_city(*job)
+
+
+def _start_worker() -> None:
+    import django
+
+    django.setup()  # a no-op for forked workers
+
+
+def export(
+    rotation: NstRotationDate,
+    cities: Iterable[NstMetropolisMajor],
+    formats: List[str],
+    run_date: str,
+    workers: int = 1,
+) -> List[Rendered]:
+    """
+    :param workers: processes to render in (1 renders in this one)
+    :return: every city's files, in the order of the cities
+    """
+    jobs = [(c, formats, run_date) for c in load_cities(rotation, cities)]
+    if workers <= 1 or len(jobs) <= 1:
+        return [_render(job) for job in jobs]
+    with ProcessPoolExecutor(workers, initializer=_start_worker) as pool:
+        return list(pool.map(_render, jobs))
+
+
+def write_files(results: Iterable[Rendered], out_dir: str) -> int:
+    """
+    :param out_dir: folder to put the cities' folders in, or "-" for stdout
+    :return: the number of files written
+    """
+    count: int = 0
+    for result in results:
+        for name, text in result.files.items():
+            path: str = os.path.join(result.folder, name)
+            count += 1
+            if out_dir == "-":
+                print(f"==> {path} <==\n{text}\n")
+                continue
+            os.makedirs(os.path.join(out_dir, result.folder), exist_ok=True)
+            with open(os.path.join(out_dir, path), "w", encoding="utf-8") as f:
+                f.write(text)
+    return count
+
+
+def pick_cities(search: Iterable[str]) -> List[NstMetropolisMajor]:
+    """:return: the cities matching any of the names or IDs (default: every active one)"""
+    search = list(search)
+    if not search:
+        return list(NstMetropolisMajor.objects.filter(active=True).order_by("name"))
+    query = Q(pk__in=[int(s) for s in search if str_int(s)])
+    for s in search:
+        query |= Q(name__iexact=s) | Q(short_name__iexact=s)
+    return list(NstMetropolisMajor.objects.filter(query).order_by("name"))
+
+
+@click.command()
+@click.option(
+    "-d",
+    "--date",
+    default="t",
+    help="Export the nest list as of this date (default: today)",
+)
+@click.option(
+    "-f",
+    "--format",
+    "formats",
+    type=click.Choice(FORMATS),
+    multiple=True,
+    help="Formats to render (default: all of them)",
+)
+@click.option(
+    "-c",
+    "--city",
+    multiple=True,
+    help="Cities to export by name or ID (default: every active city)",
+)
+@click.option(
+    "-o", "--out", default="-", help="Folder to write to (default: - for stdout)"
+)
+@click.option(
+    "-w",
+    "--workers",
+    default=os.cpu_count() or 1,
+    help="Processes to render the cities in",
+)
+def main(date, formats, city, out, workers):
+    try:
+        when: datetime = parse_date(date)
+    except (ValueError, TypeError):
+        raise click.BadParameter(f"{date} isn't a date", param_hint="--date")
+    rotation = update.get_rot8d8(when)
+    cities: List[NstMetropolisMajor] = pick_cities(city)
+    results = export(
+        rotation, cities, list(formats or FORMATS), when.strftime("%d %b %Y"), workers,
+    )
+    count: int = write_files(results, out)
+    errors: List[str] = [r.error for r in results if r.error]
+    for error in errors:
+        click.echo(error, err=True)
+    click.echo(
+        f"{count} files for {len(cities) - len(errors)} of {len(cities)} cities "
+        f"from rotation {rotation.num}",
+        err=True,
+    )
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
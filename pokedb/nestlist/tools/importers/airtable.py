@@ -8,11 +8,17 @@
 import os
 import sys
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Union, Dict, List
+from itertools import islice
+from queue import Queue, Full
+from typing import Dict, List, Optional, Tuple, Iterable, Iterator, Any
 from collections import defaultdict
 
 import airtable
+import click
+import requests
 
 if __name__ == "__main__":
     # Setup environ
@@ -24,66 +30,122 @@ if __name__ == "__main__":
 
     django.setup()
 
-    # now you can import your ORM models
-    from nestlist.models import (
-        NstMetropolisMajor,
-        AirtableImportLog,
-        add_a_report,
-        ReportStatus,
-        NstRawRpt,
-    )
-    from django.utils import timezone
-    from nestlist.utils import nested_dict, parse_date
+# now you can import your ORM models
+from nestlist.models import (
+    NstMetropolisMajor,
+    AirtableImportLog,
+    add_a_report,
+    add_reports_bulk,
+    ReportStatus,
+    NstRawRpt,
+)
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from nestlist.utils import parse_date
 
 
-def get_submission_data_at(city_id: str, start_num: Union[str, int]) -> List[Dict]:
-    """
-    Fetches data from Airtable's servers
-    :param city_id: Airtable ID for the table we need
-    :param start_num: most recent imported row
-    :return: list of new rows
-    """
-    return airtable.Airtable(city_id, "Submissions Data").get_all(
-        formula=f"serial>{start_num}"
-    )
+class SubmissionsTable(airtable.Airtable):
+    """The Submissions Data table of a city's base"""
+
+    def __init__(self, base_id: str, api_url: Optional[str] = None):
+        """
+        :param base_id: Airtable ID for the base
+        :param api_url: point at some other server than api.airtable.com (like a fake one for tests)
+        """
+        if api_url:
+            self.API_URL = api_url
+        super().__init__(
+            base_id, "Submissions Data", api_key=os.environ.get("AIRTABLE_API_KEY")
+        )
 
 
-def transform_submission_data(at_obj: List[Dict]) -> Dict:
+def parse_submission(line: Dict) -> Dict:
     """
-    :param at_obj: Airtable object
-    :return: nesteddict of the most important attributes for a report to be added to nst_raw_rpt:
+    :param line: a record from Airtable
+    :return: dict of the most important attributes for a report to be added to nst_raw_rpt:
         num: serial number from Airtable db; becomes foreign_db_row_num
         species: pokémon species number (extracted from the summary string); becomes raw_species_num
         whodidit: Name field from submission report, used to filter trolls & duplicates; becomes user_name
         park: id of the park, needs to have AT and local db kept in sync; becomes parklink_id and raw_park_info
-        sig: method of calculating duplicate reports across servers; becomes dedupe_sig
-            (it's a carrot-delimited string 🥕)
-        rotation: rotation number, calculated from the timestamp
+        time: when the report was submitted
     """
+    report: Dict = {"num": line["fields"]["serial"]}
+    try:
+        report["time"] = parse_date(line["createdTime"].split("Z")[0])  # remove Z
+    except ValueError:
+        report["time"] = parse_date("March 14, 1592")
+    report["whodidit"] = line["fields"]["Name"].strip().lower()
 
-    at_tmp: Dict = nested_dict()
-    for line in at_obj:
-        num: int = line["fields"]["serial"]
-        try:
-            at_tmp[num]["time"] = parse_date(
-                line["createdTime"].split("Z")[0]
-            )  # remove Z
-        except ValueError:
-            at_tmp[num]["time"] = parse_date("March 14, 1592")
-        at_tmp[num]["whodidit"] = line["fields"]["Name"].strip().lower()
+    try:
+        report["species"] = line["fields"]["summary"].split(" ")[0][1:]
+    except ValueError:
+        report["species"] = 69420  # give somethig that will never match
+    try:
+        report["park"] = (
+            line["fields"]["summary"].split(" at ")[1].split(".")[0].split('"')[-1]
+        )  # this is nasty to deal with human-readable Airtable stuff & avoid joins
+    except ValueError:
+        report["park"] = 0  # should never match
+    return report
 
+
+def stream_submissions(
+    base: str,
+    start_num: int,
+    api_url: Optional[str] = None,
+    retries: int = 3,
+    backoff: float = 30.0,
+) -> Iterator[Dict]:
+    """
+    Pages through the new submissions in serial order, one parsed report at a time
+
+    Airtable allows 5 requests per second per base (the wrapper sleeps between pages to keep to it)
+    and locks the base out for 30 seconds if that is exceeded.
+    After a lockout, the paging starts over from the last serial seen.
+    :param base: Airtable ID for the base
+    :param start_num: most recent imported row
+    :param api_url: Airtable API root to use instead of the real one
+    :param retries: how many times to retry after being rate-limited
+    :param backoff: seconds to wait after being rate-limited
+    :return: parse_submission output for each new record
+    """
+    last: int = start_num
+    for attempt in range(retries + 1):
         try:
-            at_tmp[num]["species"] = line["fields"]["summary"].split(" ")[0][1:]
-        except ValueError:
-            at_tmp[num]["species"] = 69420  # give somethig that will never match
-        try:
-            at_tmp[num]["park"] = (
-                line["fields"]["summary"].split(" at ")[1].split(".")[0].split('"')[-1]
-            )  # this is nasty to deal with human-readable Airtable stuff & avoid joins
-        except ValueError:
-            at_tmp[num]["park"] = 0  # should never match
-        at_tmp[num]["num"] = num
-    return at_tmp
+            for page in SubmissionsTable(base, api_url).get_iter(
+                formula=f"serial>{last}", sort=["serial"]
+            ):
+                for line in page:
+                    report: Dict = parse_submission(line)
+                    last = report["num"]
+                    yield report
+            return
+        except requests.HTTPError as e:
+            if (
+                e.response is None
+                or e.response.status_code != 429
+                or attempt == retries
+            ):
+                raise
+            time.sleep(backoff)
+
+
+def timed_chunks(
+    reports: Iterable[Dict], chunk_size: int
+) -> Iterator[Tuple[List[Dict], float]]:
+    """
+    :param reports: reports, possibly still being fetched
+    :param chunk_size: reports per chunk
+    :return: lists of up to chunk_size reports and the seconds spent waiting on each
+    """
+    reports = iter(reports)
+    while True:
+        started: float = time.monotonic()
+        chunk: List[Dict] = list(islice(reports, chunk_size))
+        if not chunk:
+            return
+        yield chunk, time.monotonic() - started
 
 
 def add_air_rpt(report: Dict, bot: int):
@@ -108,56 +170,254 @@ def add_air_rpt(report: Dict, bot: int):
     return status
 
 
-def import_city(base: str, bot_id: int) -> Dict[int, int]:
-    """
-    Imports from an Airtable base
-    """
-    try:  # find the most recent record imported to the system
-        rpt_start: int = AirtableImportLog.objects.filter(
-            city=base, time__isnull=False
-        ).latest("time").end_num
-    except AirtableImportLog.DoesNotExist:
-        rpt_start: int = 0
-    tsd_nnl: Dict = transform_submission_data(get_submission_data_at(base, rpt_start))
-    stats = defaultdict(lambda: 0)  # empty stats list
-
-    def return_status() -> Dict[int, int]:
-        """Magic numbers from nestlist.models.ReportStatus"""
-        return {
-            0: stats[0],  # duplicates
-            1: stats[1],  # new reports
-            2: stats[2],  # confirmations
-            4: stats[4],  # conflicts
-            9: stats[9],  # errors
-        }
+def last_imported_serial(base: str) -> int:
+    """:return: the serial of the most recent record imported from this base"""
+    return (
+        AirtableImportLog.objects.filter(city=base, time__isnull=False).aggregate(
+            last=Max("end_num")
+        )["last"]
+        or 0
+    )
+
+
+def summarize(stats: Dict[int, int]) -> Dict[int, int]:
+    """Magic numbers from nestlist.models.ReportStatus"""
+    return {
+        0: stats[0],  # duplicates
+        1: stats[1],  # new reports
+        2: stats[2],  # confirmations
+        4: stats[4],  # conflicts
+        9: stats[9],  # errors
+    }
+
 
-    if not tsd_nnl:
-        return return_status()
-    for rpt in tsd_nnl.keys():
-        stats[
-            add_air_rpt(tsd_nnl[rpt], bot_id)
-        ] += 1  # add/handle the report, then increment the stats counter
-    AirtableImportLog.objects.create(
+def log_import(
+    base: str,
+    end_num: int,
+    stats: Dict[int, int],
+    fetch_seconds: Optional[float] = None,
+    ingest_seconds: Optional[float] = None,
+) -> AirtableImportLog:
+    return AirtableImportLog.objects.create(
         city=base,
-        end_num=rpt_start + len(tsd_nnl),
+        end_num=end_num,
         time=timezone.now(),
         first_reports=stats[1],
         confirmations=stats[2],
         errors=stats[9],
         conflicts=stats[4],
         duplicates=stats[0],
-    )  # only create a new log when successful
-    return return_status()
+        total_import_count=sum(stats.values()),
+        fetch_seconds=fetch_seconds,
+        ingest_seconds=ingest_seconds,
+    )
+
+
+def add_bulk(reports: List[Dict], bot_id: int) -> List[int]:
+    """add_air_rpt for a list of reports, using add_reports_bulk"""
+    statuses: List[int] = []
+    outputs: List[ReportStatus] = add_reports_bulk(
+        {
+            "name": report["whodidit"],
+            "nest": report["park"],
+            "timestamp": report["time"],
+            "species": report["species"],
+            "bot_id": bot_id,
+            "server": f"AirTable#{bot_id}",
+            "foreign_db_row_num": report["num"],
+        }
+        for report in reports
+    )
+    for report, output in zip(reports, outputs):
+        if output.status == 9 or output.row is None:
+            print(output, report)
+            statuses.append(9)
+        else:
+            statuses.append(output.status)
+    return statuses
+
+
+def add_chunk(
+    base: str,
+    bot_id: int,
+    chunk: List[Dict],
+    fetch_seconds: Optional[float] = None,
+    bulk: bool = True,
+) -> Dict[int, int]:
+    """
+    Adds a chunk of reports in a transaction along with an AirtableImportLog checkpoint
+    holding the highest serial in the chunk, so an import that dies partway through
+    picks up after the last finished chunk
+    :param base: Airtable ID for the base
+    :param bot_id: NstAdminEmail for the base's bot
+    :param chunk: parse_submission output, in serial order
+    :param fetch_seconds: how long fetching the chunk took
+    :param bulk: add the chunk with add_reports_bulk instead of one report at a time
+    :return: stats for the chunk
+    """
+    stats = defaultdict(lambda: 0)
+    started: float = time.monotonic()
+    with transaction.atomic():
+        for status in (
+            add_bulk(chunk, bot_id)
+            if bulk
+            else [add_air_rpt(rpt, bot_id) for rpt in chunk]
+        ):
+            stats[
+                status
+            ] += 1  # add/handle the report, then increment the stats counter
+        log_import(
+            base,
+            max(rpt["num"] for rpt in chunk),
+            stats,
+            fetch_seconds,
+            time.monotonic() - started,
+        )
+    return stats
 
 
-def __main__() -> None:
-    for city in NstMetropolisMajor.objects.filter(
+def add_city_reports(
+    base: str,
+    bot_id: int,
+    reports: Iterable[Dict],
+    bulk: bool = True,
+    chunk_size: int = 100,
+) -> Dict[int, int]:
+    """
+    Adds reports in chunks as they are fetched, so memory use stays flat
+    :param base: Airtable ID for the base
+    :param bot_id: NstAdminEmail for the base's bot
+    :param reports: parse_submission output in serial order (e.g. from stream_submissions)
+    :param bulk: add each chunk with add_reports_bulk instead of one report at a time
+    :param chunk_size: reports per checkpoint
+    :return: stats for the whole import
+    """
+    totals = defaultdict(lambda: 0)
+    for chunk, fetch_seconds in timed_chunks(reports, chunk_size):
+        for status, count in add_chunk(
+            base, bot_id, chunk, fetch_seconds, bulk
+        ).items():
+            totals[status] += count
+    return summarize(totals)
+
+
+def import_city(
+    base: str, bot_id: int, api_url: Optional[str] = None
+) -> Dict[int, int]:
+    """
+    Imports from an Airtable base
+    """
+    return add_city_reports(
+        base,
+        bot_id,
+        stream_submissions(base, last_imported_serial(base), api_url),
+        bulk=False,
+    )
+
+
+def import_cities(
+    cities: Iterable[NstMetropolisMajor],
+    workers: int = 4,
+    api_url: Optional[str] = None,
+    backoff: float = 30.0,
+    chunk_size: int = 100,
+) -> Dict[str, Dict[int, int]]:
+    """
+    Imports several cities at once
+
+    A pool of worker threads pages through the bases and passes chunks of reports
+    through a bounded queue to this thread, which adds each chunk as soon as it arrives.
+    :param cities: cities with an airtable_base_id and airtable_bot
+    :param workers: how many bases to fetch at the same time
+    :param api_url: Airtable API root to use instead of the real one
+    :param backoff: seconds to wait after being rate-limited
+    :param chunk_size: reports per checkpoint
+    :return: import stats by city name
+    """
+    cities = list(cities)
+    starts: Dict[str, int] = {
+        city.airtable_base_id: last_imported_serial(city.airtable_base_id)
+        for city in cities
+    }
+    chunks: "Queue[Tuple[NstMetropolisMajor, Any, Optional[float]]]" = Queue(
+        maxsize=2 * max(workers, 1)
+    )
+    stop = threading.Event()
+
+    def hand_off(item: Tuple) -> None:
+        while not stop.is_set():
+            try:
+                return chunks.put(item, timeout=1)
+            except Full:
+                pass
+
+    def fetch(city: NstMetropolisMajor) -> None:
+        """Runs in the worker threads, so it must not touch the database"""
+        try:
+            for chunk, seconds in timed_chunks(
+                stream_submissions(
+                    city.airtable_base_id,
+                    starts[city.airtable_base_id],
+                    api_url,
+                    backoff=backoff,
+                ),
+                chunk_size,
+            ):
+                if stop.is_set():
+                    return
+                hand_off((city, chunk, seconds))
+            hand_off((city, None, None))  # done
+        except Exception as e:  # let the main thread deal with it
+            hand_off((city, e, None))
+
+    totals: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(lambda: 0))
+    results: Dict[str, Dict[int, int]] = {}
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for city in cities:
+            pool.submit(fetch, city)
+        try:
+            finished: int = 0
+            while finished < len(cities):
+                city, chunk, seconds = chunks.get()
+                if isinstance(chunk, list):
+                    for status, count in add_chunk(
+                        city.airtable_base_id, city.airtable_bot_id, chunk, seconds
+                    ).items():
+                        totals[city.name][status] += count
+                    continue
+                finished += 1
+                if isinstance(chunk, requests.RequestException):
+                    print(city.name, datetime.now().isoformat(), chunk)
+                    continue
+                if chunk is not None:
+                    raise chunk
+                results[city.name] = summarize(totals[city.name])
+                print(city.name, datetime.now().isoformat(), results[city.name])
+        finally:
+            stop.set()
+    return results
+
+
+@click.command()
+@click.option(
+    "-w",
+    "--workers",
+    default=1,
+    help="Number of bases to fetch at once (1 imports the cities one at a time)",
+)
+@click.option("--api-url", default=None, help="Airtable API root (for testing)")
+def __main__(workers: int = 1, api_url: Optional[str] = None) -> None:
+    cities = NstMetropolisMajor.objects.filter(
         airtable_base_id__isnull=False, airtable_bot_id__isnull=False
-    ):
+    )
+    if workers > 1:
+        import_cities(cities, workers, api_url)
+        return
+    for city in cities:
         print(
             city.name,
             datetime.now().isoformat(),
-            import_city(city.airtable_base_id, city.airtable_bot_id),
+            import_city(city.airtable_base_id, city.airtable_bot_id, api_url),
         )
         time.sleep(1)
 
@@ -11,8 +11,8 @@ It may not be updated at all and could easily break in the future.
 import os
 import sys
 from datetime import datetime
+from typing import Dict, List
 import pyperclip
-from nestlist.utils import getdate, decorate_text, nested_dict, pick_from_qs, str_int
 import click
 
 if __name__ == "__main__":
@@ -25,18 +25,17 @@ if __name__ == "__main__":
 
     django.setup()
 
-    # now you can import your ORM models
-    from nestlist.models import (
-        NstRotationDate,
-        NstSpeciesListArchive,
-        NstLocation,
-        NstNeighborhood,
-        NstCombinedRegion,
-        NstAltName,
-        NstMetropolisMajor,
-    )
-    from typeedit.models import Type
-    from django.db.models import Q
+# now you can import your ORM models
+from django.db.models import Q, Prefetch
+from nestlist.models import (
+    NstSpeciesListArchive,
+    NstLocation,
+    NstAltName,
+    NstMetropolisMajor,
+)
+from nestlist.rotation_index import rotation_table
+from nestlist.current_list import current_nest_rows
+from nestlist.utils import getdate, decorate_text, nested_dict, pick_from_qs, str_int
 
 
 # maybe this should be in a config file in the future
@@ -50,6 +49,29 @@ hoothoot = "🦉"
 water_icon = "💦"
 fish_icon = "🐠"
 
+DISCORD_LIMIT = 2000  # characters in a Discord post
+
+GHOST_TYPE = 8  # ID in speciesinfo.Type
+STARTER_CATEGORY = 50  # ID in speciesinfo.PokeCategory
+
+
+def is_ghost(species):
+    """
+    :param species: Pokemon object or None
+    :return: whether it's a Ghost type, without looking up its types
+    """
+
+    return species is not None and GHOST_TYPE in (species.type1_id, species.type2_id)
+
+
+def alt_names(nest):
+    """
+    :param nest: NSLA object from get_nests, which prefetches the alternate names
+    :return: "/alt/names" to put after the nest's name
+    """
+
+    return "".join("/" + alt.name for alt in nest.nestid.shown_alt_names)
+
 
 def gen_parenthetical(notes):
     """
@@ -76,19 +98,12 @@ def FB_format_nests(nnl):
         list_txt += decorate_text(location.split("ZZZ")[-1], "{~()~}") + "\n"
         for nest in sorted(nnl[location]):
             # nest = nnl[location][nest_txt]
-            if nest.species_name_fk is not None and nest.species_name_fk.is_type(
-                Type.objects.get(id=8)
-            ):  # type 8 is Ghost
+            if is_ghost(nest.species_name_fk):
                 list_txt += ghost_icon
             if nest.nestid.private is True:
                 list_txt += private_reminder  # private property reminder
             list_txt += nest.nestid.get_name()  # nest name
-            alts = NstAltName.objects.filter(main_entry=nest.nestid).exclude(
-                hide_me=True
-            )
-            if len(alts) > 0:
-                for alt in alts:
-                    list_txt += "/" + alt.name
+            list_txt += alt_names(nest)
             if nest.nestid.notes is not None or nest.special_notes is not None:
                 notef = []
                 if nest.nestid.notes is not None:
@@ -161,7 +176,7 @@ def annotate_species(nest):
 
     if nest.species_name_fk is None:
         return annotate_species_txt(nest.species_txt)
-    if nest.species_name_fk.is_type(Type.objects.get(id=8)):  # Ghost-type ID = 8
+    if is_ghost(nest.species_name_fk):
         return ghost_icon
     if nest.species_name_fk.name == "Wailmer":
         return small_whale
@@ -237,7 +252,7 @@ def disc_important_species(s_list):
     """
     discord post of top/important species & parks
     maybe this should be from a config file?
-    :param s_list: species-arranged nested_dict, like elsewhere
+    :param s_list: NSLA objects from get_nests
     :return: a species summary for the popular species
     """
 
@@ -250,31 +265,27 @@ def disc_important_species(s_list):
         "Kabuto",
     ]
     out = decorate_text("Popular Species", "__****__")
-    pre_list = {}
-
-    # list of nests with noteworthy species
-    s_list = s_list.filter(
-        Q(species_txt__in=important_species)
-        | Q(species_name_fk__type1=8)  # important/popular species for quests
-        | Q(species_name_fk__type2=8)  # (ghosts for Kanto research)
-        | Q(species_name_fk__category=50)  # starters
-    )
 
-    if len(s_list) == 0:
+    # Sort the noteworthy nests into categories/species
+    # (ghosts for Kanto research, starters, and popular species for quests)
+    pre_list: Dict[str, List] = {
+        f"Ghost|{ghost_icon}Ghosts": [],
+        "Start|Starters": [],
+        **{f"{i_s}|{annotate_species_txt(i_s)}{i_s}": [] for i_s in important_species},
+    }
+    for nest in s_list:
+        species = nest.species_name_fk
+        if is_ghost(species):
+            pre_list[f"Ghost|{ghost_icon}Ghosts"].append(nest)
+        elif species is not None and species.category_id == STARTER_CATEGORY:
+            pre_list["Start|Starters"].append(nest)
+        elif nest.species_txt in important_species:
+            i_s = nest.species_txt
+            pre_list[f"{i_s}|{annotate_species_txt(i_s)}{i_s}"].append(nest)
+
+    if not any(pre_list.values()):
         return ""
 
-    # Sort the list into categories/species
-    pre_list[f"Ghost|{ghost_icon}Ghosts"] = s_list.filter(
-        Q(species_name_fk__type1=8) | Q(species_name_fk__type2=8)
-    )
-    s_list = s_list.exclude(Q(species_name_fk__type1=8) | Q(species_name_fk__type2=8))
-    pre_list["Start|Starters"] = s_list.filter(species_name_fk__category=50)
-    s_list = s_list.exclude(species_name_fk__category=50)
-    for i_s in important_species:
-        pre_list[f"{i_s}|{annotate_species_txt(i_s)}{i_s}"] = s_list.filter(
-            species_txt=i_s
-        )
-
     # actually generate the output string
     for sp_cat in sorted(pre_list.keys()):
         if len(pre_list[sp_cat]) == 0:
@@ -310,69 +321,109 @@ def copy_list(outparts):
             print(f"Copied part {pos} of {num} to the clipboard.")
 
 
-def disc_posts(nnl2, rundate, shiftdate, rotnum=0, raw_nests=None):
+def split_block(header, lines, limit=DISCORD_LIMIT):
+    """
+    Splits an area's block between nest lines when it's too long for one post
+    The header is repeated on every piece, and a line too long for a post on its own is cut.
+    :param header: the area's header line
+    :param lines: the nest lines
+    :param limit: most characters in a post
+    :return: blocks of at most limit characters
     """
-    generate and copy a Discord post to the clipboard
 
-    assumes all lines are roughly the same length and you don't troll with a 2000+ chars line for a single region
+    block = header + "".join(lines)
+    if len(block) <= limit:
+        return [block]
+    cont = header.rstrip("\n") + " (cont.)\n"
+    room = limit - len(cont)
+    blocks = []
+    current = header
+    for long_line in lines:
+        for line in (long_line[i : i + room] for i in range(0, len(long_line), room)):
+            if len(current) + len(line) > limit:
+                blocks.append(current)
+                current = cont
+            current += line
+    blocks.append(current)
+    return blocks
 
-    :param nnl: nested_dict in the format of nnl[area][nest] = NSLA object
+
+def posts_needed(sizes, cap):
+    """
+    :param sizes: lengths of the blocks, none of them over the cap
+    :param cap: most characters in a post
+    :return: how many posts it takes to fill each post before starting the next
+    """
+
+    posts, used = 1, 0
+    for size in sizes:
+        if used + size > cap:
+            posts, used = posts + 1, 0
+        used += size
+    return posts
+
+
+def pack_posts(blocks, limit=DISCORD_LIMIT):
+    """
+    Packs the blocks, in order, into as few posts as possible, as evenly as possible
+
+    Filling each post before starting the next gives the fewest posts.  Then the cap is
+    lowered as far as it goes without needing another post, so the last post doesn't
+    end up with a few lines on its own.  Each try is one pass over the blocks,
+    and the binary search over the cap takes about log2(limit) tries.
+    :param blocks: text blocks of at most limit characters each, from split_block
+    :param limit: most characters in a post
+    :return: the posts
+    """
+
+    if not blocks:
+        return []
+    sizes = [len(block) for block in blocks]
+    fewest = posts_needed(sizes, limit)
+    low, high = max(max(sizes), -(-sum(sizes) // fewest)), limit
+    while low < high:
+        mid = (low + high) // 2
+        if posts_needed(sizes, mid) <= fewest:
+            high = mid
+        else:
+            low = mid + 1
+
+    posts = []
+    current = ""
+    for block in blocks:
+        if current and len(current) + len(block) > high:
+            posts.append(current)
+            current = ""
+        current += block
+    posts.append(current)
+    return posts
+
+
+def disc_posts(nnl2, rundate, shiftdate, rotnum=0, raw_nests=None):
+    """
+    generate the Discord posts for a nest list, in as few posts as will fit
+
+    :param nnl2: nested_dict in the format of nnl[area][nest] = NSLA object
     :param rundate: string of the date the list was generated
     :param shiftdate: string of the date of the nest shift
-    :param mt: nested_dict of empty nests—mt[nest] = NstLocation object
-    :param raw_nests: QuerySet of NSLA objects to pass to the important species finder
+    :param raw_nests: NSLA objects to pass to the important species finder
     :param rotnum: rotation number (int)
     :return: array of strings of Discord posts
     """
 
-    list = []
-    olen = 0
-    max = 2000  # Discord post length limit
-    pre = disc_preamble(rundate, shiftdate, rotnum)
-    olen += len(pre)
-    list.append("")  # this is required for things to split up right later
-    list.append(pre)
-
+    blocks = [disc_preamble(rundate, shiftdate, rotnum)]
     for loc in sorted(nnl2.keys()):
-        loclst = decorate_text(loc, "__****__") + "\n"
-        for nest in sorted(nnl2[loc]):
-            loclst += nest.nestid.get_name()
-            alts = NstAltName.objects.filter(main_entry=nest.nestid).exclude(
-                hide_me=True
-            )
-            for alt in alts:
-                loclst += "/" + alt.name
-            loclst += (
-                ": "
-                + decorate_text(nest.species_txt, "****" if nest.confirmation else "__")
-                + "\n"
-            )
-        if len(loclst) > 2000:
-            raise Exception(
-                f"""Nest list for sub-region {loc} exceeds 2000 characters,\
-which causes Discord problems.  Consider breaking into smaller areas."""
-            )
-        olen += len(loclst)
-        list.append(loclst)
-
-    # Discord bean-counting to fit character limits
-    num = olen // max + 1
-    trg = olen // num
-    outparts = []
-    ix = 0
-    count = 0
-    tmpstr = ""
-    for nbh in list:  # I honestly can't remember what nbh means
-        if len(nbh) + count < max and count <= trg:
-            tmpstr += nbh
-            count += len(nbh)
-        else:
-            outparts.append(tmpstr)
-            tmpstr = nbh
-            count = 0
-            ix += 1
-    outparts.append(tmpstr)
-
+        lines = [
+            nest.nestid.get_name()
+            + alt_names(nest)
+            + ": "
+            + decorate_text(nest.species_txt, "****" if nest.confirmation else "__")
+            + "\n"
+            for nest in sorted(nnl2[loc])
+        ]
+        blocks += split_block(decorate_text(loc, "__****__") + "\n", lines)
+
+    outparts = pack_posts(blocks)
     outparts.append(disc_important_species(raw_nests))
 
     return outparts
@@ -408,13 +459,13 @@ def get_rot8d8(today):
     :return: rotation corresponding to the most recent one on or before the supplied date
     """
 
-    res = NstRotationDate.objects.filter(date__lte=today).order_by("-num")
-    if len(res) > 0:
-        return res[0]
+    rotation = rotation_table().on_or_before(today)
+    if rotation is not None:
+        return rotation
     print(
         f"Date {today} is older than anything in the database.  Using oldest data instead."
     )
-    return NstRotationDate.objects.all().order_by("date")[0]
+    return rotation_table().oldest()
 
 
 def nestname(nestrow):
@@ -429,10 +480,41 @@ def nestname(nestrow):
     )
 
 
-def get_nests(rotnum, ct=None):
+def with_post_data(nests):
     """
-    :param rotnum: rotation ID
-    :param ct: NstMetopolisMajor object
+    :param nests: QuerySet of NSLA objects
+    :return: the NSLA objects, with everything the posts read about them loaded in a few queries
+    """
+
+    return list(
+        nests.select_related(
+            "rotation_num", "species_name_fk", "nestid__neighborhood"
+        ).prefetch_related(
+            "nestid__neighborhood__region",
+            Prefetch(
+                "nestid__alternate_name",
+                queryset=NstAltName.objects.filter(hide_me=False).order_by("pk"),
+                to_attr="shown_alt_names",
+            ),
+        )
+    )
+
+
+def nest_area(nest):
+    """
+    Nests in a neighborhood that's part of a region are listed under the region
+    :param nest: NSLA object from with_post_data
+    :return: name of the region or neighborhood to list the nest under
+    """
+
+    regions = sorted(nest.nestid.neighborhood.region.all())
+    return regions[0].name if regions else nest.nestid.neighborhood.name
+
+
+def arrange_nests(nests, empties):
+    """
+    :param nests: NSLA objects from with_post_data
+    :param empties: NstLocation objects with their neighborhoods, in the order to list them
     :return: the nested nest list, a stack of empties, and the list sorted by species
     """
 
@@ -440,43 +522,8 @@ def get_nests(rotnum, ct=None):
     nestmt = nested_dict()
     ssumry = {}
 
-    if ct is None:
-        nests = NstSpeciesListArchive.objects.filter(rotation_num=rotnum)
-        empties = NstLocation.objects.exclude(nstrotationdate=rotnum).order_by(
-            "official_name"
-        )
-        neighborhoods = NstNeighborhood.objects.filter(
-            nstlocation__nstrotationdate=rotnum
-        ).order_by("name")
-        regions = NstCombinedRegion.objects.filter(
-            nstneighborhood__in=neighborhoods
-        ).order_by("name")
-        neighborhoods = neighborhoods.exclude(region__gt=0)
-        # clever way to check for non-null regions in a neighborhood
-    else:
-        pot_nests = NstLocation.objects.filter(neighborhood__major_city=ct)
-        nests = NstSpeciesListArchive.objects.filter(
-            rotation_num=rotnum, nestid__in=pot_nests
-        )
-        empties = pot_nests.exclude(nstrotationdate=rotnum).order_by("official_name")
-        neighborhoods = NstNeighborhood.objects.filter(
-            nstlocation__nstrotationdate=rotnum, major_city=ct
-        ).order_by("name")
-        regions = NstCombinedRegion.objects.filter(
-            nstneighborhood__in=neighborhoods
-        ).order_by("name")
-
-    for neighborhood in neighborhoods:
-        nestout[neighborhood.name] = set()
-    for region in regions:
-        nestout[region.name] = set()
-
     for nest in nests:
-        region = nest.nestid.neighborhood.region
-        if region is None:
-            nestout[nest.nestid.neighborhood.name].add(nest)
-        else:
-            nestout[region.name].add(nest)
+        nestout.setdefault(nest_area(nest), set()).add(nest)
 
         sp_name = nest.species_txt
         if nest.species_name_fk is not None:
@@ -489,7 +536,39 @@ def get_nests(rotnum, ct=None):
     for empty in empties:
         nestmt[empty.neighborhood.name][empty] = empty
 
-    return nestout, nestmt, ssumry, nests
+    return nestout, nestmt, ssumry
+
+
+def get_nests(rotnum, ct=None):
+    """
+    Loads everything the posts need in the same few queries, however big the city is
+    :param rotnum: rotation ID
+    :param ct: NstMetopolisMajor object
+    :return: the nested nest list, a stack of empties, the list sorted by species, and the NSLA objects
+    """
+
+    if ct is None:
+        nests = NstSpeciesListArchive.objects.filter(rotation_num=rotnum)
+        empties = NstLocation.objects.exclude(nstrotationdate=rotnum)
+    elif current_nest_rows(rotnum) is not None:  # read the snapshot table
+        nests = NstSpeciesListArchive.objects.filter(
+            current_rows__rotation_num=rotnum, current_rows__city=ct
+        )
+        empties = NstLocation.objects.filter(
+            current_rows__rotation_num=rotnum,
+            current_rows__city=ct,
+            current_rows__nsla__isnull=True,
+        )
+    else:
+        pot_nests = NstLocation.objects.filter(neighborhood__major_city=ct)
+        nests = NstSpeciesListArchive.objects.filter(
+            rotation_num=rotnum, nestid__in=pot_nests
+        )
+        empties = pot_nests.exclude(nstrotationdate=rotnum)
+
+    nests = with_post_data(nests)
+    empties = empties.select_related("neighborhood").order_by("official_name")
+    return (*arrange_nests(nests, empties), nests)
 
 
 def fetch_city(search=None):
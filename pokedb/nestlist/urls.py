@@ -81,28 +81,66 @@ urlpatterns = [
     # API views
     # ~~~~~~~~~~~~~
     #
+    # Active cities
+    path("cities/", views.CityList.as_view(), name="city_list"),
     # City overview
     path("<int:city_id>/nests/", views.ParkViewSet.as_view(), name="city_park_list"),
-    # Nest detail + history
+    # Nest detail
     path(
         "<int:city_id>/nests/<int:nest_id>/",
         views.NestDetail.as_view(),
         name="nest_detail_view",
     ),
-    # Neighborhood Index # TODO
-    # path("<int:city_id>/neighborhoods/"),
-    # Neighborhood Detail # TODO
-    # path("<int:city_id>/neighborhoods/<int:neighborhood_id>/"),
-    # region index # TODO
-    # path("<int:city_id>/regions/"),
-    # region detail # TODO
-    # path("regions/<int:region_id>/"),
-    # PS index # TODO
-    # path("<int:city_id>/park_systems/"),
-    # PS detail # TODO
-    # path("park_systems/<int:ps_id>/"),
-    # Sp Hx # TODO
-    # path("<int:city_id>/species/<str:poke>/"),
-    # reporting API # TODO
-    # path("<int:city_id>/rpt/",),
+    # Nest history
+    path(
+        "<int:city_id>/nests/<int:nest_id>/history/",
+        views.NestHistory.as_view(),
+        name="nest_history_api",
+    ),
+    # Nest list for a rotation (?rotation=, default current)
+    path(
+        "<int:city_id>/current/", views.CurrentNestList.as_view(), name="current_list"
+    ),
+    # Nest name search (typo-tolerant, closest first)
+    path("<int:city_id>/search/", views.NestSearch.as_view(), name="nest_search"),
+    # Nests closest to a point
+    path("<int:city_id>/nearby/", views.NearbyNests.as_view(), name="nearby_nests"),
+    # Page cache hit & miss counts (staff only)
+    path("page-cache/", views.PageCacheStats.as_view(), name="page_cache_stats"),
+    # Neighborhood Index
+    path(
+        "<int:city_id>/neighborhoods/",
+        views.NeighborhoodList.as_view(),
+        name="neighborhoods",
+    ),
+    # Neighborhood Detail
+    path(
+        "<int:city_id>/neighborhoods/<int:neighborhood_id>/",
+        views.NeighborhoodDetail.as_view(),
+        name="neighborhood_detail_view",
+    ),
+    # region index
+    path("<int:city_id>/regions/", views.RegionList.as_view(), name="region_list"),
+    # region detail
+    path("regions/<int:region_id>/", views.RegionDetail.as_view(), name="regions"),
+    # PS index
+    path(
+        "<int:city_id>/park_systems/",
+        views.ParkSystemList.as_view(),
+        name="park_system_list",
+    ),
+    # PS detail
+    path(
+        "park_systems/<int:ps_id>/",
+        views.ParkSystemDetail.as_view(),
+        name="park_system_detail_view",
+    ),
+    # Sp Hx
+    path(
+        "<int:city_id>/species/<str:poke>/",
+        views.SpeciesHistory.as_view(),
+        name="species_history_api",
+    ),
+    # reporting API (bots, by token)
+    path("<int:city_id>/rpt/", views.BotReports.as_view(), name="bot_reports"),
 ]
@@ -9,7 +9,7 @@ from dateutil.relativedelta import *
 from collections import defaultdict
 import readline
 import pytz
-from typing import Union, Optional, Collection
+from typing import Union, Optional, Collection, Mapping
 
 """
 Module of miscellaneous static helper functions that are re-used between modules.
@@ -38,11 +38,26 @@ def str_int(string: Union[str, int]) -> bool:
     # this could be part of a function that returns an int if it is a string and None otherwise?
     try:
         int(string)
-    except ValueError:
+    except (TypeError, ValueError):  # None and other non-numbers
         return False
     return True
 
 
+MAX_LIMIT: int = 100
+
+
+def query_limit(params: Mapping[str, str], default: Optional[int]) -> Optional[int]:
+    """
+    :param params: the query string of an API request
+    :param default: what to use if there is no ?limit= (or it isn't a number)
+    :return: the ?limit=, clamped between 1 and MAX_LIMIT
+    """
+    limit_txt: str = params.get("limit", "")
+    if not str_int(limit_txt):
+        return default
+    return max(1, min(int(limit_txt), MAX_LIMIT))
+
+
 def parse_relative_date(date: str) -> datetime:
     """For dates of the w+3 variety"""
     today = datetime.now(tz=pytz.utc)
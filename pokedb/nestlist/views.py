@@ -1,7 +1,8 @@
 from typing import Dict, List, Union, Optional
+from hashlib import md5
 
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
-from django.db.models import QuerySet
+from django.db.models import QuerySet, Prefetch
 from django.shortcuts import render, get_object_or_404
 from django.http import (
     HttpResponseRedirect,
@@ -13,19 +14,32 @@ from django.http import (
 )
 from django.urls import reverse
 from urllib.parse import urlencode
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, quote_etag
 from django.views import generic
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.exceptions import NotFound, ValidationError, PermissionDenied
 from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveAPIView
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAdminUser, AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 # Create your views here.
-from nestlist.utils import str_int, parse_date, nested_dict
+from nestlist.utils import str_int, parse_date, nested_dict, query_limit
 from speciesinfo.models import Pokemon, match_species_by_name_or_number, enabled_in_pogo
 from .models import (
     NstSpeciesListArchive,
+    NstCurrentNest,
     NstMetropolisMajor,
     NstLocation,
+    NstAltName,
     NstCombinedRegion,
     get_local_nsla_for_rotation,
+    get_local_snapshot_for_rotation,
     NstNeighborhood,
     collect_empty_nests,
     rotations_without_report,
@@ -35,14 +49,33 @@ from .models import (
     species_nesting_history,
     NstRotationDate,
     add_a_report,
+    add_reports_bulk,
+    NstAdminEmail,
+    ReportStatus,
+    validation_error_status,
     query_nests,
     which_regions,
     which_ps,
     which_cities,
     which_neighborhoods,
     which_parks,
+    plan_nest_list,
+)
+from .page_cache import page_key, get_page, set_page, page_cache_stats, data_version
+from .search import search_nests, DEFAULT_LIMIT
+from .geo_index import nest_geo_index, DEFAULT_RADIUS_M, MAX_RADIUS_M
+from .serializers import (
+    ParkSerializer,
+    ParkDetailSerializer,
+    CitySerializer,
+    NeighborhoodSerializer,
+    RegionSerializer,
+    RegionDetailSerializer,
+    ParkSystemSerializer,
+    ParkSystemDetailSerializer,
+    NestingSerializer,
+    ReportSerializer,
 )
-from .serializers import ParkSerializer
 from .forms import NestReportForm
 
 
@@ -53,7 +86,9 @@ def append_search_terms(url_base: str, terms: QueryDict):
 
 def report_nest(request, **kwargs):
     try:
-        city = NstMetropolisMajor.objects.get(pk=kwargs["city_id"], active=True)
+        city = NstMetropolisMajor.objects.select_related("airtable_bot").get(
+            pk=kwargs["city_id"], active=True
+        )
     except ObjectDoesNotExist:
         return Http404(f"{kwargs['city_id']} is not a valid city")
     # if this is a POST request we need to process the form data
@@ -64,15 +99,17 @@ def report_nest(request, **kwargs):
         if form.is_valid():
             # process the data in form.cleaned_data as required
             cd = form.cleaned_data
+            # the form already found the nest, species, and rotation
             submission_status = add_a_report(
                 name=cd["your_name"].lower().strip(),
-                bot_id=city.airtable_bot.pk if city.airtable_bot else None,
-                nest=cd["park"].strip(),
-                species=cd["species"].strip(),
-                timestamp=parse_date(str(cd["timestamp"])),
+                bot_id=city.airtable_bot,
+                nest=cd["nest"],
+                species=cd["pokemon"],
+                timestamp=cd["timestamp"],
+                rotation=cd["rotation"],
                 server="🕸",
-                subsearch_place=cd["subplace"],
-                subsearch_type=cd["scope"],
+                raw_nest=cd["park"].strip(),
+                raw_species=cd["species"].strip(),
             )
 
             # thank-you page
@@ -99,6 +136,8 @@ def report_nest(request, **kwargs):
 CBVs for the HTML display
 """
 
+NOT_LOOKED_UP = object()
+
 
 class NestListView(generic.ListView):
     model = NstSpeciesListArchive
@@ -112,16 +151,21 @@ class NestListView(generic.ListView):
         "ps": NstParkSystem,
     }
     template_name = "nestlist/city.jinja"
+    # looked up once per request
+    _location = NOT_LOOKED_UP
+    _rotation: Optional[NstRotationDate] = None
 
     def get_raw_date(self) -> str:
         srg = self.request.GET
-        return self.kwargs.get("date", srg.get("date", srg.get("rotation", "t")))
+        return str(self.kwargs.get("date", srg.get("date", srg.get("rotation", "t"))))
 
     def get_parsed_date(self):
         return parse_date(self.get_raw_date())
 
     def get_rot8(self) -> NstRotationDate:
-        return get_rotation(self.get_raw_date())
+        if self._rotation is None:
+            self._rotation = get_rotation(self.get_raw_date())
+        return self._rotation
 
     def get_sp(self) -> Union[int, str]:
         srg = self.request.GET
@@ -139,15 +183,24 @@ class NestListView(generic.ListView):
         return self.kwargs.get("scope")
 
     def get_location(self):
-        try:
-            return self.model_list[self.get_scope()].objects.get(pk=self.get_pk())
-        except ObjectDoesNotExist:
-            return None
+        if self._location is NOT_LOOKED_UP:
+            try:
+                self._location = self.model_list[self.get_scope()].objects.get(
+                    pk=self.get_pk()
+                )
+            except ObjectDoesNotExist:
+                self._location = None
+        return self._location
 
     def get_queryset(self) -> "QuerySet[NstSpeciesListArchive]":
+        return plan_nest_list(self.get_nest_list())
+
+    def get_nest_list(
+        self,
+    ) -> "Union[QuerySet[NstSpeciesListArchive], QuerySet[NstCurrentNest]]":
         """
         Unified method for generating a the Nest List
-        :return: the NSLA Q set
+        :return: the NSLA Q set (or the snapshot rows for the current rotation)
         """
         scope = self.get_scope()
         pk = self.get_pk()
@@ -155,6 +208,14 @@ class NestListView(generic.ListView):
         if self.kwargs.get("species_detail"):
             return species_nesting_history(sp=species, city=self.eligible_parks())
         if scope in ["neighborhood", "city", "ps", "region"]:
+            snapshot = get_local_snapshot_for_rotation(
+                rotation=self.get_rot8(),
+                location_pk=pk,
+                location_type=scope,
+                species=species,
+            )
+            if snapshot is not None:
+                return snapshot
             return get_local_nsla_for_rotation(
                 rotation=self.get_rot8(),
                 location_pk=pk,
@@ -166,6 +227,25 @@ class NestListView(generic.ListView):
         else:  # error
             return NstSpeciesListArchive.objects.none()
 
+    def page_cache_key(self) -> Optional[str]:
+        """
+        Only lists for a single past rotation are cached
+        :return: key of this page in the page cache (None if it isn't cached)
+        """
+        if self.kwargs.get("history") or self.get_scope() == "nest":
+            return None
+        rotation: NstRotationDate = self.get_rot8()
+        if rotation.date >= get_rotation("t").date:
+            return None
+        return page_key(
+            type(self).__name__,
+            rotation.num,
+            self.get_scope(),
+            self.get_pk(),
+            self.get_raw_date(),
+            self.get_sp(),
+        )
+
     def get(self, request, *args, **kwargs):
         scope: str = self.get_scope()
         pk = self.get_pk()
@@ -181,7 +261,14 @@ class NestListView(generic.ListView):
                 append_search_terms(location.web_url(), self.request.GET)
             )
         try:
-            return super(NestListView, self).get(request, *args, **kwargs)
+            key: Optional[str] = self.page_cache_key()
+            page: Optional[bytes] = get_page(key)
+            if page is not None:
+                return HttpResponse(page)
+            response = super(NestListView, self).get(request, *args, **kwargs)
+            if key and response.status_code == 200:
+                set_page(key, response.render().content)
+            return response
         except ValueError:
             return HttpResponseBadRequest(f"Try again with a valid date.")
         except Http404:
@@ -204,12 +291,33 @@ class NestListView(generic.ListView):
         context["parsed_date"]: str = self.get_parsed_date()
         context["history"]: bool = True if self.kwargs.get("history") else False
         context["pk"] = self.get_pk()
-        # these may be removed for performance later
-        context["cities_touched"] = which_cities(context["location"])
-        context["regions_touched"] = which_regions(context["location"])
-        context["neighborhoods"] = which_neighborhoods(context["location"])
-        context["all_parks"] = which_parks(context["location"])
-        context["ps_touched"] = which_ps(context["location"])
+        # navigation links, only looked up if the template shows them
+        location = context["location"]
+        context["cities_touched"] = SimpleLazyObject(lambda: which_cities(location))
+        context["regions_touched"] = SimpleLazyObject(
+            lambda: which_regions(location).prefetch_related(
+                Prefetch(
+                    "neighborhoods",
+                    queryset=NstNeighborhood.objects.select_related("major_city"),
+                )
+            )
+        )
+        context["neighborhoods"] = SimpleLazyObject(
+            lambda: which_neighborhoods(location).select_related("major_city")
+        )
+        context["all_parks"] = SimpleLazyObject(
+            lambda: which_parks(location).select_related("neighborhood__major_city")
+        )
+        context["ps_touched"] = SimpleLazyObject(
+            lambda: which_ps(location).prefetch_related(
+                Prefetch(
+                    "nstlocation_set",
+                    queryset=NstLocation.objects.select_related(
+                        "neighborhood__major_city"
+                    ),
+                )
+            )
+        )
         context["species_name"] = self.get_sp()
         context["scope"] = self.get_scope()
         return context
@@ -225,7 +333,7 @@ class NeighborhoodView(NestListView):
             rotation=context["rotation"],
             location_type="neighborhood",
             location_pk=self.get_pk(),
-        )
+        ).select_related("neighborhood__major_city")
         return context
 
 
@@ -377,15 +485,366 @@ API views
 """
 
 
-class ParkViewSet(ListAPIView):
+class ByIDPagination(CursorPagination):
+    """
+    Pages that stay put while nests are added and reported,
+    unlike ?page= offsets that shift under a poller
+    """
+
+    ordering = "pk"
+    page_size = 100
+    page_size_query_param = "limit"
+    max_page_size = 1000
+
+
+class NewestFirstPagination(ByIDPagination):
+    ordering = ("-rotation_num_id", "pk")
+
+
+class ByNestPagination(ByIDPagination):
+    ordering = "nestid_id"
+
+
+class ConditionalGetMixin:
+    """
+    Tags the response with an ETag & Last-Modified from the page cache's version stamps
+    and answers a client whose copy is still current with a bodiless 304
+    """
+
+    def data_rotation(self) -> Optional[int]:
+        """:return: the rotation the data is from (None for data from any rotation)"""
+        return None
+
+    def get(self, request, *args, **kwargs):
+        version = data_version(self.data_rotation())
+        if version is None:  # no cache, no stamps
+            return super().get(request, *args, **kwargs)
+        stamp, changed = version
+        etag: str = quote_etag(
+            md5(
+                f"{stamp}\n{request.accepted_media_type}\n{request.get_full_path()}".encode()
+            ).hexdigest()
+        )
+        last_modified: Optional[int] = int(changed) if changed else None
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class CityList(ConditionalGetMixin, ListAPIView):
+    serializer_class = CitySerializer
+    pagination_class = ByIDPagination
+
+    def get_queryset(self):
+        return NstMetropolisMajor.objects.filter(active=True)
+
+
+class ParkViewSet(ConditionalGetMixin, ListAPIView):
     model = NstLocation
     serializer_class = ParkSerializer
+    pagination_class = ByIDPagination
 
     def get_queryset(self):
-        return NstLocation.objects.filter(neighborhood=self.kwargs["city_id"])
+        return NstLocation.objects.filter(
+            neighborhood__major_city=self.kwargs["city_id"]
+        ).select_related("neighborhood")
 
 
-class NestDetail(RetrieveAPIView):
+class NestDetail(ConditionalGetMixin, RetrieveAPIView):
     model = NstLocation
-    serializer_class = ParkSerializer
-    pass
+    serializer_class = ParkDetailSerializer
+    lookup_url_kwarg = "nest_id"
+
+    def get_queryset(self):
+        return (
+            NstLocation.objects.filter(neighborhood__major_city=self.kwargs["city_id"])
+            .select_related("neighborhood")
+            .prefetch_related(
+                Prefetch(
+                    "alternate_name",
+                    queryset=NstAltName.objects.filter(hide_me=False),
+                    to_attr="shown_alt_names",
+                )
+            )
+        )
+
+
+class NestHistory(ConditionalGetMixin, ListAPIView):
+    serializer_class = NestingSerializer
+    pagination_class = NewestFirstPagination
+
+    def get_queryset(self):
+        nest: NstLocation = get_object_or_404(
+            NstLocation,
+            pk=self.kwargs["nest_id"],
+            neighborhood__major_city=self.kwargs["city_id"],
+        )
+        return park_nesting_history(nest).select_related("nestid")
+
+
+class SpeciesHistory(ConditionalGetMixin, ListAPIView):
+    serializer_class = NestingSerializer
+    pagination_class = NewestFirstPagination
+
+    def get_queryset(self):
+        return species_nesting_history(
+            NstLocation.objects.filter(neighborhood__major_city=self.kwargs["city_id"]),
+            self.kwargs["poke"],
+        ).select_related("nestid")
+
+
+class CurrentNestList(ConditionalGetMixin, ListAPIView):
+    """
+    The city's nests for a rotation
+
+    ?rotation=t        a date or rotation number (default: the current rotation)
+    """
+
+    serializer_class = NestingSerializer
+    pagination_class = ByNestPagination
+
+    def get_rotation(self) -> NstRotationDate:
+        if not hasattr(self, "rotation"):
+            when: str = self.request.query_params.get("rotation", "t")
+            try:
+                self.rotation: NstRotationDate = get_rotation(when)
+            except NstRotationDate.DoesNotExist as e:
+                raise NotFound(str(e))
+            except (ValueError, TypeError):
+                raise ValidationError({"rotation": f"{when} isn't a date"})
+        return self.rotation
+
+    def data_rotation(self) -> Optional[int]:
+        return self.get_rotation().num
+
+    def get_queryset(self):
+        snapshot = get_local_snapshot_for_rotation(
+            self.get_rotation(), self.kwargs["city_id"], "city"
+        )
+        if snapshot is not None:
+            return snapshot  # the names are copied in
+        return get_local_nsla_for_rotation(
+            self.get_rotation(), self.kwargs["city_id"], "city"
+        ).select_related("nestid")
+
+
+class NeighborhoodList(ConditionalGetMixin, ListAPIView):
+    serializer_class = NeighborhoodSerializer
+    pagination_class = ByIDPagination
+
+    def get_queryset(self):
+        return NstNeighborhood.objects.filter(
+            major_city=self.kwargs["city_id"]
+        ).prefetch_related("region")
+
+
+class NeighborhoodDetail(ConditionalGetMixin, RetrieveAPIView):
+    serializer_class = NeighborhoodSerializer
+    lookup_url_kwarg = "neighborhood_id"
+
+    def get_queryset(self):
+        return NstNeighborhood.objects.filter(
+            major_city=self.kwargs["city_id"]
+        ).prefetch_related("region")
+
+
+class RegionList(ConditionalGetMixin, ListAPIView):
+    serializer_class = RegionSerializer
+    pagination_class = ByIDPagination
+
+    def get_queryset(self):
+        return NstCombinedRegion.objects.filter(
+            pk__in=NstNeighborhood.objects.filter(
+                major_city=self.kwargs["city_id"]
+            ).values("region")
+        )
+
+
+class RegionDetail(ConditionalGetMixin, RetrieveAPIView):
+    serializer_class = RegionDetailSerializer
+    lookup_url_kwarg = "region_id"
+
+    def get_queryset(self):
+        return NstCombinedRegion.objects.prefetch_related(
+            Prefetch("neighborhoods", queryset=NstNeighborhood.objects.only("pk"))
+        )
+
+
+class ParkSystemList(ConditionalGetMixin, ListAPIView):
+    serializer_class = ParkSystemSerializer
+    pagination_class = ByIDPagination
+
+    def get_queryset(self):
+        return NstParkSystem.objects.filter(
+            pk__in=NstLocation.objects.filter(
+                neighborhood__major_city=self.kwargs["city_id"]
+            ).values("park_system")
+        )
+
+
+class ParkSystemDetail(ConditionalGetMixin, RetrieveAPIView):
+    serializer_class = ParkSystemDetailSerializer
+    lookup_url_kwarg = "ps_id"
+
+    def get_queryset(self):
+        return NstParkSystem.objects.prefetch_related(
+            Prefetch(
+                "nstlocation_set",
+                queryset=NstLocation.objects.only("pk", "park_system"),
+            )
+        )
+
+
+class NestSearch(APIView):
+    """
+    Nests in the city whose names are closest to the search, typos and all
+
+    ?q=alpah pk        (part of) the name, or the nest's ID
+    &limit=10          the most results to return
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, **kwargs):
+        limit: int = query_limit(request.query_params, DEFAULT_LIMIT)
+        found = search_nests(
+            request.query_params.get("q", ""), kwargs["city_id"], limit
+        )
+        return Response(
+            [
+                {"nestID": nest.pk, "name": nest.get_name(), "score": round(score, 3)}
+                for nest, score in found
+            ]
+        )
+
+
+class NearbyNests(APIView):
+    """
+    Nests in the city closest to a point
+
+    ?lat=39.96&lon=-83.00    the point (required)
+    &within=500              how far to look, in meters
+    &limit=10                the most results to return
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, **kwargs):
+        params = request.query_params
+        limit: int = query_limit(params, DEFAULT_LIMIT)
+        try:
+            lat, lon = float(params["lat"]), float(params["lon"])
+            within: float = float(params.get("within", DEFAULT_RADIUS_M))
+            found = nest_geo_index().nearest(
+                lat, lon, min(within, MAX_RADIUS_M), kwargs["city_id"], limit
+            )
+        except (KeyError, ValueError) as e:
+            return Response(
+                {"detail": f"Needs a valid lat & lon ({e})"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        nests: Dict[int, NstLocation] = NstLocation.objects.in_bulk(
+            [n.nest_id for n in found]
+        )
+        return Response(
+            [
+                {
+                    "nestID": n.nest_id,
+                    "name": nests[n.nest_id].get_name(),
+                    "meters": round(n.meters),
+                }
+                for n in found
+            ]
+        )
+
+
+class BotReports(APIView):
+    """
+    Reports from a bot, judged in one batch
+
+    POST a list of reports (see ReportSerializer), with the header
+        Authorization: Token <key from `manage.py drf_create_token <username>`>
+    The user must be the auth_user of the bot's NstAdminEmail.
+    The response has a {"status": …, "nsla": …, "errors": …} for each report, in order,
+    with the codes of ReportStatus.
+    """
+
+    authentication_classes = [TokenAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_batch: int = 500
+
+    def get_bot(self, city_id: int) -> NstAdminEmail:
+        try:
+            bot: NstAdminEmail = self.request.user.nest_user
+        except ObjectDoesNotExist:
+            raise PermissionDenied("This user isn't a bot")
+        if bot.city_id and bot.city_id != city_id:
+            raise PermissionDenied(f"{bot} doesn't report for city {city_id}")
+        return bot
+
+    def post(self, request, **kwargs):
+        city_id: int = kwargs["city_id"]
+        if not NstMetropolisMajor.objects.filter(pk=city_id, active=True).exists():
+            raise NotFound(f"{city_id} is not a valid city")
+        bot: NstAdminEmail = self.get_bot(city_id)
+        if not isinstance(request.data, list):
+            raise ValidationError("Expected a list of reports")
+        if len(request.data) > self.max_batch:
+            raise ValidationError(f"No more than {self.max_batch} reports at once")
+        out: List[Optional[ReportStatus]] = [None] * len(request.data)
+        batch: List[Dict] = []
+        places: List[int] = []  # where each report of the batch goes in out
+        for idx, item in enumerate(request.data):
+            report = ReportSerializer(data=item)
+            if not report.is_valid():
+                out[idx] = validation_error_status(
+                    {
+                        field: (417, " ".join(str(e) for e in errors), "")
+                        for field, errors in report.errors.items()
+                    }
+                )
+                continue
+            batch.append(
+                {
+                    "timestamp": timezone.now(),
+                    **report.validated_data,
+                    "bot_id": bot.pk,
+                    "subsearch_place": city_id,
+                    "subsearch_type": "city",
+                }
+            )
+            places.append(idx)
+        for idx, result in zip(places, add_reports_bulk(batch)):
+            out[idx] = result
+        return Response(
+            [
+                {
+                    "status": result.status,
+                    "nsla": result.row.nsla_pk_id if result.row else None,
+                    "errors": {
+                        location: {"code": code, "message": text, "value": value}
+                        for location, (code, text, value) in (
+                            result.errors_by_location or {}
+                        ).items()
+                    },
+                }
+                for result in out
+            ]
+        )
+
+
+class PageCacheStats(APIView):
+    """Hit & miss counts for the cache of past rotations' nest lists"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, **kwargs):
+        return Response(page_cache_stats())
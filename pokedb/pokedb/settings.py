@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     "nestlist.apps.NestlistConfig",
     "pokeperfect.apps.PokeperfectConfig",
     "rest_framework",
+    "rest_framework.authtoken",
     "memcache_status",
     "django_jinja",
     "django_jinja.contrib._humanize",
@@ -163,11 +164,8 @@ CACHES = {
     }
 }
 
-MIDDLEWARE_CLASSES = (
-    "django.middleware.cache.UpdateCacheMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.cache.FetchFromCacheMiddleware",
-)
+# written by ./manage.py build_cp_tables and memory-mapped by pokeperfect
+CP_TABLE_PATH = os.path.join(BASE_DIR, "cp_tables.bin")
 
 
 try:
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PokeperfectConfig(AppConfig):
     name = "pokeperfect"
     verbose_name = "IV checker"
+
+    def ready(self):
+        from . import engine  # connects the signals that rebuild the CP tables
@@ -0,0 +1,130 @@
+"""
+The precomputed CP table file (settings.CP_TABLE_PATH), written by
+
+    ./manage.py build_cp_tables
+
+For every species it holds the stat products (attack × √defense × √stamina with the IVs
+added in: the part of the CP formula that doesn't depend on the level) of all 4096
+IV combos in ascending order, plus the combos in that same order.  CP never goes down as
+the stat product goes up, so at any level the combos with a given CP are one run of that
+list, found with a binary search.  That's 40 KB a species, where a full level × IV table
+of CP values would be over ⅓ MB.
+
+The file is memory-mapped read-only, so every worker on the server shares a single copy
+through the page cache.  Its header keeps a fingerprint of the stats and CP multipliers
+it was built from; a file that no longer matches the database is ignored, and the engine
+goes back to building CP tables on the fly until the command is run again.
+
+Layout: MAGIC, the header's length (8 bytes, little-endian), the JSON header,
+padding to a multiple of 64 bytes, the stat products (float64, species × 4096),
+and then the combos (uint16, species × 4096; attack × 256 + defense × 16 + stamina).
+"""
+
+import json
+import logging
+import os
+from math import floor
+from tempfile import NamedTemporaryFile
+from typing import Dict, List, Optional
+import numpy as np
+
+MAGIC: bytes = b"POKECPT1"
+COMBOS: int = 16 ** 3
+ALIGN: int = 64
+log = logging.getLogger(__name__)
+
+
+class CPTable:
+    def __init__(self, path: str):
+        """Raises ValueError if the file isn't a CP table"""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} isn't a CP table")
+            size: int = int.from_bytes(f.read(8), "little")
+            header: Dict = json.loads(f.read(size).decode("utf-8"))
+        self.path: str = path
+        self.fingerprint: str = header["fingerprint"]
+        self.names: List[str] = header["species"]
+        self.row: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        shape = (len(self.names), COMBOS)
+        offset: int = _data_offset(size)
+        self.products: np.ndarray = np.memmap(
+            path, dtype="<f8", mode="r", offset=offset, shape=shape
+        )
+        self.combos: np.ndarray = np.memmap(
+            path,
+            dtype="<u2",
+            mode="r",
+            offset=offset + self.products.nbytes,
+            shape=shape,
+        )
+
+    def first_at_least(self, species: str, cpm2: float, cp: int) -> int:
+        """
+        :param species: primary key of the Pokémon
+        :param cpm2: the level's CP multiplier, squared
+        :param cp: CP to look for
+        :return: where the combos with at least that CP start in the species' list
+        """
+        if cp <= 10:  # the CP formula's minimum
+            return 0
+        products: np.ndarray = self.products[self.row[species]]
+        # the search lands at most a step or two away from the edge after rounding
+        i: int = int(np.searchsorted(products, cp * 10 / cpm2))
+        while i > 0 and floor(products[i - 1] * cpm2 / 10) >= cp:
+            i -= 1
+        while i < COMBOS and floor(products[i] * cpm2 / 10) < cp:
+            i += 1
+        return i
+
+    def combos_with_cp(self, species: str, cpm2: float, cp: int) -> np.ndarray:
+        """:return: the packed IV combos with that CP at the level, in ascending order"""
+        start: int = self.first_at_least(species, cpm2, cp)
+        end: int = self.first_at_least(species, cpm2, cp + 1)
+        return np.sort(self.combos[self.row[species], start:end])
+
+
+def _data_offset(header_size: int) -> int:
+    return -(-(len(MAGIC) + 8 + header_size) // ALIGN) * ALIGN
+
+
+def write_table(engine: "CPEngine", path: str) -> int:
+    """
+    Write the table for every species in the engine, replacing the file in one step
+    (workers that have the old one mapped keep reading it until they notice the new one)
+    :return: size of the file in bytes
+    """
+    header: bytes = json.dumps(
+        {"fingerprint": engine.fingerprint(), "species": engine.names}
+    ).encode("utf-8")
+    products: np.ndarray = np.empty((len(engine.names), COMBOS), dtype="<f8")
+    combos: np.ndarray = np.empty((len(engine.names), COMBOS), dtype="<u2")
+    for i, name in enumerate(engine.names):
+        flat: np.ndarray = engine.stat_products(name).reshape(COMBOS)
+        order: np.ndarray = np.argsort(flat, kind="stable")
+        products[i], combos[i] = flat[order], order
+    folder: str = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile("wb", dir=folder, delete=False) as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        f.write(b"\0" * (_data_offset(len(header)) - f.tell()))
+        f.write(products.tobytes())
+        f.write(combos.tobytes())
+    os.replace(f.name, path)
+    return os.path.getsize(path)
+
+
+def load_table(path: Optional[str], fingerprint: str) -> Optional[CPTable]:
+    """:return: the table at the path, if there is one and it's up to date"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        table = CPTable(path)
+    except (OSError, ValueError, KeyError) as e:
+        log.warning("Ignoring the CP table at %s: %s", path, e)
+        return None
+    if table.fingerprint != fingerprint:
+        log.warning("The CP table at %s is out of date; run build_cp_tables", path)
+        return None
+    return table
@@ -0,0 +1,295 @@
+"""
+Vectorized CP & IV math for Pokémon GO
+
+Every species' GO base stats and every power-up level's CP multiplier are loaded into
+NumPy arrays once per process.  A species' whole CP table (level × attack IV × defense IV ×
+stamina IV, a few hundred thousand values) is then a single broadcast expression,
+so a batch of catches costs one table per species in it instead of 4096 IV combos per catch.
+When the precomputed file from cp_table.py is up to date, IV lookups are binary searches
+in it instead, and no tables are built at all.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from typing import Dict, List, Optional, Iterable, NamedTuple, Tuple, Union
+import numpy as np
+from nestlist.caching import VersionedMemo
+from speciesinfo.models import Pokemon
+from .cp_table import CPTable, load_table
+from .models import GoPowerupLevel
+
+IVS: np.ndarray = np.arange(16)
+NERF: float = 0.91  # multiplier for the attack & defense of the species with pogo_nerf
+GRIDS_KEPT: int = 64  # CP tables kept per process, about ⅓ MB each
+
+Level = Union[Decimal, float, int, str]
+
+
+def go_stats(sp: Pokemon) -> Tuple[int, int, int]:
+    """
+    :param sp: a Pokémon
+    :return: its (attack, defense, stamina) in GO: Niantic's custom stats where it set some,
+    otherwise derived from the main series stats
+    """
+
+    def half_up(x: float) -> int:
+        return int(np.floor(x + 0.5))
+
+    speed: float = 1 + (sp.speed - 75) / 500
+    attack: int = half_up(
+        2
+        * (7 / 8 * max(sp.attack, sp.sp_atk) + 1 / 8 * min(sp.attack, sp.sp_atk))
+        * speed
+    )
+    defense: int = half_up(
+        2
+        * (5 / 8 * max(sp.defense, sp.sp_def) + 3 / 8 * min(sp.defense, sp.sp_def))
+        * speed
+    )
+    stamina: int = int(np.floor(sp.hp * 1.75 + 50))
+    if sp.pogo_nerf:
+        attack, defense = half_up(attack * NERF), half_up(defense * NERF)
+    return (
+        sp.nia_cust_atk or attack,
+        sp.nia_cust_def or defense,
+        sp.nia_cust_hp or stamina,
+    )
+
+
+def level_key(level: Level) -> int:
+    """:return: twice the level, since levels come in halves"""
+    return int(round(float(level) * 2))
+
+
+class IvMatch(NamedTuple):
+    level: float
+    attack: int
+    defense: int
+    stamina: int
+
+    @property
+    def percent(self) -> float:
+        return round((self.attack + self.defense + self.stamina) / 45 * 100, 1)
+
+
+class Catch(NamedTuple):
+    species: str  # primary key of the Pokémon
+    cp: int
+    level: Optional[Level] = None  # None to search every level
+    floor: int = 0  # lowest possible IV: 0 for wild catches, 10 for raids & eggs, etc.
+
+
+class CatchResult(NamedTuple):
+    catch: Catch
+    perfect: bool  # 15/15/15 at the level (or at any level)
+    floor: bool  # the lowest IVs it could have at the level (or at any level)
+    matches: List[IvMatch]
+
+
+class CPEngine:
+    def __init__(
+        self,
+        species: Iterable[Pokemon],
+        levels: Iterable[GoPowerupLevel],
+        table_path: Optional[str] = None,
+    ):
+        """
+        :param species: every Pokémon to build tables for
+        :param levels: every power-up level
+        :param table_path: the precomputed CP table file, if there is one
+        """
+        self.names: List[str] = []
+        stats: List[Tuple[int, int, int]] = []
+        for sp in species:
+            self.names.append(sp.pk)
+            stats.append(go_stats(sp))
+        self.row: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        self.stats: np.ndarray = np.array(stats, dtype=np.int32).reshape(-1, 3)
+        levels = sorted(levels, key=lambda lvl: lvl.level)
+        self.levels: np.ndarray = np.array([float(lvl.level) for lvl in levels])
+        self.cpm: np.ndarray = np.array([float(lvl.cp_multiplier) for lvl in levels])
+        self.cpm2: np.ndarray = self.cpm ** 2
+        self.level_row: Dict[int, int] = {
+            level_key(lvl): i for i, lvl in enumerate(self.levels)
+        }
+        self._grids: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.table: Optional[CPTable] = load_table(table_path, self.fingerprint())
+
+    def fingerprint(self) -> str:
+        """:return: a hash of everything that goes into the CP tables"""
+        digest = hashlib.sha1("\n".join(self.names).encode("utf-8"))
+        for array in [self.stats, self.levels, self.cpm]:
+            digest.update(np.ascontiguousarray(array, dtype="<f8").tobytes())
+        return digest.hexdigest()
+
+    def level_index(self, level: Level) -> int:
+        """Raises KeyError for levels that aren't in GoPowerupLevel"""
+        try:
+            return self.level_row[level_key(level)]
+        except (KeyError, ValueError, TypeError):
+            raise KeyError(f"No CP multiplier for level {level}")
+
+    def grid(self, species: str) -> np.ndarray:
+        """
+        Raises KeyError for unknown species
+        :param species: primary key of the Pokémon
+        :return: CP indexed by [level index, attack IV, defense IV, stamina IV]
+        """
+        with self._lock:
+            if species in self._grids:
+                self._grids.move_to_end(species)
+                return self._grids[species]
+        cp: np.ndarray = np.floor(
+            self.stat_products(species)[None, :, :, :]
+            * self.cpm2[:, None, None, None]
+            / 10
+        )
+        out: np.ndarray = np.maximum(cp, 10).astype(np.int32)
+        out.flags.writeable = False
+        with self._lock:
+            self._grids[species] = out
+            while len(self._grids) > GRIDS_KEPT:
+                self._grids.popitem(last=False)
+        return out
+
+    def stat_products(self, species: str) -> np.ndarray:
+        """
+        Raises KeyError for unknown species
+        :return: attack × √defense × √stamina indexed by [attack IV, defense IV, stamina IV]
+        """
+        attack, defense, stamina = self.stats[self.row[species]]
+        return (
+            (attack + IVS)[:, None, None]
+            * np.sqrt(defense + IVS)[None, :, None]
+            * np.sqrt(stamina + IVS)[None, None, :]
+        )
+
+    def level_cps(self, species: str, ivs: Tuple[int, int, int]) -> np.ndarray:
+        """:return: the CP at every level with those (attack, defense, stamina) IVs"""
+        attack, defense, stamina = (
+            stat + iv for stat, iv in zip(self.stats[self.row[species]], ivs)
+        )
+        product = attack * np.sqrt(defense) * np.sqrt(stamina)
+        return np.maximum(np.floor(product * self.cpm2 / 10), 10).astype(np.int32)
+
+    def cp(self, species: str, level: Level, ivs: Tuple[int, int, int]) -> int:
+        """:return: the CP at that level with those (attack, defense, stamina) IVs"""
+        return int(self.level_cps(species, ivs)[self.level_index(level)])
+
+    def is_perfect(self, species: str, cp: int, level: Level) -> bool:
+        """:return: whether the CP is a 15/15/15 at that level"""
+        return self.cp(species, level, (15, 15, 15)) == cp
+
+    def is_floor(self, species: str, cp: int, level: Level, floor: int = 0) -> bool:
+        """:return: whether the CP is the lowest possible IVs at that level"""
+        return self.cp(species, level, (floor, floor, floor)) == cp
+
+    def _grid_matches(
+        self, grid: np.ndarray, levels: slice, cp: int, f: int
+    ) -> List[IvMatch]:
+        found: np.ndarray = np.argwhere(grid[levels, f:, f:, f:] == cp)
+        found[:, 1:] += f
+        return [
+            IvMatch(float(self.levels[levels.start + lvl]), int(a), int(d), int(s))
+            for lvl, a, d, s in found
+        ]
+
+    def _table_matches(
+        self, species: str, levels: slice, cp: int, f: int
+    ) -> List[IvMatch]:
+        out: List[IvMatch] = []
+        for i in range(len(self.levels))[levels]:
+            for combo in self.table.combos_with_cp(species, self.cpm2[i], cp):
+                a, d, s = int(combo) >> 8, int(combo) >> 4 & 15, int(combo) & 15
+                if min(a, d, s) >= f:
+                    out.append(IvMatch(float(self.levels[i]), a, d, s))
+        return out
+
+    def _check(self, catch: Catch, grid: Optional[np.ndarray]) -> CatchResult:
+        """:param grid: the species' CP table, or None to search the table file"""
+        levels: slice = slice(0, len(self.levels))
+        if catch.level is not None:
+            i: int = self.level_index(catch.level)
+            levels = slice(i, i + 1)
+        f: int = catch.floor
+        return CatchResult(
+            catch=catch,
+            perfect=bool(
+                (self.level_cps(catch.species, (15, 15, 15))[levels] == catch.cp).any()
+            ),
+            floor=bool(
+                (self.level_cps(catch.species, (f, f, f))[levels] == catch.cp).any()
+            ),
+            matches=(
+                self._table_matches(catch.species, levels, catch.cp, f)
+                if grid is None
+                else self._grid_matches(grid, levels, catch.cp, f)
+            ),
+        )
+
+    def _source(self, species: str) -> Optional[np.ndarray]:
+        """:return: None if the table file has the species, otherwise its CP table"""
+        if self.table is not None and species in self.table.row:
+            return None
+        return self.grid(species)
+
+    def matches(
+        self, species: str, cp: int, level: Optional[Level] = None, floor: int = 0
+    ) -> List[IvMatch]:
+        """:return: every (level and) IV combo with that CP"""
+        catch = Catch(species, cp, level, floor)
+        return self._check(catch, self._source(species)).matches
+
+    def check(self, catches: Iterable[Catch]) -> List[CatchResult]:
+        """
+        Raises KeyError for unknown species or levels
+        :return: the result for each catch, in the same order
+        """
+        catches = list(catches)
+        by_species: Dict[str, List[int]] = defaultdict(list)
+        for i, catch in enumerate(catches):
+            by_species[catch.species].append(i)
+        out: List[Optional[CatchResult]] = [None] * len(catches)
+        for species, indices in by_species.items():
+            grid: Optional[np.ndarray] = self._source(species)
+            for i in indices:
+                out[i] = self._check(catches[i], grid)
+        return out
+
+
+def build_cp_engine() -> CPEngine:
+    return CPEngine(
+        Pokemon.objects.only(
+            "name",
+            "hp",
+            "attack",
+            "defense",
+            "sp_atk",
+            "sp_def",
+            "speed",
+            "pogo_nerf",
+            "nia_cust_hp",
+            "nia_cust_atk",
+            "nia_cust_def",
+        ),
+        GoPowerupLevel.objects.only("level", "cp_multiplier"),
+        settings.CP_TABLE_PATH,
+    )
+
+
+cp_memo: "VersionedMemo[CPEngine]" = VersionedMemo("cp-engine", build_cp_engine)
+
+
+def cp_engine() -> CPEngine:
+    """:return: the current CPEngine, building it if needed"""
+    return cp_memo.get()
+
+
+for _model in [Pokemon, GoPowerupLevel]:
+    post_save.connect(cp_memo.invalidate, sender=_model, dispatch_uid=f"cp-{_model}")
+    post_delete.connect(cp_memo.invalidate, sender=_model, dispatch_uid=f"cp-{_model}")
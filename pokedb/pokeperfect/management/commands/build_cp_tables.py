@@ -0,0 +1,31 @@
+"""
+Writes the precomputed CP table file that pokeperfect memory-maps
+
+    ./manage.py build_cp_tables [--path cp_tables.bin]
+
+Run it again whenever a Pokémon's stats or a CP multiplier changes;
+until then the engine notices the file is stale and doesn't use it.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from pokeperfect.cp_table import write_table
+from pokeperfect.engine import build_cp_engine, cp_memo
+
+
+class Command(BaseCommand):
+    help = "Precompute the CP lookup tables for every species"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path", default=settings.CP_TABLE_PATH, help="where to write the file"
+        )
+
+    def handle(self, *args, **options):
+        engine = build_cp_engine()
+        size: int = write_table(engine, options["path"])
+        cp_memo.forget()  # every process maps the new file on its next lookup
+        self.stdout.write(
+            f"{len(engine.names)} species × {len(engine.levels)} levels: "
+            f"{size / 2 ** 20:.1f} MB written to {options['path']}"
+        )
@@ -0,0 +1,10 @@
+from rest_framework import serializers
+
+
+class CatchSerializer(serializers.Serializer):
+    species = serializers.CharField(max_length=255)
+    cp = serializers.IntegerField(min_value=10)
+    level = serializers.DecimalField(
+        max_digits=3, decimal_places=1, required=False, allow_null=True
+    )
+    floor = serializers.IntegerField(min_value=0, max_value=15, default=0)
@@ -1,3 +1,177 @@
-from django.test import TestCase
+import os
+from decimal import Decimal
+from io import StringIO
+from math import floor, sqrt
+from tempfile import TemporaryDirectory
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from nestlist.caching import forget_all_memos
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex
+from speciesinfo.models import Pokemon
+from .engine import cp_engine, go_stats, Catch, CPEngine
+from .models import GoPowerupLevel
 
-# Create your tests here.
+CP_MULTIPLIERS = {
+    "15": "0.51739395",
+    "20": "0.5974",
+    "20.5": "0.60306662",
+    "25": "0.667934",
+    "30": "0.7317",
+    "40": "0.7903",
+}
+
+
+def cp_by_hand(stats, cpm: float, ivs) -> int:
+    a, d, s = (stat + iv for stat, iv in zip(stats, ivs))
+    return max(10, floor(a * sqrt(d) * sqrt(s) * cpm ** 2 / 10))
+
+
+class CPEngineTests(MemoTestCase):
+    """The vectorized CP tables should match the CP formula one combo at a time"""
+
+    @classmethod
+    def setUpTestData(cls):
+        dex = make_tiny_dex()
+        bulbasaur: Pokemon = dex["Bulbasaur"]
+        for field, value in dict(
+            hp=45, attack=49, defense=49, sp_atk=65, sp_def=65, speed=45
+        ).items():
+            setattr(bulbasaur, field, value)
+        bulbasaur.save()
+        for level, cpm in CP_MULTIPLIERS.items():
+            GoPowerupLevel.objects.create(
+                level=Decimal(level),
+                cp_multiplier=Decimal(cpm),
+                wild="Y",
+                total_candy=0,
+                total_dust=0,
+            )
+
+    def tearDown(self):
+        forget_all_memos()
+
+    def test_go_stats(self):
+        bulbasaur: Pokemon = Pokemon.objects.get(pk="Bulbasaur")
+        self.assertEqual(go_stats(bulbasaur), (118, 111, 128))
+        bulbasaur.pogo_nerf = True
+        self.assertEqual(go_stats(bulbasaur), (107, 101, 128))
+        bulbasaur.nia_cust_hp = 200
+        self.assertEqual(go_stats(bulbasaur), (107, 101, 200))
+
+    def test_perfect_and_floor(self):
+        engine = cp_engine()
+        self.assertEqual(engine.cp("Bulbasaur", 20, (15, 15, 15)), 637)
+        self.assertTrue(engine.is_perfect("Bulbasaur", 637, "20"))
+        self.assertFalse(engine.is_perfect("Bulbasaur", 636, 20))
+        low: int = engine.cp("Bulbasaur", 20, (10, 10, 10))
+        self.assertTrue(engine.is_floor("Bulbasaur", low, 20, floor=10))
+        with self.assertRaises(KeyError):
+            engine.cp("Bulbasaur", 21, (15, 15, 15))
+
+    def test_matches_by_hand(self):
+        engine = cp_engine()
+        stats = go_stats(Pokemon.objects.get(pk="Bulbasaur"))
+        for level, floor_iv in [("20", 0), ("25", 10), (None, 0)]:
+            cp: int = engine.cp("Bulbasaur", level or 20, (12, 7, 9))
+            expected = {
+                (float(lvl), a, d, s)
+                for lvl, cpm in CP_MULTIPLIERS.items()
+                if level in [None, lvl]
+                for a in range(floor_iv, 16)
+                for d in range(floor_iv, 16)
+                for s in range(floor_iv, 16)
+                if cp_by_hand(stats, float(cpm), (a, d, s)) == cp
+            }
+            with self.subTest(level=level, floor=floor_iv):
+                self.assertEqual(
+                    set(engine.matches("Bulbasaur", cp, level, floor_iv)), expected
+                )
+        self.assertIn((20.0, 12, 7, 9), engine.matches("Bulbasaur", cp))
+
+    def test_batch(self):
+        results = cp_engine().check(
+            [
+                Catch("Bulbasaur", 637, 20),
+                Catch("Charmander", 10, None),
+                Catch("Bulbasaur", 637, None, 10),
+            ]
+        )
+        self.assertEqual(
+            [r.catch.species for r in results], ["Bulbasaur", "Charmander", "Bulbasaur"]
+        )
+        self.assertTrue(results[0].perfect)
+        self.assertEqual(results[0].matches[0].percent, 100.0)
+        self.assertTrue(results[2].perfect)
+
+    def test_rebuilt_after_save(self):
+        self.assertTrue(cp_engine().is_perfect("Bulbasaur", 637, 20))
+        GoPowerupLevel.objects.filter(level=20).update(cp_multiplier=Decimal("0.6"))
+        with self.captureOnCommitCallbacks(execute=True):
+            GoPowerupLevel.objects.get(level=20).save()
+        self.assertFalse(cp_engine().is_perfect("Bulbasaur", 637, 20))
+
+    def test_api(self):
+        url: str = reverse("perfect:check")
+        response = self.client.post(
+            url,
+            [
+                {"species": "bulbasaur", "cp": 637, "level": "20"},
+                {"species": "Charmander", "cp": 10},
+            ],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()[0]["perfect"])
+        self.assertEqual(response.json()[0]["ivs"][0]["stamina"], 15)
+        response = self.client.post(
+            url,
+            [{"species": "Bulbasaur", "cp": 637}, {"species": "Nobody", "cp": 50}],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+
+
+class CPTableTests(CPEngineTests):
+    """The same answers should come out of the precomputed table file"""
+
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path: str = os.path.join(tmp.name, "cp_tables.bin")
+        self.override = override_settings(CP_TABLE_PATH=self.path)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        out = StringIO()
+        call_command("build_cp_tables", stdout=out)
+        self.assertIn("species × 6 levels", out.getvalue())
+
+    def test_uses_table(self):
+        engine: CPEngine = cp_engine()
+        self.assertIsNotNone(engine.table)
+        self.assertEqual(
+            engine.check([Catch("Bulbasaur", 637, 20)])[0].matches[0],
+            (20.0, 15, 15, 15),
+        )
+        self.assertFalse(engine._grids)
+
+    def test_same_as_grid(self):
+        engine: CPEngine = cp_engine()
+        grid = engine.grid("Bulbasaur")
+        for cp in range(int(grid.min()), int(grid.max()) + 2, 7):
+            with self.subTest(cp=cp):
+                self.assertEqual(
+                    engine._check(Catch("Bulbasaur", cp, None, 3), None),
+                    engine._check(Catch("Bulbasaur", cp, None, 3), grid),
+                )
+
+    def test_stale_table_ignored(self):
+        self.assertIsNotNone(cp_engine().table)
+        bulbasaur: Pokemon = Pokemon.objects.get(pk="Bulbasaur")
+        bulbasaur.nia_cust_atk = 150
+        with self.captureOnCommitCallbacks(execute=True):
+            bulbasaur.save()
+        self.assertIsNone(cp_engine().table)
+        call_command("build_cp_tables", stdout=StringIO())
+        self.assertIsNotNone(cp_engine().table)
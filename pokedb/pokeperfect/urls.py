@@ -0,0 +1,5 @@
+from django.urls import path
+from . import views
+
+app_name = "perfect"
+urlpatterns = [path("check/", views.CheckCatches.as_view(), name="check")]
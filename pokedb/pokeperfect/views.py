@@ -1,3 +1,66 @@
-from django.shortcuts import render
+from typing import Dict, List
+from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from speciesinfo.models import match_one_species
+from .engine import cp_engine, Catch, CatchResult
+from .serializers import CatchSerializer
 
-# Create your views here.
+MAX_CATCHES: int = 500
+
+
+class CheckCatches(APIView):
+    """
+    POST a list of {"species", "cp", "level" (optional), "floor" (optional)}
+    to get back which IVs each catch could have
+    """
+
+    permission_classes = [AllowAny]  # nothing is written
+
+    def post(self, request, **kwargs):
+        data = request.data if isinstance(request.data, list) else [request.data]
+        if len(data) > MAX_CATCHES:
+            return Response(
+                {"detail": f"At most {MAX_CATCHES} catches at a time"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        catches = CatchSerializer(data=data, many=True)
+        catches.is_valid(raise_exception=True)
+        engine = cp_engine()
+        errors: List[Dict] = []
+        checked: List[Catch] = []
+        for row in catches.validated_data:
+            try:
+                species: str = match_one_species(row["species"]).pk
+                if row.get("level") is not None:
+                    engine.level_index(row["level"])
+            except (ObjectDoesNotExist, MultipleObjectsReturned, KeyError) as e:
+                errors.append({"species": row["species"], "error": str(e).strip('"')})
+                continue
+            errors.append({})
+            checked.append(Catch(species, row["cp"], row.get("level"), row["floor"]))
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response([result_dict(r) for r in engine.check(checked)])
+
+
+def result_dict(result: CatchResult) -> Dict:
+    return {
+        "species": result.catch.species,
+        "cp": result.catch.cp,
+        "level": None if result.catch.level is None else float(result.catch.level),
+        "perfect": result.perfect,
+        "floor": result.floor,
+        "ivs": [
+            {
+                "level": m.level,
+                "attack": m.attack,
+                "defense": m.defense,
+                "stamina": m.stamina,
+                "percent": m.percent,
+            }
+            for m in result.matches
+        ],
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SpeciesinfoConfig(AppConfig):
     name = "speciesinfo"
     verbose_name = "Pokédex"
+
+    def ready(self):
+        # connect the signals that rebuild the species index & type chart
+        from . import dex_index, type_chart
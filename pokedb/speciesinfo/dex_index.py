@@ -0,0 +1,240 @@
+"""
+In-memory index of the Pokémon table for match_species_by_name_or_number
+
+The whole dex is only a thousand-odd rows, so it is loaded once per process
+and searched with dicts and sets instead of a dozen queries per lookup.
+It is rebuilt after any Pokémon (or one of its lookup tables) is saved.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from typing import Dict, List, Set, FrozenSet, Optional, Iterable, Union, Tuple
+from collections import defaultdict
+from django.db.models.query import QuerySet
+from nestlist.caching import VersionedMemo
+from nestlist.utils import str_int
+from .models import Pokemon, Generation, Type, EggGroup, BodyPlan
+
+STARTER_CATEGORIES = [50, 52, 53]
+
+# handle some edge case misspellings
+MISSPELLINGS: List[Tuple[str, str]] = [
+    ("m2", "mewtwo"),
+    ("mew2", "mewtwo"),
+    ("mew 2", "mewtwo"),
+    ("porygon z", "porygon-z"),
+    ("porygonz", "porygon-z"),
+    ("porygon 2", "porygon2"),
+    ("porygon-2", "porygon2"),
+]
+
+
+def _label_index(
+    labels: Dict[int, Iterable[Optional[str]]], members: Dict[int, Set[str]]
+) -> Dict[str, Set[str]]:
+    """
+    :param labels: lookup table id -> its names
+    :param members: lookup table id -> pokémon with that id
+    :return: lowercase name -> pokémon, for icontains-style scans over a few dozen names
+    """
+    out: Dict[str, Set[str]] = defaultdict(set)
+    for pk, names in labels.items():
+        for name in names:
+            if name:
+                out[name.lower()] |= members.get(pk, set())
+    return out
+
+
+class SpeciesIndex:
+    def __init__(self, species: Iterable[Pokemon]):
+        self.by_pk: Dict[str, Pokemon] = {}
+        self.exact: Dict[str, List[str]] = defaultdict(list)
+        self.by_dex: Dict[int, Set[str]] = defaultdict(set)
+        self.by_category: Dict[Optional[int], Set[str]] = defaultdict(set)
+        self.previous: Dict[str, Optional[str]] = {}
+        generations: Dict[int, Set[str]] = defaultdict(set)
+        primary_types: Dict[int, Set[str]] = defaultdict(set)
+        eggs: Dict[int, Set[str]] = defaultdict(set)
+        bodies: Dict[int, Set[str]] = defaultdict(set)
+        for sp in species:
+            self.by_pk[sp.pk] = sp
+            self.exact[sp.name.lower()].append(sp.pk)
+            self.by_dex[sp.dex_number].add(sp.pk)
+            self.by_category[sp.category_id].add(sp.pk)
+            self.previous[sp.pk] = sp.previous_evolution_id
+            generations[sp.generation_id].add(sp.pk)
+            primary_types[sp.type1_id].add(sp.pk)
+            for egg in [sp.egg1_id, sp.egg2_id]:
+                eggs[egg].add(sp.pk)
+            bodies[sp.body_plan_id].add(sp.pk)
+        self.names: List[Tuple[str, str]] = [
+            (n, pk) for n, l in self.exact.items() for pk in l
+        ]
+        self.order: Dict[str, Tuple[int, str]] = {
+            pk: (sp.dex_number, pk) for pk, sp in self.by_pk.items()
+        }
+
+        # inverted indexes for the attribute searches
+        self.regions = _label_index(
+            {g.pk: [g.region] for g in Generation.objects.all()}, generations
+        )
+        self.types = _label_index(
+            {t.pk: [t.name] for t in Type.objects.all()}, primary_types
+        )
+        self.egg_groups = _label_index(
+            {e.pk: [e.name, e.stadium2name] for e in EggGroup.objects.all()}, eggs
+        )
+        self.body_plans = _label_index(
+            {b.pk: [b.name, b.alt_name] for b in BodyPlan.objects.all()}, bodies
+        )
+
+        # pre-computed evolution chains, two stages in each direction
+        children: Dict[str, Set[str]] = defaultdict(set)
+        for pk, prev in self.previous.items():
+            if prev:
+                children[prev].add(pk)
+        self.ancestors: Dict[str, Set[str]] = {}
+        self.descendants: Dict[str, Set[str]] = {}
+        for pk in self.by_pk:
+            parents: Set[str] = {pk}
+            for _ in range(2):
+                parents |= {
+                    self.previous[p]
+                    for p in parents
+                    if self.previous.get(p) and self.previous[p] != "(Egg)"
+                }
+            self.ancestors[pk] = parents - {pk}
+            kids: Set[str] = set(children[pk])
+            self.descendants[pk] = kids | {g for k in kids for g in children[k]}
+
+        self._scopes: Dict[str, FrozenSet[str]] = {}
+
+    def scope(self, input_set: "QuerySet[Pokemon]") -> FrozenSet[str]:
+        """
+        The primary keys in a QuerySet of Pokémon, memoized by its SQL
+        Since this index is rebuilt whenever the table changes, the memo can't go stale.
+        """
+        if not input_set.query.where and input_set.query.can_filter():
+            return frozenset(self.by_pk)
+        key: str = str(input_set.query)
+        if key not in self._scopes:
+            self._scopes[key] = frozenset(input_set.values_list("pk", flat=True))
+        return self._scopes[key]
+
+    def sort(self, pks: Iterable[str]) -> List[Pokemon]:
+        return [self.by_pk[pk] for pk in sorted(set(pks), key=self.order.__getitem__)]
+
+    def evolutions(
+        self, found: Set[str], eligible: FrozenSet[str], pre: bool, post: bool
+    ) -> Set[str]:
+        """
+        :param found: species to start from
+        :param eligible: species allowed in the results
+        :param pre: also include the previous evolutions of found
+        :param post: also include the future evolutions of found
+        :return: the eligible species among found and its relatives
+        """
+        out: Set[str] = set(found)
+        for pk in found:
+            if pre:
+                out |= self.ancestors[pk]
+            if post:
+                out |= self.descendants[pk]
+        return out & eligible
+
+    def attribute_matches(self, sp_txt: str, eligible: FrozenSet[str]) -> Set[str]:
+        """Region, type, egg group (egg:xyz), and body plan (body:xyz) searches"""
+
+        def contains(labels: Dict[str, Set[str]], text: str) -> Set[str]:
+            return {pk for label, pks in labels.items() if text in label for pk in pks}
+
+        out: Set[str] = contains(self.regions, sp_txt) | contains(self.types, sp_txt)
+        if len(sp_txt) > 7 and sp_txt[:4] == "egg:":
+            out |= contains(self.egg_groups, sp_txt[4:])
+        if len(sp_txt) > 8 and sp_txt[:5] == "body:":
+            out |= contains(self.body_plans, sp_txt[5:])
+        return out & eligible
+
+    def search(
+        self,
+        sp_txt: Union[str, int],
+        input_set: "QuerySet[Pokemon]" = Pokemon.objects.all(),
+        age_up: bool = False,
+        previous_evolution_search: bool = False,
+        only_one: bool = False,
+        loose_search: bool = False,
+    ) -> List[Pokemon]:
+        """Same parameters and rules as match_species_by_name_or_number"""
+        sp_txt = str(sp_txt).strip().lower()
+        if not sp_txt:
+            # return nothing if nothing is searched for
+            return []
+        for wrong, right in MISSPELLINGS:
+            sp_txt = sp_txt.replace(wrong, right)
+        eligible: FrozenSet[str] = self.scope(input_set)
+
+        # Handle Abra, Mew, megas, etc…
+        if not loose_search:
+            exact_name_hit = [pk for pk in self.exact.get(sp_txt, []) if pk in eligible]
+            if exact_name_hit:
+                return self.sort(exact_name_hit)
+
+        # return starters and their evolutions
+        if "start" in sp_txt:
+            return self.sort(
+                pk
+                for cat in STARTER_CATEGORIES
+                for pk in self.by_category.get(cat, set())
+                if pk in eligible
+            )
+
+        # handle numeric queries
+        # a search for "2" returns Ivysaur and not Porygon 2
+        if str_int(sp_txt):
+            me: Set[str] = self.by_dex.get(int(sp_txt), set()) & eligible
+            # if you enter a number when looking for a single species, stop here
+            # stop if nothing was found, too
+            if only_one or not me:
+                return self.sort(me)
+            return self.sort(
+                self.evolutions(me, eligible, previous_evolution_search, age_up)
+            )
+
+        # handle short queries
+        if len(sp_txt) < 3:
+            return self.sort(
+                pk for n, pk in self.names if sp_txt in n and pk in eligible
+            )
+
+        # Queries matching a Region, Type, or egg do not get the previous/next evolution searches
+        attributes: Set[str] = self.attribute_matches(sp_txt, eligible)
+        if attributes:
+            return self.sort(attributes)
+
+        # search by name (among all species) and respect future/past evolution searching
+        return self.sort(
+            self.evolutions(
+                {pk for n, pk in self.names if sp_txt in n},
+                eligible,
+                previous_evolution_search,
+                age_up,
+            )
+        )
+
+
+def build_species_index() -> SpeciesIndex:
+    return SpeciesIndex(Pokemon.objects.all())
+
+
+dex_memo: "VersionedMemo[SpeciesIndex]" = VersionedMemo("dex", build_species_index)
+
+
+def species_index() -> SpeciesIndex:
+    """:return: the current SpeciesIndex, building it if needed"""
+    return dex_memo.get()
+
+
+for _model in [Pokemon, Generation, Type, EggGroup, BodyPlan]:
+    post_save.connect(dex_memo.invalidate, sender=_model, dispatch_uid=f"dex-{_model}")
+    post_delete.connect(
+        dex_memo.invalidate, sender=_model, dispatch_uid=f"dex-{_model}"
+    )
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# trigram GIN indexes for speciesinfo.search: the plain column answers pg_trgm's % operator,
+# and UPPER(column) answers Django's icontains (UPPER(column::text) LIKE UPPER(…))
+TRIGRAM_COLUMNS = [("pokémon", "Name", "pokemon_name")]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return  # speciesinfo.search ranks in Python everywhere else
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column, index in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index}_trgm" '
+            f'ON "{table}" USING gin ("{column}" gin_trgm_ops)'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{index}_upper_trgm" '
+            f'ON "{table}" USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, column, index in TRIGRAM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index}_trgm"')
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{index}_upper_trgm"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("speciesinfo", "0002_auto_20191031_0318")]
+
+    operations = [migrations.RunPython(create_indexes, drop_indexes)]
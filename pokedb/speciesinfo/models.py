@@ -357,119 +357,40 @@ def match_species_by_name_or_number(
                     set to true to return those; otherwise assumes you exact matches match
     :return: a QuerySet of pokémon matching the input string
     """
+    from .dex_index import species_index
 
-    def return_me(tentative_list: "QuerySet[Pokemon]") -> "QuerySet[Pokemon]":
-        """Inner function to clean up the result list"""
-        return tentative_list.order_by("dex_number").distinct()
+    found: List[Pokemon] = species_index().search(
+        sp_txt, input_set, age_up, previous_evolution_search, only_one, loose_search
+    )
+    if not found:
+        return input_set.none()
+    return input_set.filter(pk__in=[sp.pk for sp in found]).order_by("dex_number")
 
-    def evo_searches(
-        orig_pkmn: "QuerySet[Pokemon]", look_for_pre: bool, look_for_next: bool
-    ) -> "QuerySet[Pokemon]":
-        """
-        :param orig_pkmn: QuerySet assumed to contain a single pokémon
-        :param look_for_pre: same as previous_evolution_search from above
-        :param look_for_next: same as age_up from above
-        :return: sends the resulting QuerySet to return_me
-        """
 
-        def find_previous_pokemon(
-            search_qset: "QuerySet[Pokemon]", doit: bool
-        ) -> "QuerySet[Pokemon]":
-            if not doit:
-                return search_qset
-            return (
-                Pokemon.objects.filter(pk__in=search_qset.values("previous_evolution"))
-                .exclude(pk="(Egg)")
-                .distinct()
-                | search_qset.distinct()
-            ).distinct()
-
-        p = find_previous_pokemon(
-            find_previous_pokemon(orig_pkmn, look_for_pre), look_for_pre
-        )
-        future = (
-            input_set.filter(
-                Q(previous_evolution__in=orig_pkmn)
-                | Q(previous_evolution__previous_evolution__in=orig_pkmn)
-            )
-            if look_for_next
-            else input_set.none()
-        ).distinct()
-        return input_set.filter(pk__in=(p | future))
-
-    sp_txt = str(sp_txt).strip().lower()
-    if not sp_txt:
-        # return nothing if nothing is searched for
-        return input_set.none()
+def match_one_species(
+    sp_txt: Union[str, int],
+    input_set: "QuerySet[Pokemon]" = Pokemon.objects.all(),
+    age_up: bool = False,
+    previous_evolution_search: bool = False,
+    loose_search: bool = False,
+) -> Pokemon:
+    """
+    match_species_by_name_or_number(..., only_one=True).get() without touching the database
+    (once the species index is built)
+    Raises Pokemon.DoesNotExist or Pokemon.MultipleObjectsReturned just like .get()
+    """
+    from .dex_index import species_index
 
-    # handle some edge case misspellings
-    sp_txt = sp_txt.replace("m2", "mewtwo")
-    sp_txt = sp_txt.replace("mew2", "mewtwo")
-    sp_txt = sp_txt.replace("mew 2", "mewtwo")
-    sp_txt = sp_txt.replace("porygon z", "porygon-z")
-    sp_txt = sp_txt.replace("porygonz", "porygon-z")
-    sp_txt = sp_txt.replace("porygon 2", "porygon2")
-    sp_txt = sp_txt.replace("porygon-2", "porygon2")
-
-    # Handle Abra, Mew, megas, etc…
-    exact_name_hit: "QuerySet[Pokemon]" = input_set.none() if loose_search else input_set.filter(
-        name__iexact=sp_txt
+    found: List[Pokemon] = species_index().search(
+        sp_txt, input_set, age_up, previous_evolution_search, True, loose_search
     )
-    if exact_name_hit.count():
-        return return_me(exact_name_hit)
-
-    # return starters and their evolutions
-    if "start" in sp_txt:
-        return return_me(input_set.filter(category__in=[50, 52, 53]))
-
-    # handle numeric queries
-    # a search for "2" returns Ivysaur and not Porygon 2
-    if str_int(sp_txt):
-        me = input_set.filter(dex_number=sp_txt)
-        # if you enter a number when looking for a single species, stop here
-        # stop if nothing was found, too
-        if only_one or not me:
-            return return_me(me)
-        return return_me(evo_searches(me, previous_evolution_search, age_up))
-
-    # handle short queries
-    if len(sp_txt) < 3:
-        return return_me(input_set.filter(name__icontains=sp_txt))
-
-    # using this dict as a way to be extensible and comment why these functions get called
-    attribute_match: Dict[str, QuerySet[Pokemon]] = {
-        "region": input_set.filter(generation__region__icontains=sp_txt),
-        "type": match_species_by_type(sp_txt, input_set),
-        "egg group": (
-            match_species_by_egg_group(sp_txt[4:], input_set)
-            if len(sp_txt) > 7 and sp_txt[:4] == "egg:"
-            else input_set.none()
-        ),
-        "body plan": (
-            match_species_by_body_plan(sp_txt[5:], input_set)
-            if len(sp_txt) > 8 and sp_txt[:5] == "body:"
-            else input_set.none()
-        ),
-    }
-    # Queries matching a Region, Type, or egg do not get the previous/next evolution searches
-    if not all(bool(value) is False for value in attribute_match.values()):
-        # There has to be a better way to do this
-        # this = join unknown multiple QuerySets from a list
-        out = input_set.none()
-        for attr in attribute_match.keys():
-            out = out | attribute_match[attr]
-        return return_me(out)
-
-    # search by name and respect future/past evolution searching
-    return return_me(
-        input_set.filter(
-            pk__in=evo_searches(
-                Pokemon.objects.filter(name__icontains=sp_txt),
-                previous_evolution_search,
-                age_up,
-            )
+    if not found:
+        raise Pokemon.DoesNotExist(f"No pokémon matches {sp_txt}")
+    if len(found) > 1:
+        raise Pokemon.MultipleObjectsReturned(
+            f"{len(found)} pokémon match {sp_txt}"
         )
-    )
+    return found[0]
 
 
 def nestable_species() -> "QuerySet[Pokemon]":
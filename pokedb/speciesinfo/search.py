@@ -0,0 +1,63 @@
+"""
+Ranked, typo-tolerant Pokémon name search; see nestlist.search for how it's scored
+"""
+
+from typing import Dict, List, Optional, Union, Tuple
+from nestlist.search import (
+    DEFAULT_LIMIT,
+    best_score,
+    on_postgres,
+    trigram_filter,
+    trigram_score,
+)
+from nestlist.utils import str_int
+from .models import Pokemon
+
+
+def _search_species_pg(text: str, limit: int) -> List[Tuple[Pokemon, float]]:
+    """Postgres only: the closest Pokémon, scored, ranked, and cut to the limit in SQL"""
+    species = (
+        Pokemon.objects.filter(trigram_filter(["name"], text))
+        .annotate(score=trigram_score(["name"], text))
+        .order_by("-score", "dex_number", "name")
+    )
+    return [(sp, sp.score) for sp in species[:limit]]
+
+
+def _species_scores_py(text: str) -> Dict[str, float]:
+    from .dex_index import species_index
+
+    scores: Dict[str, float] = {}
+    for name, pk in species_index().names:
+        score: Optional[float] = best_score(text, [name])
+        if score is not None:
+            scores[pk] = score
+    return scores
+
+
+def search_species(
+    search: Union[str, int], limit: int = DEFAULT_LIMIT
+) -> List[Tuple[Pokemon, float]]:
+    """
+    :param search: (part of) a Pokémon's name, misspelled or not, or its dex number
+    :param limit: the most results to return
+    :return: (Pokémon, similarity) pairs, closest first; every form of a dex number
+    """
+    text: str = str(search).strip()
+    if not text:
+        return []
+    if str_int(text):
+        return [
+            (sp, 1.0)
+            for sp in Pokemon.objects.filter(dex_number=int(text)).order_by("name")[
+                :limit
+            ]
+        ]
+    if on_postgres():
+        return _search_species_pg(text, limit)
+    scores: Dict[str, float] = _species_scores_py(text)
+    species: Dict[str, Pokemon] = Pokemon.objects.in_bulk(list(scores))
+    ranked: List[Pokemon] = sorted(
+        species.values(), key=lambda sp: (-scores[sp.pk], sp.dex_number, sp.pk)
+    )
+    return [(sp, scores[sp.pk]) for sp in ranked[:limit]]
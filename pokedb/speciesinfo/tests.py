@@ -1,11 +1,21 @@
+from typing import List
 from django.test import TestCase
+from django.urls import reverse
+from nestlist.caching import forget_all_memos
+from nestlist.tests.sample_data import MemoTestCase, make_tiny_dex
 from .models import (
     Pokemon,
     match_species_by_name_or_number,
+    match_one_species,
     match_species_by_type,
     nestable_species,
     enabled_in_pogo,
+    Type,
+    TypeEffectiveness,
+    TypeEffectivenessRating,
 )
+from .search import search_species
+from .type_chart import type_chart, CHARTS
 
 
 # Create your tests here.
@@ -43,3 +53,204 @@ class TestSpeciesFilter(TestCase):
             Pokemon.objects.get(name="Alolan Vulpix"),
             enabled_in_pogo(nestable_species()),
         )
+
+
+class TestSpeciesIndex(MemoTestCase):
+    """match_species_by_name_or_number goes through the in-memory index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dex = make_tiny_dex()
+
+    def names(self, *args, **kwargs) -> List[str]:
+        return [p.name for p in match_species_by_name_or_number(*args, **kwargs)]
+
+    def test_exact_and_loose(self):
+        self.assertEqual(self.names("abra"), ["Abra"])
+        self.assertEqual(self.names("abra", loose_search=True), ["Abra", "Kadabra"])
+        self.assertEqual(
+            self.names("bulba", age_up=True), ["Bulbasaur", "Ivysaur", "Venusaur"]
+        )
+
+    def test_numbers(self):
+        self.assertEqual(self.names(2), ["Ivysaur"])
+        self.assertEqual(
+            self.names("2", previous_evolution_search=True, age_up=True),
+            ["Bulbasaur", "Ivysaur", "Venusaur"],
+        )
+        self.assertEqual(self.names("2", only_one=True, age_up=True), ["Ivysaur"])
+        self.assertEqual(self.names(999), [])
+
+    def test_attributes(self):
+        self.assertEqual(len(self.names("kanto")), len(self.dex))
+        self.assertEqual(self.names("ghost"), ["Gastly"])
+        self.assertEqual(self.names("egg:human"), ["Abra", "Kadabra"])
+        self.assertEqual(self.names("body:quad"), ["Bulbasaur"])
+
+    def test_input_set(self):
+        basics = Pokemon.objects.filter(category=5)
+        self.assertEqual(
+            self.names("saur", input_set=basics, age_up=True), ["Bulbasaur"]
+        )
+        self.assertEqual(self.names("", input_set=basics), [])
+
+    def test_match_one(self):
+        self.assertEqual(match_one_species("kadabra").pk, self.dex["Kadabra"].pk)
+        with self.assertRaises(Pokemon.DoesNotExist):
+            match_one_species("mewtwo")
+        with self.assertRaises(Pokemon.MultipleObjectsReturned):
+            match_one_species("saur")
+        with self.assertNumQueries(0):
+            match_one_species("4")
+
+    def test_rebuilt_after_save(self):
+        self.assertEqual(
+            self.names("kadab", previous_evolution_search=True), ["Abra", "Kadabra"]
+        )
+        kadabra = self.dex["Kadabra"]
+        kadabra.previous_evolution = None
+        with self.captureOnCommitCallbacks(execute=True):
+            kadabra.save()
+        self.assertEqual(
+            self.names("kadab", previous_evolution_search=True), ["Kadabra"]
+        )
+
+
+class TestTypeChart(MemoTestCase):
+    """The matrices should give the same multipliers as the TypeEffectiveness rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dex = make_tiny_dex()
+        strong = TypeEffectivenessRating.objects.create(
+            description="super effective",
+            dmg_multiplier=2,
+            pogodamage=1.6,
+            oldpogodamage=1.4,
+        )
+        weak = TypeEffectivenessRating.objects.create(
+            description="not very effective",
+            dmg_multiplier=0.5,
+            pogodamage=0.625,
+            oldpogodamage=0.714,
+        )
+        for attack, defense, relation in [
+            ("Fire", "Grass", strong),
+            ("Fire", "Fire", weak),
+            ("Fire", "Water", weak),
+            ("Psychic", "Poison", strong),
+            ("Ghost", "Psychic", strong),
+            ("Ghost", "Ghost", strong),
+            ("Electric", "Water", strong),
+            ("Electric", "Grass", weak),
+        ]:
+            TypeEffectiveness.objects.create(
+                otype=Type.objects.get(name=attack),
+                dtype=Type.objects.get(name=defense),
+                relation=relation,
+            )
+
+    def tearDown(self):
+        forget_all_memos()
+
+    def by_orm(self, attack: Type, sp: Pokemon, chart: str) -> float:
+        out: float = 1.0
+        for t in [sp.type1, sp.type2]:
+            effect = TypeEffectiveness.objects.filter(otype=attack, dtype=t).first()
+            if t and effect:
+                out *= getattr(effect.relation, chart)
+        return out
+
+    def test_same_as_orm(self):
+        chart = type_chart()
+        types = list(Type.objects.all())
+        for name in CHARTS:
+            scores = chart.against(types, chart=name)
+            for i, attack in enumerate(types):
+                for j, sp in enumerate(chart.species):
+                    with self.subTest(chart=name, attack=attack, species=sp):
+                        self.assertAlmostEqual(
+                            scores[i, j],
+                            self.by_orm(attack, Pokemon.objects.get(pk=sp), name),
+                        )
+
+    def test_lookups(self):
+        chart = type_chart()
+        self.assertAlmostEqual(chart.multiplier("fire", ["Grass", "Poison"]), 1.6)
+        self.assertAlmostEqual(
+            chart.multiplier(Type.objects.get(name="Electric"), ["Water", None]), 1.6,
+        )
+        self.assertAlmostEqual(
+            chart.against(["Ghost"], ["Gastly", "Abra"], "oldpogodamage")[0, 1], 1.4
+        )
+        self.assertEqual(
+            chart.ranked("Fire", ["Squirtle", "Pikachu", "Bulbasaur"]),
+            ["Bulbasaur", "Pikachu", "Squirtle"],
+        )
+        with self.assertRaises(KeyError):
+            chart.type_index("Dragon")
+
+    def test_rebuilt_after_save(self):
+        self.assertAlmostEqual(type_chart().multiplier("Fire", ["Grass"]), 1.6)
+        with self.captureOnCommitCallbacks(execute=True):
+            TypeEffectiveness.objects.get(
+                otype__name="Fire", dtype__name="Grass"
+            ).delete()
+        self.assertAlmostEqual(type_chart().multiplier("Fire", ["Grass"]), 1.0)
+
+    def test_api(self):
+        url: str = reverse("pokedex:matchups")
+        response = self.client.get(
+            url, {"attack": ["fire", "Electric"], "chart": "dmg_multiplier", "limit": 3}
+        )
+        self.assertEqual(response.status_code, 200)
+        fire = response.json()["matchups"]["Fire"]
+        self.assertEqual(len(fire), 3)
+        self.assertEqual({row["multiplier"] for row in fire}, {2.0})
+        response = self.client.get(
+            url, {"attack": "Electric", "species": ["Squirtle", "bulbasaur"]}
+        )
+        self.assertEqual(
+            response.json()["matchups"]["Electric"],
+            [
+                {"species": "Squirtle", "multiplier": 1.6},
+                {"species": "Bulbasaur", "multiplier": 0.625},
+            ],
+        )
+        for bad in [{"attack": "Dragon"}, {}, {"attack": "Fire", "chart": "x"}]:
+            self.assertEqual(self.client.get(url, bad).status_code, 400)
+
+
+class TestSpeciesSearch(MemoTestCase):
+    """search_species ranks by trigram similarity, forgiving typos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dex = make_tiny_dex()
+
+    def names(self, search, **kwargs) -> List[str]:
+        return [sp.pk for sp, _ in search_species(search, **kwargs)]
+
+    def test_typos(self):
+        self.assertEqual(self.names("bulbasuar")[0], "Bulbasaur")
+        self.assertEqual(self.names("Charmandr"), ["Charmander"])
+        self.assertEqual(self.names("pikachoo"), ["Pikachu"])
+        self.assertEqual(self.names("zzz"), [])
+        self.assertEqual(self.names(""), [])
+
+    def test_ranked(self):
+        found = search_species("saur")
+        self.assertEqual(
+            set(sp.pk for sp, _ in found), {"Bulbasaur", "Ivysaur", "Venusaur"}
+        )
+        self.assertEqual([s for _, s in found], sorted([s for _, s in found])[::-1])
+        self.assertEqual(len(search_species("saur", limit=1)), 1)
+
+    def test_dex_number(self):
+        self.assertEqual(search_species("2"), [(self.dex["Ivysaur"], 1.0)])
+        self.assertEqual(self.names(25), ["Pikachu"])
+
+    def test_api(self):
+        response = self.client.get(reverse("pokedex:search"), {"q": "squirtel"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["species"], "Squirtle")
@@ -0,0 +1,143 @@
+"""
+Dense type × type effectiveness matrices, for scoring matchups over the whole dex at once
+
+TypeEffectiveness only stores the pairs that aren't neutral, one row per pair, so a
+"best counters" list through the ORM is a join per defender.  Here every multiplier
+column of TypeEffectivenessRating becomes a NumPy matrix indexed by
+[attacking type, defending type], and every Pokémon's types become two index arrays,
+so one attacking type against every species is two gathers and a multiply.
+It is rebuilt after any Pokémon, type, or effectiveness row is saved.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from typing import Dict, List, Optional, Iterable, Union
+import numpy as np
+from nestlist.caching import VersionedMemo
+from .models import Pokemon, Type, TypeEffectiveness, TypeEffectivenessRating
+
+CHARTS: List[str] = ["pogodamage", "oldpogodamage", "dmg_multiplier"]
+NO_TYPE: int = -1
+
+
+class TypeChart:
+    def __init__(
+        self,
+        types: Iterable[Type],
+        effects: Iterable[TypeEffectiveness],
+        species: Iterable[Pokemon],
+    ):
+        """
+        :param types: every type
+        :param effects: every effectiveness row, with its relation
+        :param species: every Pokémon to score
+        """
+        types = list(types)
+        self.type_names: List[str] = [t.name for t in types]
+        self.by_id: Dict[int, int] = {t.id: i for i, t in enumerate(types)}
+        self.by_name: Dict[str, int] = {t.name.lower(): i for i, t in enumerate(types)}
+        self.matrices: Dict[str, np.ndarray] = {
+            chart: np.ones((len(types), len(types))) for chart in CHARTS
+        }
+        for effect in effects:
+            if effect.relation is None:
+                continue
+            o, d = self.by_id[effect.otype_id], self.by_id[effect.dtype_id]
+            for chart in CHARTS:
+                self.matrices[chart][o, d] = getattr(effect.relation, chart)
+        for matrix in self.matrices.values():
+            matrix.flags.writeable = False
+        self.species: List[str] = []
+        type1: List[int] = []
+        type2: List[int] = []
+        for sp in species:
+            self.species.append(sp.pk)
+            type1.append(self.by_id[sp.type1_id])
+            type2.append(self.by_id.get(sp.type2_id, NO_TYPE))
+        self.species_row: Dict[str, int] = {
+            name: i for i, name in enumerate(self.species)
+        }
+        self.type1: np.ndarray = np.array(type1, dtype=np.intp)
+        self.type2: np.ndarray = np.array(type2, dtype=np.intp)
+
+    def type_index(self, t: Union[Type, int, str]) -> int:
+        """
+        Raises KeyError for unknown types
+        :param t: a Type, its ID, or its name (like Type.matches)
+        :return: its row & column in the matrices
+        """
+        if isinstance(t, Type):
+            return self.by_id[t.id]
+        if isinstance(t, int) or str(t).strip().isdigit():
+            return self.by_id[int(t)]
+        return self.by_name[str(t).lower().strip()]
+
+    def matrix(self, chart: str = "pogodamage") -> np.ndarray:
+        """Raises KeyError for charts other than those in CHARTS"""
+        return self.matrices[chart]
+
+    def multiplier(
+        self,
+        attack: Union[Type, int, str],
+        defense: Iterable[Union[Type, int, str]],
+        chart: str = "pogodamage",
+    ) -> float:
+        """:return: the multiplier of the attacking type against one or two defending types"""
+        row: np.ndarray = self.matrix(chart)[self.type_index(attack)]
+        return float(np.prod([row[self.type_index(t)] for t in defense if t]))
+
+    def against(
+        self,
+        attacks: Iterable[Union[Type, int, str]],
+        species: Optional[Iterable[str]] = None,
+        chart: str = "pogodamage",
+    ) -> np.ndarray:
+        """
+        Raises KeyError for unknown types or species
+        :param attacks: the attacking types
+        :param species: primary keys of the defending Pokémon (default: every Pokémon)
+        :param chart: which column of TypeEffectivenessRating to use
+        :return: multipliers indexed by [attacking type, species]; dual types multiply
+        """
+        rows: np.ndarray = self.matrix(chart)[[self.type_index(t) for t in attacks]]
+        type1, type2 = self.type1, self.type2
+        if species is not None:
+            picked: List[int] = [self.species_row[sp] for sp in species]
+            type1, type2 = type1[picked], type2[picked]
+        # a NO_TYPE of -1 indexes the last column, so mask those back to neutral
+        return rows[:, type1] * np.where(type2 == NO_TYPE, 1.0, rows[:, type2])
+
+    def ranked(
+        self,
+        attack: Union[Type, int, str],
+        species: Optional[Iterable[str]] = None,
+        chart: str = "pogodamage",
+    ) -> List[str]:
+        """:return: the defending Pokémon, most vulnerable to the attacking type first"""
+        names: List[str] = self.species if species is None else list(species)
+        scores: np.ndarray = self.against([attack], names, chart)[0]
+        return [names[i] for i in np.argsort(-scores, kind="stable")]
+
+
+def build_type_chart() -> TypeChart:
+    return TypeChart(
+        Type.objects.all(),
+        TypeEffectiveness.objects.select_related("relation"),
+        Pokemon.objects.only("name", "type1", "type2"),
+    )
+
+
+chart_memo: "VersionedMemo[TypeChart]" = VersionedMemo("type-chart", build_type_chart)
+
+
+def type_chart() -> TypeChart:
+    """:return: the current TypeChart, building it if needed"""
+    return chart_memo.get()
+
+
+for _model in [Pokemon, Type, TypeEffectiveness, TypeEffectivenessRating]:
+    post_save.connect(
+        chart_memo.invalidate, sender=_model, dispatch_uid=f"chart-{_model}"
+    )
+    post_delete.connect(
+        chart_memo.invalidate, sender=_model, dispatch_uid=f"chart-{_model}"
+    )
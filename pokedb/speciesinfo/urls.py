@@ -2,4 +2,8 @@ from django.urls import path
 from . import views
 
 app_name = "pokedex"
-urlpatterns = [path("", views.nothing)]
+urlpatterns = [
+    path("", views.nothing),
+    path("matchup/", views.Matchups.as_view(), name="matchups"),
+    path("search/", views.SpeciesSearch.as_view(), name="search"),
+]
@@ -1,5 +1,16 @@
+from typing import Dict, List, Optional
+from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
 from django.shortcuts import render
 from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+import numpy as np
+from nestlist.utils import query_limit
+from .models import match_one_species
+from .search import search_species, DEFAULT_LIMIT
+from .type_chart import type_chart, CHARTS
 
 
 # Create your views here.
@@ -7,3 +18,71 @@ from django.http import HttpResponse
 
 def nothing(request, **kwargs):
     return HttpResponse("I'll implement this later.", status=501)
+
+
+class Matchups(APIView):
+    """
+    How much damage each attacking type does to many defenders at once
+
+    ?attack=Fire&attack=Water          attacking types (names or IDs; at least one)
+    &species=Bulbasaur&species=4       defenders (default: the whole dex)
+    &chart=pogodamage                  pogodamage, oldpogodamage, or dmg_multiplier
+    &limit=20                          only the most vulnerable defenders for each type
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, **kwargs):
+        params = request.query_params
+        chart: str = params.get("chart", "pogodamage")
+        attacks: List[str] = params.getlist("attack")
+        limit: Optional[int] = query_limit(params, None)
+        if chart not in CHARTS or not attacks:
+            return Response(
+                {"detail": f"Needs at least one attack and a chart in {CHARTS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        types = type_chart()
+        try:
+            names: List[str] = (
+                [match_one_species(sp).pk for sp in params.getlist("species")]
+                if "species" in params
+                else types.species
+            )
+            scores: np.ndarray = types.against(attacks, names, chart)
+        except (ObjectDoesNotExist, MultipleObjectsReturned, KeyError) as e:
+            return Response(
+                {"detail": str(e).strip('"')}, status=status.HTTP_400_BAD_REQUEST
+            )
+        out: Dict[str, List[Dict]] = {}
+        for attack, row in zip(attacks, scores):
+            ranked: np.ndarray = np.argsort(-row, kind="stable")[:limit]
+            out[types.type_names[types.type_index(attack)]] = [
+                {"species": names[i], "multiplier": float(row[i])} for i in ranked
+            ]
+        return Response({"chart": chart, "matchups": out})
+
+
+class SpeciesSearch(APIView):
+    """
+    Pokémon whose names are closest to the search, typos and all
+
+    ?q=bulbasuar       (part of) the name, or the dex number
+    &limit=10          the most results to return
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, **kwargs):
+        limit: int = query_limit(request.query_params, DEFAULT_LIMIT)
+        found = search_species(request.query_params.get("q", ""), limit)
+        return Response(
+            [
+                {
+                    "species": sp.pk,
+                    "dex_number": sp.dex_number,
+                    "score": round(score, 3),
+                }
+                for sp, score in found
+            ]
+        )